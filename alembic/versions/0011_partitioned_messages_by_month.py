@@ -0,0 +1,110 @@
+"""Partitioned messages by month
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 20:14:52.671094
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+# Partitions created after the current month, later ones are created by
+# `python -m faqmy_backend partitions`
+MONTHS_AHEAD = 3
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    # A partitioned table can't be referred to by the id alone
+    op.drop_constraint('reply_jobs_message_id_fkey', 'reply_jobs', type_='foreignkey')
+    op.drop_constraint('messages_parent_id_fkey', 'messages', type_='foreignkey')
+
+    op.rename_table('messages', 'messages_unpartitioned')
+    op.execute('ALTER INDEX messages_pkey RENAME TO messages_unpartitioned_pkey')
+    op.drop_index('ix_messages_conversation_id_created_at', table_name='messages_unpartitioned')
+    op.drop_index('ix_messages_parent_id', table_name='messages_unpartitioned')
+    op.execute('ALTER TABLE messages_unpartitioned RENAME CONSTRAINT messages_conversation_id_fkey TO messages_unpartitioned_conversation_id_fkey')
+
+    op.create_table('messages',
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('conversation_id', sa.String(length=255), nullable=False),
+    sa.Column('parent_id', sa.String(length=255), nullable=True),
+    sa.Column('who', sa.Enum('user', 'bot', name='messagetypeenum', native_enum=False, length=16), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('id', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ondelete='cascade'),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+
+    first = op.get_bind().execute(
+        sa.text('SELECT min(created_at) FROM messages_unpartitioned')
+    ).scalar()
+    this_month = datetime.datetime.now(datetime.timezone.utc).date().replace(day=1)
+    month = (first.astimezone(datetime.timezone.utc).date() if first else this_month).replace(day=1)
+    while month <= add_months(this_month, MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE messages_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF messages FOR VALUES "
+            f"FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+        )
+        month = add_months(month, 1)
+    op.execute('CREATE TABLE messages_default PARTITION OF messages DEFAULT')
+
+    op.execute(
+        'INSERT INTO messages (created_at, conversation_id, parent_id, who, text, id) '
+        'SELECT created_at, conversation_id, parent_id, who, text, id FROM messages_unpartitioned'
+    )
+    op.drop_table('messages_unpartitioned')
+    op.create_index('ix_messages_conversation_id_created_at', 'messages', ['conversation_id', 'created_at'], unique=False)
+    op.create_index('ix_messages_parent_id', 'messages', ['parent_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.rename_table('messages', 'messages_partitioned')
+    op.drop_index('ix_messages_conversation_id_created_at', table_name='messages_partitioned')
+    op.drop_index('ix_messages_parent_id', table_name='messages_partitioned')
+    op.execute('ALTER TABLE messages_partitioned RENAME CONSTRAINT messages_conversation_id_fkey TO messages_partitioned_conversation_id_fkey')
+    op.execute('ALTER INDEX messages_pkey RENAME TO messages_partitioned_pkey')
+
+    op.create_table('messages',
+    sa.Column('conversation_id', sa.String(length=255), nullable=False),
+    sa.Column('parent_id', sa.String(length=255), nullable=True),
+    sa.Column('who', sa.Enum('user', 'bot', name='messagetypeenum', native_enum=False, length=16), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('id', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ondelete='cascade'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        'INSERT INTO messages (conversation_id, parent_id, who, text, id, created_at) '
+        'SELECT conversation_id, parent_id, who, text, id, created_at FROM messages_partitioned'
+    )
+    # Archived partitions aren't brought back
+    op.drop_table('messages_partitioned')
+    op.execute(
+        'UPDATE messages SET parent_id = NULL WHERE parent_id IS NOT NULL '
+        'AND parent_id NOT IN (SELECT id FROM messages)'
+    )
+    op.execute(
+        'DELETE FROM reply_jobs WHERE message_id NOT IN (SELECT id FROM messages)'
+    )
+    op.create_index('ix_messages_conversation_id_created_at', 'messages', ['conversation_id', 'created_at'], unique=False)
+    op.create_index('ix_messages_parent_id', 'messages', ['parent_id'], unique=False)
+    op.create_foreign_key('messages_parent_id_fkey', 'messages', 'messages', ['parent_id'], ['id'], ondelete='set null')
+    op.create_foreign_key('reply_jobs_message_id_fkey', 'reply_jobs', 'messages', ['message_id'], ['id'], ondelete='cascade')
@@ -1,11 +1,162 @@
+import argparse
+import asyncio
+import logging
+import pathlib
+
 import uvicorn
 
 from faqmy_backend.conf import settings
 
-uvicorn.run(
-    "faqmy_backend.app.asgi:app",
-    host=settings.app.host,
-    port=settings.app.port,
-    log_level=settings.app.log_level,
-    reload=settings.app.debug,
+
+def serve(args: argparse.Namespace) -> None:
+    uvicorn.run(
+        "faqmy_backend.app.asgi:app",
+        host=settings.app.host,
+        port=settings.app.port,
+        log_level=settings.app.log_level,
+        reload=settings.app.debug,
+    )
+
+
+def worker(args: argparse.Namespace) -> None:
+    from faqmy_backend.worker import run
+
+    asyncio.run(run())
+
+
+def fakebot(args: argparse.Namespace) -> None:
+    from faqmy_backend.devtools.fakebot import FakeBotConfig, build_fakebot
+
+    config = FakeBotConfig(
+        latency=args.latency,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang_time=args.hang_time,
+        documents=args.documents,
+    )
+    uvicorn.run(
+        build_fakebot(config),
+        host=args.host,
+        port=args.port,
+        log_level=settings.app.log_level,
+    )
+
+
+def loadtest(args: argparse.Namespace) -> None:
+    from faqmy_backend.devtools.loadtest import LoadTestConfig, main
+
+    config = LoadTestConfig(
+        base_url=args.base_url,
+        stack_id=args.stack_id,
+        users=args.users,
+        messages=args.messages,
+        poll_interval=args.poll_interval,
+        reply_timeout=args.reply_timeout,
+    )
+    asyncio.run(main(config))
+
+
+def partitions(args: argparse.Namespace) -> None:
+    from faqmy_backend.db.partitions import run
+
+    logging.basicConfig(level=settings.app.log_level.upper())
+    asyncio.run(
+        run(
+            ahead=args.ahead,
+            retention_months=args.retention_months,
+            dump_dir=args.dump_dir,
+        )
+    )
+
+
+def stripe_backfill(args: argparse.Namespace) -> None:
+    from faqmy_backend.services.billing import run
+
+    logging.basicConfig(level=settings.app.log_level.upper())
+    asyncio.run(run())
+
+
+parser = argparse.ArgumentParser(prog="python -m faqmy_backend")
+parser.set_defaults(handler=serve)
+commands = parser.add_subparsers(title="commands")
+commands.add_parser("serve", help="Run the web server").set_defaults(
+    handler=serve
 )
+commands.add_parser("worker", help="Run the background workers").set_defaults(
+    handler=worker
+)
+
+fakebot_parser = commands.add_parser(
+    "fakebot", help="Run a local stand-in for the bot service"
+)
+fakebot_parser.set_defaults(handler=fakebot)
+fakebot_parser.add_argument("--host", default="127.0.0.1")
+fakebot_parser.add_argument("--port", type=int, default=9000)
+fakebot_parser.add_argument(
+    "--latency", type=float, default=0.3, help="Median latency, seconds"
+)
+fakebot_parser.add_argument(
+    "--latency-sigma",
+    type=float,
+    default=0.5,
+    help="Spread of the log-normal latency",
+)
+fakebot_parser.add_argument(
+    "--error-rate", type=float, default=0, help="Share of 503 responses"
+)
+fakebot_parser.add_argument(
+    "--hang-rate", type=float, default=0, help="Share of hanging requests"
+)
+fakebot_parser.add_argument("--hang-time", type=float, default=120)
+fakebot_parser.add_argument(
+    "--documents", type=int, default=20, help="Documents per scan or upload"
+)
+
+loadtest_parser = commands.add_parser(
+    "loadtest", help="Drive the widget flow against a running backend"
+)
+loadtest_parser.set_defaults(handler=loadtest)
+loadtest_parser.add_argument("stack_id")
+loadtest_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+loadtest_parser.add_argument(
+    "--users", type=int, default=10, help="Concurrent virtual users"
+)
+loadtest_parser.add_argument(
+    "--messages", type=int, default=5, help="Messages per conversation"
+)
+loadtest_parser.add_argument("--poll-interval", type=float, default=0.5)
+loadtest_parser.add_argument("--reply-timeout", type=float, default=60)
+
+partitions_parser = commands.add_parser(
+    "partitions",
+    help="Create the coming months' message partitions, archive old ones",
+)
+partitions_parser.set_defaults(handler=partitions)
+partitions_parser.add_argument(
+    "--ahead",
+    type=int,
+    default=settings.db.partitions_ahead,
+    help="Months to create partitions for after the current one",
+)
+partitions_parser.add_argument(
+    "--retention-months",
+    type=int,
+    default=settings.db.messages_retention_months,
+    help="Full months of messages to keep in the table",
+)
+partitions_parser.add_argument(
+    "--dump-dir",
+    type=pathlib.Path,
+    help="Dump archived partitions into gzipped CSV files there and drop "
+    "them, instead of moving them into the archive schema",
+)
+
+commands.add_parser(
+    "stripe-backfill",
+    help="Copy Stripe customers, subscriptions and products into the "
+    "local mirror",
+).set_defaults(handler=stripe_backfill)
+
+args = parser.parse_args()
+args.handler(args)
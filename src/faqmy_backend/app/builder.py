@@ -1,4 +1,8 @@
-from fastapi import APIRouter, FastAPI
+import asyncio
+import typing
+
+from fastapi import APIRouter, Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.cors import CORSMiddleware
 
@@ -7,23 +11,35 @@ from faqmy_backend.app.dependencies import (
     CardRepositoryDependMarker,
     ConversationRepositoryDependMarker,
     GetDbDependMarker,
+    IngestionJobRepositoryDependMarker,
     MessageRepositoryDependMarker,
     StackRepositoryDependMarker,
     UserDbMarker,
 )
 from faqmy_backend.app.middleware.process_time import add_process_time_header
+from faqmy_backend.app.pagination import NEXT_CURSOR_HEADER
 from faqmy_backend.app.routes.client import router as client_router
 from faqmy_backend.app.routes.dashboard import router as dashboard_router
 from faqmy_backend.app.routes.billing import router as billing_router
 from faqmy_backend.app.routes.healthcheck import router as healthcheck_router
 from faqmy_backend.app.routes.users import router as users_router
 from faqmy_backend.conf import settings
-from faqmy_backend.db.connection import create_session
+from faqmy_backend.db.connection import get_db_session
+from faqmy_backend.db.repositories.base import BaseRepository
 from faqmy_backend.db.repositories.cards import CardRepository
 from faqmy_backend.db.repositories.conversation import ConversationRepository
+from faqmy_backend.db.repositories.ingestion_job import (
+    IngestionJobRepository,
+)
 from faqmy_backend.db.repositories.message import MessageRepository
 from faqmy_backend.db.repositories.stack import StackRepository
-from faqmy_backend.users.db import get_async_session
+from faqmy_backend.db.utils import plain_pg_url
+from faqmy_backend.services.bot import close_http_client, get_http_client
+from faqmy_backend.services.billing import http_client as stripe_http_client
+from faqmy_backend.services.events import message_events
+from faqmy_backend.services.ingestion import ingestion_worker
+from faqmy_backend.services.replies import reply_worker
+from faqmy_backend.services.usage import usage_reconciler
 
 
 def build_app(app: FastAPI) -> FastAPI:
@@ -32,6 +48,7 @@ def build_app(app: FastAPI) -> FastAPI:
     setup_routes(app)
     setup_fastapi_users(app)
     setup_dependencies(app)
+    setup_lifespan(app)
     return app
 
 
@@ -51,6 +68,7 @@ def setup_middlewares(app: FastAPI) -> FastAPI:
         allow_origins=["*"],
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
     return app
@@ -92,19 +110,67 @@ def setup_fastapi_users(app: FastAPI) -> FastAPI:
     return app
 
 
-def setup_dependencies(app: FastAPI) -> FastAPI:
-    session = create_session  #
+def repository(
+    repo_class: type[BaseRepository],
+) -> typing.Callable[[AsyncSession], BaseRepository]:
+    def dependency(session: AsyncSession = Depends(GetDbDependMarker)):
+        return repo_class(session)
+
+    return dependency
 
+
+def shared_session(
+    session: AsyncSession = Depends(GetDbDependMarker),
+) -> AsyncSession:
+    return session
+
+
+def setup_dependencies(app: FastAPI) -> FastAPI:
+    """
+    FastAPI resolves `GetDbDependMarker` once per request, so every
+    repository and the users database of a request share one session
+    """
     app.dependency_overrides.update(
         {
-            GetDbDependMarker: lambda: session,
-            UserDbMarker: get_async_session,
-            StackRepositoryDependMarker: lambda: StackRepository(session),
-            MessageRepositoryDependMarker: lambda: MessageRepository(session),
-            CardRepositoryDependMarker: lambda: CardRepository(session),
-            ConversationRepositoryDependMarker: lambda: ConversationRepository(
-                session
+            GetDbDependMarker: get_db_session,
+            UserDbMarker: shared_session,
+            StackRepositoryDependMarker: repository(StackRepository),
+            MessageRepositoryDependMarker: repository(MessageRepository),
+            CardRepositoryDependMarker: repository(CardRepository),
+            ConversationRepositoryDependMarker: repository(
+                ConversationRepository
+            ),
+            IngestionJobRepositoryDependMarker: repository(
+                IngestionJobRepository
             ),
         }
     )
     return app
+
+
+def setup_lifespan(app: FastAPI) -> FastAPI:
+    """
+    Creates process-wide resources on startup and releases them on shutdown
+    """
+    workers = (reply_worker, ingestion_worker, usage_reconciler)
+
+    async def on_startup():
+        get_http_client()
+        await message_events.start(plain_pg_url(settings.db.url))
+        if settings.worker.embedded:
+            app.state.workers = [
+                asyncio.create_task(worker.run()) for worker in workers
+            ]
+
+    async def on_shutdown():
+        if settings.worker.embedded:
+            for worker in workers:
+                worker.stop()
+            await asyncio.gather(*app.state.workers)
+        await message_events.stop()
+        await close_http_client()
+        await stripe_http_client.aclose()
+
+    app.add_event_handler("startup", on_startup)
+    app.add_event_handler("shutdown", on_shutdown)
+    return app
@@ -18,5 +18,9 @@ class ConversationRepositoryDependMarker:
     ...
 
 
+class IngestionJobRepositoryDependMarker:
+    ...
+
+
 class UserDbMarker:
     ...
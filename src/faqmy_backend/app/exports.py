@@ -0,0 +1,106 @@
+"""
+Streaming responses for exports. Rows are serialized as they come from the
+database cursor, a batch of them per body chunk, so neither the rows nor
+the body are ever held in memory whole
+"""
+import csv
+import enum
+import io
+from typing import AsyncIterator
+
+import pydantic
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+# Rows serialized into one chunk of the body
+ROWS_PER_CHUNK = 200
+
+
+class ExportFormat(str, enum.Enum):
+    json = "json"
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.json: "application/json",
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+async def chunked(
+    rows: AsyncIterator, size: int = ROWS_PER_CHUNK
+) -> AsyncIterator[list]:
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def ndjson_lines(
+    rows: AsyncIterator, schema: type[pydantic.BaseModel]
+) -> AsyncIterator[str]:
+    async for chunk in chunked(rows):
+        yield "".join(schema.from_orm(row).json() + "\n" for row in chunk)
+
+
+async def json_array(
+    rows: AsyncIterator, schema: type[pydantic.BaseModel]
+) -> AsyncIterator[str]:
+    separator = "["
+    async for chunk in chunked(rows):
+        items = ",".join(schema.from_orm(row).json() for row in chunk)
+        yield separator + items
+        separator = ","
+    yield "[]" if separator == "[" else "]"
+
+
+async def csv_lines(
+    rows: AsyncIterator, schema: type[pydantic.BaseModel]
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(schema.__fields__))
+
+    def take() -> str:
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writeheader()
+    yield take()
+    async for chunk in chunked(rows):
+        writer.writerows(
+            jsonable_encoder(schema.from_orm(row)) for row in chunk
+        )
+        yield take()
+
+
+def export_response(
+    rows: AsyncIterator,
+    schema: type[pydantic.BaseModel],
+    format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    """
+    Streams the rows as a downloadable file of the format
+    """
+    body = {
+        ExportFormat.json: json_array,
+        ExportFormat.ndjson: ndjson_lines,
+        ExportFormat.csv: csv_lines,
+    }[format](rows, schema)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{filename}.{format.value}"'
+            )
+        },
+    )
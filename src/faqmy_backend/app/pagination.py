@@ -0,0 +1,50 @@
+"""
+Cursor pagination of the list routes. A page's body is the same list as
+before, the cursor of the following page is sent in the X-Next-Cursor
+header, which is absent on the last page
+"""
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from fastapi import Query, Response
+
+from faqmy_backend.app.responses import err
+from faqmy_backend.db.repositories.base import PAGE_SIZE, Page
+from faqmy_backend.db.utils import decode_cursor
+
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass
+class PageParams:
+    limit: int
+    cursor: str | None
+    since: str | None
+
+    def dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def page_params(
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="X-Next-Cursor of a page"),
+    since: str | None = Query(None, description="Only the newer items"),
+) -> PageParams:
+    for value in (cursor, since):
+        if value is None:
+            continue
+        try:
+            decode_cursor(value)
+        except ValueError:
+            raise err("Invalid cursor")
+    return PageParams(limit=limit, cursor=cursor, since=since)
+
+
+def paginated(response: Response, page: Page) -> list:
+    """
+    Puts the next page's cursor into the response and returns the items
+    """
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, status
+import asyncio
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, Request, Response, status
 from fastapi.background import BackgroundTasks
+from fastapi.responses import StreamingResponse
 
 from faqmy_backend.app.dependencies import (
     ConversationRepositoryDependMarker,
     MessageRepositoryDependMarker,
     StackRepositoryDependMarker,
 )
+from faqmy_backend.app.pagination import PageParams, page_params, paginated
 from faqmy_backend.app.responses import err
 from faqmy_backend.app.schemas import (
     Conversation,
@@ -14,39 +19,84 @@ from faqmy_backend.app.schemas import (
     MessageIn,
     StackPublic,
 )
-from faqmy_backend.db.connection import create_session
+from faqmy_backend.conf import settings
 from faqmy_backend.db.exceptions import DatabaseError
-from faqmy_backend.db.models.conversations import Message as MessageOrm
-from faqmy_backend.db.repositories.cards import CardRepository
+from faqmy_backend.db.models.conversations import MessageTypeEnum
 from faqmy_backend.db.repositories.conversation import ConversationRepository
-from faqmy_backend.db.repositories.message import MessageRepository
+from faqmy_backend.db.repositories.message import MessageRepository, MessageRow
 from faqmy_backend.db.repositories.stack import StackRepository
-from faqmy_backend.services.bot import BotSDK
+from faqmy_backend.services.events import message_events
+from faqmy_backend.services.replies import reply_worker
 
 router = APIRouter()
 
 
-async def generate_reply(
-    message: MessageOrm,
-) -> None:
-    session = create_session()
-    stack = await StackRepository(session).get_by_message_id(message.id)
-
-    bot_sdk = BotSDK(stack.id)
-
-    reply_msg = await MessageRepository(session).reply_message(
-        message_id=message.id, text=await bot_sdk.ask(message.text)
+async def message_event_stream(
+    request: Request,
+    conversation_id: str,
+    repo: MessageRepository,
+) -> AsyncIterator[str]:
+    keepalive = settings.app.stream_keepalive_interval
+    last_event_id = request.headers.get("last-event-id")
+
+    async with message_events.subscribe(conversation_id) as queue:
+        yield "retry: 3000\n\n"
+        # A reconnecting client gets what was written while it was away;
+        # the ones notified meanwhile are in the queue, and aren't repeated
+        replayed = set()
+        if last_event_id:
+            async for message in replay_messages(
+                repo, conversation_id, last_event_id
+            ):
+                replayed.add(message.id)
+                yield message_event(message)
+
+        while not await request.is_disconnected():
+            try:
+                message_id = await asyncio.wait_for(queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if message_id in replayed:
+                continue
+
+            message = await repo.get_by_id(message_id)
+            if message is None:
+                continue
+            yield message_event(message)
+
+
+def message_event(message) -> str:
+    return (
+        f"id: {message.id}\n"
+        "event: message\n"
+        f"data: {Message.from_orm(message).json()}\n\n"
     )
 
-    await CardRepository(session).create(
-        stack_id=stack.id,
-        question=message.text,
-        answer=reply_msg.text,
-    )
 
-    await session.commit()
-    await session.close()
-    del session
+async def replay_messages(
+    repo: MessageRepository, conversation_id: str, last_event_id: str
+) -> AsyncIterator[MessageRow]:
+    """
+    Bot replies of the conversation written after the given message, the
+    ones the live stream would have sent
+    """
+    last = await repo.get_by_id(last_event_id)
+    if last is None or last.conversation_id != conversation_id:
+        return
+    cursor = None
+    while True:
+        page = await repo.get_by_conversation(
+            conversation_id,
+            since=last.cursor,
+            cursor=cursor,
+            who=MessageTypeEnum.bot,
+        )
+        for message in page.items:
+            yield message
+        if page.next_cursor is None:
+            return
+        cursor = page.next_cursor
 
 
 @router.get(
@@ -104,21 +154,77 @@ async def create_conversation(
     "/messages", response_model=list[Message], summary="List of Messages"
 )
 async def get_messages(
+    conversation_id: str,
+    password: str,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    repo: MessageRepository = Depends(MessageRepositoryDependMarker),
+):
+    """
+    Get the messages inside the conversation, oldest first, a page at a
+    time. Without `cursor` and `since` the newest page comes. Pass the
+    `cursor` of the last message as `since` to get only the newer ones
+    \f
+    :param conversation_id:
+    :param password:
+    :param response:
+    :param page:
+    :param repo:
+    :return:
+    """
+    if page.cursor is None and page.since is None:
+        # Widgets poll without a cursor and show the end of the conversation
+        latest = await repo.get_by_conversation_sealed(
+            conversation_id=conversation_id,
+            password=password,
+            limit=page.limit,
+            descending=True,
+        )
+        return latest.items[::-1]
+    return paginated(
+        response,
+        await repo.get_by_conversation_sealed(
+            conversation_id=conversation_id,
+            password=password,
+            **page.dict(),
+        ),
+    )
+
+
+@router.get("/messages/stream", summary="Stream of new Messages")
+async def stream_messages(
+    request: Request,
     conversation_id: str,
     password: str,
     repo: MessageRepository = Depends(MessageRepositoryDependMarker),
+    conv_repo: ConversationRepository = Depends(
+        ConversationRepositoryDependMarker
+    ),
 ):
     """
-    Get all the messages inside the conversation
+    Pushes bot replies of the conversation as Server-Sent Events as soon as
+    they're written, so the widget doesn't have to poll for them.
+
+    Subscribe before posting a message to be sure its reply isn't missed.
     \f
+    :param request:
     :param conversation_id:
     :param password:
     :param repo:
+    :param conv_repo:
     :return:
     """
-    return await repo.get_by_conversation_sealed(
-        conversation_id=conversation_id,
-        password=password,
+    # Both the conversation and the notified messages are fresh, replicas
+    # may not have them yet
+    conv_repo.stick_to_primary()
+    if not await conv_repo.exists_sealed(conversation_id, password):
+        raise err(
+            "Conversation not found", status_code=status.HTTP_404_NOT_FOUND
+        )
+    return StreamingResponse(
+        message_event_stream(request, conversation_id, repo),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -130,11 +236,11 @@ async def create_message(
     background_tasks: BackgroundTasks,
     repo: MessageRepository = Depends(MessageRepositoryDependMarker),
 ):
-    message = await repo.create_message(
+    message, job = await repo.create_with_reply_job(
         conversation_id=spec.conversation_id,
         text=spec.text,
     )
-    await repo.commit()
 
-    background_tasks.add_task(generate_reply, message=message)
+    if settings.worker.embedded:
+        background_tasks.add_task(reply_worker.run_job, job.id)
     return message
@@ -1,28 +1,51 @@
-from fastapi import APIRouter, Depends, File, Form, UploadFile, status
+import datetime
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.background import BackgroundTasks
 
 from faqmy_backend.app.dependencies import (
     CardRepositoryDependMarker,
     ConversationRepositoryDependMarker,
+    IngestionJobRepositoryDependMarker,
     MessageRepositoryDependMarker,
     StackRepositoryDependMarker,
 )
+from faqmy_backend.app.exports import ExportFormat, export_response
+from faqmy_backend.app.pagination import PageParams, page_params, paginated
 from faqmy_backend.app.responses import err
 from faqmy_backend.app.schemas import (
     Card,
+    CardBatchResult,
     CardIn,
+    CardLearnIn,
     CardUrlIn,
     ConversationDashboard,
+    IngestionJob,
     Message,
+    MessageExport,
     Stack,
     StackIn,
 )
+from faqmy_backend.conf import settings
 from faqmy_backend.db.exceptions import DatabaseError
+from faqmy_backend.db.models.jobs import IngestionKindEnum
 from faqmy_backend.db.models.users import User
 from faqmy_backend.db.repositories.cards import CardRepository
 from faqmy_backend.db.repositories.conversation import ConversationRepository
+from faqmy_backend.db.repositories.ingestion_job import IngestionJobRepository
 from faqmy_backend.db.repositories.message import MessageRepository
 from faqmy_backend.db.repositories.stack import StackRepository
 from faqmy_backend.services.bot import BotSDK
+from faqmy_backend.services.cache import cards_changed
+from faqmy_backend.services.ingestion import ingestion_worker, save_upload
 from faqmy_backend.users.manager import fastapi_users
 
 router = APIRouter()
@@ -77,9 +100,10 @@ async def stack_detail(
     :param repo:
     :return:
     """
-    if not await repo.is_accessible_by_user(id, user.id):
+    stack = await repo.get_by_id(id, user_id=user.id)
+    if stack is None:
         raise err("Failed to get stack detail", status.HTTP_404_NOT_FOUND)
-    return Stack.from_orm(await repo.get_by_id(id))
+    return Stack.from_orm(stack)
 
 
 @router.delete("/stacks/{id}", summary="Remove Stack")
@@ -96,9 +120,8 @@ async def stack_delete(
     :param repo:
     :return:
     """
-    if not await repo.is_accessible_by_user(id, user.id):
+    if not await repo.delete_owned(id, user.id):
         raise err("Failed to delete the stack", status.HTTP_404_NOT_FOUND)
-    await repo.delete(id)
     await repo.commit()
 
 
@@ -120,34 +143,56 @@ async def stack_update(
     :param repo:
     :return:
     """
-    if not await repo.is_accessible_by_user(id, user.id):
-        raise err("Failed to update the stack", status.HTTP_404_NOT_FOUND)
-
-    stack = await repo.get_by_id(id)
-    await repo.update(
-        stack_id=stack.id,
-        user_id=user.id,
-        name=spec.name,
-        description=spec.description,
-        initial_question=spec.initial_question,
-        widget_delay=spec.widget_delay,
-        color=spec.color,
+    # Only the fields sent by the client are changed
+    stack = await repo.update_owned(
+        id, user.id, **spec.dict(exclude_unset=True)
     )
+    if stack is None:
+        raise err("Failed to update the stack", status.HTTP_404_NOT_FOUND)
     await repo.commit()
     return Stack.from_orm(stack)
 
 
 @router.get("/cards", summary="Card List", response_model=list[Card])
 async def card_list(
+    stack_id: str,
+    response: Response,
+    learned: bool | None = None,
+    page: PageParams = Depends(page_params),
+    user: User = Depends(current_user),
+    stack_repo: StackRepository = Depends(StackRepositoryDependMarker),
+    card_repo: CardRepository = Depends(CardRepositoryDependMarker),
+):
+    if not await stack_repo.is_accessible_by_user(stack_id, user.id):
+        raise err("Stack not found", status_code=status.HTTP_404_NOT_FOUND)
+    return paginated(
+        response,
+        await card_repo.get_page_by_stack_id(
+            stack_id, learned=learned, **page.dict()
+        ),
+    )
+
+
+@router.get("/cards/export", summary="Export Cards")
+async def card_export(
     stack_id: str,
     learned: bool | None = None,
+    format: ExportFormat = ExportFormat.ndjson,
     user: User = Depends(current_user),
     stack_repo: StackRepository = Depends(StackRepositoryDependMarker),
     card_repo: CardRepository = Depends(CardRepositoryDependMarker),
 ):
+    """
+    Download all the cards of the stack as a JSON, NDJSON or CSV file
+    """
     if not await stack_repo.is_accessible_by_user(stack_id, user.id):
         raise err("Stack not found", status_code=status.HTTP_404_NOT_FOUND)
-    return await card_repo.get_by_stack_id(stack_id, learned=learned)
+    return export_response(
+        card_repo.stream_by_stack_id(stack_id, learned=learned),
+        Card,
+        format,
+        filename=f"cards-{stack_id}",
+    )
 
 
 @router.post(
@@ -173,59 +218,139 @@ async def card_create(
         )
     except DatabaseError as ex:
         raise err("Failed to create card")
+    await cards_changed(card_repo, spec.stack_id)
     return card
 
 
 @router.post(
     path="/cards/_upload",
     summary="Upload a File",
+    response_model=IngestionJob,
     status_code=status.HTTP_202_ACCEPTED,
 )
 async def card_create_from_upload(
+    background_tasks: BackgroundTasks,
     stack_id: str = Form(),
     file: UploadFile = File(...),
     user: User = Depends(current_user),
     stack_repo: StackRepository = Depends(StackRepositoryDependMarker),
-    card_repo: CardRepository = Depends(CardRepositoryDependMarker),
+    job_repo: IngestionJobRepository = Depends(
+        IngestionJobRepositoryDependMarker
+    ),
 ):
     """
-    Create cards from an uploaded file
+    Schedule creating cards from an uploaded file. Track the progress with
+    the returned ingestion job
     \f
+    :param background_tasks:
     :param stack_id:
     :param file:
     :param user:
     :param stack_repo:
-    :param card_repo:
+    :param job_repo:
     :return:
     """
     if not await stack_repo.is_accessible_by_user(stack_id, user.id):
         raise err("Stack not found", status_code=status.HTTP_404_NOT_FOUND)
 
-    for doc in await BotSDK(stack_id).upload(file):
-        card = await card_repo.create(
-            stack_id=stack_id,
-            question=doc.name,
-            answer=doc.content,
-        )
-        await card_repo.mark_learned(card.id, doc.id)
+    job = await job_repo.create(
+        stack_id=stack_id,
+        user_id=user.id,
+        kind=IngestionKindEnum.upload,
+        source=await save_upload(file),
+        filename=file.filename,
+        content_type=file.content_type,
+    )
+    await job_repo.commit()
 
-    await card_repo.commit()
-    # return card
+    if settings.worker.embedded:
+        background_tasks.add_task(ingestion_worker.run_job, job.id)
+    return job
 
 
 @router.post(
     path="/cards/_url",
     summary="Scan a URL",
+    response_model=IngestionJob,
     status_code=status.HTTP_202_ACCEPTED,
 )
 async def card_create_from_url(
     spec: CardUrlIn,
+    background_tasks: BackgroundTasks,
+    user: User = Depends(current_user),
+    stack_repo: StackRepository = Depends(StackRepositoryDependMarker),
+    job_repo: IngestionJobRepository = Depends(
+        IngestionJobRepositoryDependMarker
+    ),
+):
+    """
+    Schedule creating cards from data crawled from the given URL. Track the
+    progress with the returned ingestion job
+    \f
+    :param spec:
+    :param background_tasks:
+    :param user:
+    :param stack_repo:
+    :param job_repo:
+    :return:
+    """
+    if not await stack_repo.is_accessible_by_user(spec.stack_id, user.id):
+        raise err("Stack not found", status_code=status.HTTP_404_NOT_FOUND)
+
+    job = await job_repo.create(
+        stack_id=spec.stack_id,
+        user_id=user.id,
+        kind=IngestionKindEnum.url,
+        source=spec.url,
+    )
+    await job_repo.commit()
+
+    if settings.worker.embedded:
+        background_tasks.add_task(ingestion_worker.run_job, job.id)
+    return job
+
+
+@router.get(
+    "/ingestions/{id}",
+    summary="Get Ingestion Job Progress",
+    response_model=IngestionJob,
+)
+async def ingestion_detail(
+    id: str,
+    user: User = Depends(current_user),
+    job_repo: IngestionJobRepository = Depends(
+        IngestionJobRepositoryDependMarker
+    ),
+):
+    """
+    Get the status of a file upload or URL scan: how many documents were
+    parsed, how many cards were written and how many failed
+    \f
+    :param id:
+    :param user:
+    :param job_repo:
+    :return:
+    """
+    job = await job_repo.get_by_id(id, user_id=user.id)
+    if job is None:
+        raise err("Ingestion job not found", status.HTTP_404_NOT_FOUND)
+    return job
+
+
+@router.post(
+    "/cards/_learn",
+    summary="Learn or Unlearn Cards",
+    response_model=CardBatchResult,
+)
+async def card_learn_many(
+    spec: CardLearnIn,
     user: User = Depends(current_user),
     stack_repo: StackRepository = Depends(StackRepositoryDependMarker),
     card_repo: CardRepository = Depends(CardRepositoryDependMarker),
 ):
     """
-    Create cards from data crawled from the given URL
+    Send the listed cards (or every card of the stack which isn't in the
+    wanted state yet) to the bot learning process, or remove them from it
     \f
     :param spec:
     :param user:
@@ -236,15 +361,41 @@ async def card_create_from_url(
     if not await stack_repo.is_accessible_by_user(spec.stack_id, user.id):
         raise err("Stack not found", status_code=status.HTTP_404_NOT_FOUND)
 
-    for doc in await BotSDK(spec.stack_id).scan(spec.url):
-        card = await card_repo.create(
-            stack_id=spec.stack_id,
-            question=doc.name,
-            answer=doc.content,
+    if spec.card_ids is None:
+        cards = await card_repo.get_by_stack_id(
+            spec.stack_id, learned=spec.unlearn
+        )
+    else:
+        cards = await card_repo.get_by_ids(spec.stack_id, spec.card_ids)
+    cards = [card for card in cards if card.learned == spec.unlearn]
+
+    bot_sdk = BotSDK(spec.stack_id)
+    if spec.unlearn:
+        results = await bot_sdk.delete_documents(
+            [card.es_doc_id for card in cards]
+        )
+    else:
+        results = await bot_sdk.create_documents(
+            [(card.question, card.answer) for card in cards]
         )
-        await card_repo.mark_learned(card.id, doc.id)
 
+    result = CardBatchResult()
+    es_doc_ids = {}
+    for card, outcome in zip(cards, results):
+        if isinstance(outcome, BaseException):
+            result.failed.append(card.id)
+        else:
+            result.succeeded.append(card.id)
+            es_doc_ids[card.id] = outcome
+
+    if spec.unlearn:
+        await card_repo.mark_unlearned_many(result.succeeded)
+    else:
+        await card_repo.mark_learned_many(es_doc_ids)
+    if result.succeeded:
+        await cards_changed(card_repo, spec.stack_id)
     await card_repo.commit()
+    return result
 
 
 @router.get("/cards/{id}", summary="Get Card Detail", response_model=Card)
@@ -253,11 +404,10 @@ async def card_detail(
     user: User = Depends(current_user),
     card_repo: CardRepository = Depends(CardRepositoryDependMarker),
 ):
-    if not await card_repo.is_accessible_by_user(id, user.id):
+    card = await card_repo.get_owned(id, user.id)
+    if card is None:
         raise err("Card not found", status_code=status.HTTP_404_NOT_FOUND)
-
-    # Assume it won't be a NULL, cuz we just checked accessible
-    return await card_repo.get_by_id(id)
+    return card
 
 
 @router.patch(
@@ -271,16 +421,14 @@ async def card_update(
     user: User = Depends(current_user),
     card_repo: CardRepository = Depends(CardRepositoryDependMarker),
 ):
-    if not await card_repo.is_accessible_by_user(id, user.id):
-        raise err("Card not found", status_code=status.HTTP_404_NOT_FOUND)
-
-    await card_repo.update(
-        card_id=id,
-        question=spec.question,
-        answer=spec.answer,
+    card = await card_repo.update_owned(
+        id,
+        user.id,
+        **spec.dict(include={"question", "answer"}, exclude_unset=True),
     )
+    if card is None:
+        raise err("Card not found", status_code=status.HTTP_404_NOT_FOUND)
 
-    card = await card_repo.get_by_id(id)
     bot_sdk = BotSDK(card.stack_id)
 
     if card.learned:
@@ -289,6 +437,7 @@ async def card_update(
             card.id, await bot_sdk.create_document(card.question, card.answer)
         )
 
+    await cards_changed(card_repo, card.stack_id)
     return card
 
 
@@ -310,15 +459,14 @@ async def card_delete(
     :param card_repo:
     :return:
     """
-    if not await card_repo.is_accessible_by_user(id, user.id):
+    card = await card_repo.delete_owned(id, user.id)
+    if card is None:
         raise err("Card not found", status_code=status.HTTP_404_NOT_FOUND)
 
-    card = await card_repo.get_by_id(id)
-    await card_repo.delete(id)
-
     if card.learned:
         bot_sdk = BotSDK(card.stack_id)
         await bot_sdk.delete_document(card.es_doc_id)
+    await cards_changed(card_repo, card.stack_id)
     await card_repo.commit()
 
     return
@@ -342,17 +490,17 @@ async def card_learn(
     :param card_repo:
     :return:
     """
-    if not await card_repo.is_accessible_by_user(id, user.id):
+    card = await card_repo.get_owned(id, user.id)
+    if card is None:
         raise err("Card not found", status_code=status.HTTP_404_NOT_FOUND)
 
-    card = await card_repo.get_by_id(id)
-
     es_doc_id = await BotSDK(card.stack_id).create_document(
         name=card.question,
         content=card.answer,
     )
 
     await card_repo.mark_learned(id, es_doc_id)
+    await cards_changed(card_repo, card.stack_id)
     await card_repo.commit()
 
 
@@ -362,10 +510,14 @@ async def card_learn(
     response_model=list[ConversationDashboard],
 )
 async def conversation_list(
+    response: Response,
+    page: PageParams = Depends(page_params),
     user: User = Depends(current_user),
     repo: ConversationRepository = Depends(ConversationRepositoryDependMarker),
 ):
-    return await repo.get_by_user_id(user.id)
+    return paginated(
+        response, await repo.get_by_user_id(user.id, **page.dict())
+    )
 
 
 @router.get("/conversations/{id}", summary="Get Conversation Detail")
@@ -382,11 +534,12 @@ async def conversation_detail(
     :param repo:
     :return:
     """
-    if not await repo.is_accessible_by_user(id, user.id):
+    conversation = await repo.get_owned(id, user.id)
+    if conversation is None:
         raise err(
             "Conversation not found", status_code=status.HTTP_404_NOT_FOUND
         )
-    return await repo.get_by_id(id)
+    return conversation
 
 
 @router.delete(
@@ -407,11 +560,10 @@ async def conversation_remove(
     :param repo:
     :return:
     """
-    if not await repo.is_accessible_by_user(id, user.id):
+    if not await repo.delete_owned(id, user.id):
         raise err(
             "Conversation not found", status_code=status.HTTP_404_NOT_FOUND
         )
-    await repo.delete(id)
     await repo.commit()
 
 
@@ -420,13 +572,45 @@ async def conversation_remove(
 )
 async def message_list(
     conversation_id: str,
+    response: Response,
+    page: PageParams = Depends(page_params),
     repo: MessageRepository = Depends(MessageRepositoryDependMarker),
 ):
     """
-    Get all the messages inside the conversation
+    Get the messages inside the conversation, oldest first, a page at a time
     \f
     :param conversation_id:
+    :param response:
+    :param page:
     :param repo:
     :return:
     """
-    return await repo.get_by_conversation(conversation_id=conversation_id)
+    return paginated(
+        response,
+        await repo.get_by_conversation(
+            conversation_id=conversation_id, **page.dict()
+        ),
+    )
+
+
+@router.get("/messages/export", summary="Export Messages")
+async def message_export(
+    start: datetime.datetime,
+    end: datetime.datetime | None = None,
+    stack_id: str | None = None,
+    format: ExportFormat = ExportFormat.ndjson,
+    user: User = Depends(current_user),
+    repo: MessageRepository = Depends(MessageRepositoryDependMarker),
+):
+    """
+    Download the messages of the user's stacks written from `start` till
+    `end` as a JSON, NDJSON or CSV file
+    """
+    return export_response(
+        repo.stream_user_messages(
+            user.id, start=start, end=end, stack_id=stack_id
+        ),
+        MessageExport,
+        format,
+        filename="messages",
+    )
@@ -1,6 +1,12 @@
-from fastapi import APIRouter
+import hmac
+
+from fastapi import APIRouter, Header, status
 from fastapi.responses import PlainTextResponse
 
+from faqmy_backend.app.responses import err
+from faqmy_backend.conf import settings
+from faqmy_backend.services import metrics
+
 router = APIRouter()
 
 
@@ -37,3 +43,27 @@ async def readiness_probe():
     \f
     """
     return "OK"
+
+
+@router.get(
+    path="/metrics",
+    tags=["Health Care"],
+    summary="Runtime metrics",
+    include_in_schema=True,
+)
+async def runtime_metrics(authorization: str = Header("")):
+    """
+    Reports the counters of caches, pools and queues of this worker process
+    to scrapers presenting the configured bearer token
+    \f
+    :param authorization:
+    :return:
+    """
+    if not settings.app.metrics_token:
+        raise err("Not Found", status_code=status.HTTP_404_NOT_FOUND)
+    if not hmac.compare_digest(
+        authorization.encode(),
+        f"Bearer {settings.app.metrics_token}".encode(),
+    ):
+        raise err("Unauthorized", status_code=status.HTTP_401_UNAUTHORIZED)
+    return await metrics.collect()
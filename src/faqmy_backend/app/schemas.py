@@ -9,6 +9,20 @@ class Message(pydantic.BaseModel):
     created_at: datetime.datetime
     who: str
     parent_id: str | None
+    # Pass as `since` to list only the newer messages
+    cursor: str
+
+    class Config:
+        orm_mode = True
+
+
+class MessageExport(pydantic.BaseModel):
+    id: str
+    conversation_id: str
+    parent_id: str | None
+    who: str
+    text: str
+    created_at: datetime.datetime
 
     class Config:
         orm_mode = True
@@ -93,11 +107,39 @@ class CardIn(pydantic.BaseModel):
     answer: str
 
 
+class CardLearnIn(pydantic.BaseModel):
+    stack_id: str
+    # Every card of the stack which isn't in the wanted state yet, if omitted
+    card_ids: list[str] | None = None
+    unlearn: bool = False
+
+
+class CardBatchResult(pydantic.BaseModel):
+    succeeded: list[str] = []
+    failed: list[str] = []
+
+
 class CardUrlIn(pydantic.BaseModel):
     stack_id: str
     url: pydantic.AnyUrl
 
 
+class IngestionJob(pydantic.BaseModel):
+    id: str
+    stack_id: str
+    kind: str
+    status: str
+    documents_parsed: int
+    cards_written: int
+    failures: int
+    error: str | None
+    created_at: datetime.datetime
+    finished_at: datetime.datetime | None
+
+    class Config:
+        orm_mode = True
+
+
 class Widget(pydantic.BaseModel):
     is_active: bool = False
     reason: str
@@ -14,11 +14,35 @@ class AppSettings(pydantic.BaseSettings):
     port: int = 8000
     host: str = "0.0.0.0"
     log_level: LogLevels = LogLevels.info
+    stream_keepalive_interval: float = 15
+    # Bearer token scrapers send to /status/metrics, which is off when empty
+    metrics_token: str = ""
 
 
 class DatabaseSettings(pydantic.BaseSettings):
     url: pydantic.PostgresDsn
+    # A JSON list, read-only queries are spread over them
+    replica_urls: list[pydantic.PostgresDsn] = []
     echo: bool = False
+    # The pool is per process, multiply by the number of gunicorn workers
+    # to get the connections the database has to allow
+    pool_size: int = 10
+    max_overflow: int = 10
+    # How long a request waits for a free connection before it fails
+    pool_timeout: float = 30
+    # Connections older than this are replaced, -1 keeps them forever
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = False
+    # Prepared statement caches of asyncpg and of SQLAlchemy's asyncpg
+    # dialect. Behind pgbouncer in the transaction mode set both to 0,
+    # unless pgbouncer tracks prepared statements (max_prepared_statements)
+    statement_cache_size: int = 100
+    prepared_statement_cache_size: int = 100
+    # Monthly partitions of messages created in advance
+    partitions_ahead: int = 3
+    # Months of messages kept in the table, the longest history any plan
+    # shows. Older partitions are archived
+    messages_retention_months: int = 12
 
     class Config:
         env_prefix = "DATABASE_"
@@ -39,16 +63,88 @@ class UserSettings(pydantic.BaseSettings):
 
 class BotSettings(pydantic.BaseSettings):
     url: str
+    timeout: float = 60
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30
+    http2: bool = False  # requires the `h2` package
+    answer_cache_size: int = 10_000
+    answer_cache_ttl: float = 3600
+    # How many document requests of one batch run at once
+    batch_concurrency: int = 8
+    # Deadlines of single operations, in seconds. Streamed scans and uploads
+    # get theirs as the longest allowed pause between two chunks instead
+    ask_timeout: float = 20
+    documents_timeout: float = 10
+    scan_timeout: float = 120
+    upload_timeout: float = 120
+    # Retries of idempotent operations: asks, reads and deletes
+    retries: int = 2
+    retry_backoff_base: float = 0.2
+    retry_backoff_max: float = 2
+    breaker_failure_threshold: int = 5
+    breaker_recovery_time: float = 30
+    # Replied while the circuit is open; unset makes reply jobs retry later
+    fallback_answer: str | None = None
 
     class Config:
         env_prefix = "BOT_"
 
 
+class WorkerSettings(pydantic.BaseSettings):
+    # Process reply jobs inside the web process too. Turn it off when
+    # `python -m faqmy_backend worker` runs as a separate service
+    embedded: bool = True
+    concurrency: int = 8
+    poll_interval: float = 1
+    lease: float = 300
+    max_attempts: int = 5
+    # Retries wait up to base * 2 ** (attempt - 1) seconds, full jitter, as
+    # the bot client's retries do
+    backoff_base: float = 2
+    backoff_max: float = 300
+
+    class Config:
+        env_prefix = "WORKER_"
+
+
+class IngestionSettings(pydantic.BaseSettings):
+    concurrency: int = 2
+    # How many jobs of the same user may run at once across all processes
+    per_user_concurrency: int = 1
+    poll_interval: float = 2
+    lease: float = 3600
+    # Must be shared with the worker when it runs as a separate service
+    upload_dir: str = "/tmp/faqmy-uploads"
+
+    class Config:
+        env_prefix = "INGESTION_"
+
+
+class UsageSettings(pydantic.BaseSettings):
+    # How often the counters are checked against the messages, seconds
+    reconcile_interval: float = 900
+    # How many past hours a check covers
+    reconcile_window_hours: int = 48
+
+    class Config:
+        env_prefix = "USAGE_"
+
+
 class StripeSettings(pydantic.BaseSettings):
     key: str = "sk_test_feijoa"
     customer_portal_url: str = "https://billing.stripe.com/p/login/test_azazazaz"
     pricing_table_id: str = "prctbl_totototototo"
     publishable_key: str = "pk_test_amamama"
+    # Webhooks are rejected until it's set
+    webhook_secret: str = ""
+    # Deadline of a single API call, seconds, retries get their own
+    timeout: float = 10
+    connect_timeout: float = 3
+    max_network_retries: int = 2
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30
 
     class Config:
         env_prefix = "STRIPE_"
@@ -70,6 +166,9 @@ class Settings(pydantic.BaseSettings):
     db: DatabaseSettings = DatabaseSettings()
     users: UserSettings = UserSettings()
     bot: BotSettings = BotSettings()
+    worker: WorkerSettings = WorkerSettings()
+    ingestion: IngestionSettings = IngestionSettings()
+    usage: UsageSettings = UsageSettings()
     smtp: SmtpSettings = SmtpSettings()
     stripe: StripeSettings = StripeSettings()
 
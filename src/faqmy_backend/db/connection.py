@@ -1,15 +1,58 @@
+import random
+import time
 import typing
 
+from sqlalchemy import event, exc
 from sqlalchemy.engine import Engine, create_engine
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     create_async_engine,
 )
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm import ORMExecuteState, Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from faqmy_backend.conf import settings
 from faqmy_backend.db.utils import normalize_pg_url
+from faqmy_backend.services import metrics
+from faqmy_backend.services.metrics import Histogram
+
+STICK_TO_PRIMARY = "stick_to_primary"
+
+
+class RoutingSession(Session):
+    """
+    Sends reads asking for a replica (`bind_arguments={"replica": True}`)
+    to one of the replicas, everything else to the primary.
+
+    Once the session writes anything, it sticks to the primary for good,
+    so a request always reads what it has just written.
+    """
+
+    def __init__(self, *args, replicas: typing.Sequence[Engine] = (), **kw):
+        super().__init__(*args, **kw)
+        self.replicas = list(replicas)
+
+    def get_bind(self, mapper=None, *, replica: bool = False, **kw):
+        if (
+            replica
+            and self.replicas
+            and not self.info.get(STICK_TO_PRIMARY)
+            and not self._flushing
+        ):
+            return random.choice(self.replicas)
+        return super().get_bind(mapper, **kw)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def stick_after_write(orm_execute_state: ORMExecuteState) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[STICK_TO_PRIMARY] = True
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def stick_after_flush(session: Session, flush_context) -> None:
+    session.info[STICK_TO_PRIMARY] = True
 
 
 def create_session_maker(
@@ -17,12 +60,34 @@ def create_session_maker(
     *,
     echo: bool | None = None,
     engine: Engine | AsyncEngine | None = None,
+    replica_urls: typing.Sequence[str] = (),
+    replicas: typing.Sequence[Engine | AsyncEngine] = (),
     autoflush: bool = False,
     autocommit: bool = False,
     expire_on_commit: bool = False,
     future: bool = True,
     asynchronous: bool = False,
 ) -> typing.Callable[[...], Session | AsyncSession]:
+    replicas = [
+        *replicas,
+        *(
+            create_sqlalchemy_engine(
+                replica_url,
+                echo=echo,
+                future=future,
+                asynchronous=asynchronous,
+            )
+            for replica_url in replica_urls
+        ),
+    ]
+    if asynchronous:
+        replicas = [replica.sync_engine for replica in replicas]
+        session_classes = dict(
+            class_=AsyncSession, sync_session_class=RoutingSession
+        )
+    else:
+        session_classes = dict(class_=RoutingSession)
+
     return sessionmaker(
         bind=engine
         or create_sqlalchemy_engine(
@@ -31,29 +96,145 @@ def create_session_maker(
             future=future,
             asynchronous=asynchronous,
         ),
-        class_=AsyncSession if asynchronous else Session,
+        replicas=replicas,
         autocommit=autocommit,
         autoflush=autoflush,
         expire_on_commit=expire_on_commit,
+        **session_classes,
     )
 
 
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Measures how long checkouts wait for a connection and counts the ones
+    which gave up, on top of the usual pool counters.
+
+    Every pool keeps its own figures, which survive the pool being
+    recreated when its engine is disposed.
+    """
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.checkout_wait = Histogram(
+            (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+        )
+        self.timeouts = 0
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.checkout_wait, pool.timeouts = self.checkout_wait, self.timeouts
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.checkout_wait.observe(time.perf_counter() - started)
+
+
 def create_sqlalchemy_engine(
     url: str,
     echo: bool | None = None,
     asynchronous: bool | None = None,
     future: bool = True,
 ):
+    kwargs = {}
+    if asynchronous:
+        kwargs.update(
+            poolclass=InstrumentedPool,
+            connect_args={
+                "statement_cache_size": settings.db.statement_cache_size,
+                "prepared_statement_cache_size": (
+                    settings.db.prepared_statement_cache_size
+                ),
+            },
+        )
     engine_factory = create_async_engine if asynchronous else create_engine
 
     return engine_factory(
         normalize_pg_url(url, asynchronous),
         echo=(echo if echo is not None else settings.db.echo),
         future=future,
-        pool_size=10,
+        pool_size=settings.db.pool_size,
+        max_overflow=settings.db.max_overflow,
+        pool_timeout=settings.db.pool_timeout,
+        pool_recycle=settings.db.pool_recycle,
+        pool_pre_ping=settings.db.pool_pre_ping,
+        **kwargs,
     )
 
 
-create_session = create_session_maker(
+def pool_stats(engine: Engine | AsyncEngine) -> dict[str, typing.Any]:
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.db.max_overflow,
+        "timeouts": getattr(pool, "timeouts", 0),
+        "checkout_wait": (
+            pool.checkout_wait.stats()
+            if isinstance(pool, InstrumentedPool)
+            else None
+        ),
+    }
+
+
+def engine_name(engine: Engine | AsyncEngine) -> str:
+    return engine.url.render_as_string(hide_password=True)
+
+
+def pools_stats(
+    primary: Engine | AsyncEngine,
+    replicas: typing.Sequence[Engine | AsyncEngine] = (),
+) -> dict[str, typing.Any]:
+    return {
+        "primary": pool_stats(primary),
+        "replicas": {
+            engine_name(replica): pool_stats(replica) for replica in replicas
+        },
+    }
+
+
+engine = create_sqlalchemy_engine(
     settings.db.url, echo=settings.db.echo, asynchronous=True
 )
+replica_engines = [
+    create_sqlalchemy_engine(url, echo=settings.db.echo, asynchronous=True)
+    for url in settings.db.replica_urls
+]
+create_session = create_session_maker(
+    settings.db.url,
+    engine=engine,
+    replicas=replica_engines,
+    asynchronous=True,
+)
+# Background jobs read what they have to update, so they skip replicas
+create_primary_session = create_session_maker(
+    settings.db.url, engine=engine, asynchronous=True
+)
+metrics.register("db_pool", lambda: pools_stats(engine, replica_engines))
+
+
+async def get_db_session() -> typing.AsyncGenerator[AsyncSession, None]:
+    """
+    A unit of work shared by everything that serves one request.
+
+    Whatever is left uncommitted when the request succeeds is committed,
+    a failed request rolls it back, and the session is always closed.
+    """
+    async with create_session() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        if session.in_transaction():
+            await session.commit()
@@ -1,6 +1,26 @@
 from faqmy_backend.db.metadata import metadata
+from faqmy_backend.db.models.billing import (
+    StripeCustomer,
+    StripeProduct,
+    StripeSubscription,
+)
 from faqmy_backend.db.models.conversations import Conversation, Message
+from faqmy_backend.db.models.jobs import IngestionJob, ReplyJob
 from faqmy_backend.db.models.stack import Card, Stack
+from faqmy_backend.db.models.usage import UsageCounter
 from faqmy_backend.db.models.users import User
 
-__all__ = ["Card", "Conversation", "Message", "Stack", "User", "metadata"]
+__all__ = [
+    "Card",
+    "Conversation",
+    "IngestionJob",
+    "Message",
+    "ReplyJob",
+    "Stack",
+    "StripeCustomer",
+    "StripeProduct",
+    "StripeSubscription",
+    "UsageCounter",
+    "User",
+    "metadata",
+]
@@ -2,12 +2,21 @@ from __future__ import annotations
 
 import datetime
 
-import shortuuid
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, String, Table
 from sqlalchemy.orm import Mapped, as_declarative, declared_attr, mapped_column
 
 from faqmy_backend.db.metadata import metadata
-from faqmy_backend.db.utils import camel_to_snake
+from faqmy_backend.db.utils import (
+    camel_to_snake,
+    encode_cursor,
+    ulid,
+    ulid_time,
+)
+
+# How far `created_at` may be from the time in the id. Both are taken by
+# the application, but the column gets a naive UTC time, which the database
+# reads in its own time zone
+ID_TIME_SLACK = datetime.timedelta(days=1)
 
 
 def get_table_name_from_class(cls: BaseModel) -> str:
@@ -17,15 +26,24 @@ def get_table_name_from_class(cls: BaseModel) -> str:
     return camel_to_snake(cls.__name__) + "s"
 
 
-def get_class_by_table(table):
+_classes_by_table: dict[Table, type[BaseModel]] = {}
+
+
+def get_class_by_table(table: Table) -> type[BaseModel] | None:
+    """
+    Finds the model class mapped to the table. The registry is scanned only
+    when a table is seen for the first time, not on every INSERT
+    """
     try:
-        return {
-            c
-            for c in BaseModel.registry._class_registry.values()  # NOQA
-            if hasattr(c, "__table__") and c.__table__ is table
-        }.pop()
+        return _classes_by_table[table]
     except KeyError:
-        return None
+        pass
+    _classes_by_table.update(
+        (c.__table__, c)
+        for c in BaseModel.registry._class_registry.values()  # NOQA
+        if hasattr(c, "__table__")
+    )
+    return _classes_by_table.get(table)
 
 
 def generate_pk(context) -> str:
@@ -36,10 +54,8 @@ def generate_pk(context) -> str:
 class BaseModel:
     id: Mapped[str] = mapped_column(
         String(255),
-        unique=True,
         primary_key=True,
         nullable=False,
-        index=True,
         default=generate_pk,
     )
     created_at: Mapped[datetime.datetime] = mapped_column(
@@ -49,7 +65,40 @@ class BaseModel:
 
     @classmethod
     def generate_new_id(cls) -> str:
-        return cls.id_prefix + shortuuid.uuid()
+        return cls.id_prefix + ulid()
+
+    @classmethod
+    def created_near(cls, id: str) -> list:
+        """
+        Conditions bounding `created_at` by the time encoded in the id, so
+        that a lookup by id only touches the partitions of that time. Ids
+        without a time give no conditions
+        """
+        at = ulid_time(id)
+        if at is None:
+            return []
+        return [
+            cls.created_at >= at - ID_TIME_SLACK,
+            cls.created_at <= at + ID_TIME_SLACK,
+        ]
+
+    @classmethod
+    def created_after(cls, id: str) -> list:
+        """
+        Like `created_near`, for rows which can't be older than the row of
+        the id, of this model or another one
+        """
+        at = ulid_time(id)
+        if at is None:
+            return []
+        return [cls.created_at >= at - ID_TIME_SLACK]
+
+    @property
+    def cursor(self) -> str:
+        """
+        The row's position in listings, see `BaseRepository._paginate`
+        """
+        return encode_cursor(self.created_at, self.id)
 
     @declared_attr
     def id_prefix(cls):  # NOQA
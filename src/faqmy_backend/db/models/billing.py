@@ -0,0 +1,78 @@
+import datetime
+
+from sqlalchemy import Boolean, DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from faqmy_backend.db.models.base import BaseModel
+
+# The Stripe objects are mirrored under their Stripe ids, `created_at` is
+# the time Stripe created the object, `synced_at` the time of the Stripe
+# event the row was last written from. An event older than that is stale
+# and is skipped, as Stripe doesn't deliver the events in order. Deleted
+# customers and products are kept with `deleted_at` set, so that a late
+# event doesn't bring them back.
+
+
+class StripeCustomer(BaseModel):
+    __id_prefix__ = "cus"
+
+    email: Mapped[str | None] = mapped_column(String(320), index=True)
+    synced_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    deleted_at: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
+
+
+class StripeSubscription(BaseModel):
+    __id_prefix__ = "sub"
+    __table_args__ = (
+        Index(
+            "ix_stripe_subscriptions_customer_id_created_at",
+            "customer_id",
+            "created_at",
+        ),
+    )
+
+    # Not a foreign key, the subscription's event may come first
+    customer_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    status: Mapped[str] = mapped_column(String(32), nullable=False)
+    product_id: Mapped[str | None] = mapped_column(String(255))
+    plan_id: Mapped[str | None] = mapped_column(String(255))
+    plan_interval: Mapped[str | None] = mapped_column(String(16))
+    plan_interval_count: Mapped[int | None] = mapped_column(Integer())
+    plan_amount: Mapped[int | None] = mapped_column(Integer())
+    start_date: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
+    trial_start: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
+    trial_end: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
+    current_period_start: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
+    current_period_end: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
+    synced_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+
+class StripeProduct(BaseModel):
+    __id_prefix__ = "prod"
+
+    name: Mapped[str | None] = mapped_column(String(255))
+    active: Mapped[bool] = mapped_column(Boolean(), default=True)
+    # The plan's monthly message limit, from the product's metadata
+    messages_count: Mapped[int | None] = mapped_column(Integer())
+    synced_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    deleted_at: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
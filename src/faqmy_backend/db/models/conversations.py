@@ -1,6 +1,16 @@
+import datetime
 import enum
 
-from sqlalchemy import Enum, ForeignKey, String, Text
+from sqlalchemy import (
+    DDL,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    String,
+    Text,
+    event,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from faqmy_backend.db.models.base import BaseModel
@@ -13,6 +23,11 @@ class MessageTypeEnum(str, enum.Enum):
 
 class Conversation(BaseModel):
     __id_prefix__ = "conv"
+    __table_args__ = (
+        Index(
+            "ix_conversations_stack_id_created_at", "stack_id", "created_at"
+        ),
+    )
 
     stack_id: Mapped[str] = mapped_column(
         String(255), ForeignKey("stacks.id", ondelete="cascade")
@@ -23,14 +38,32 @@ class Conversation(BaseModel):
 
 
 class Message(BaseModel):
+    """
+    Partitioned by months of `created_at`, see `faqmy_backend.db.partitions`
+    """
+
     __id_prefix__ = "msg"
+    __table_args__ = (
+        Index(
+            "ix_messages_conversation_id_created_at",
+            "conversation_id",
+            "created_at",
+        ),
+        Index("ix_messages_parent_id", "parent_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
+    # The partition key has to be a part of the primary key
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+        default=datetime.datetime.utcnow,
+    )
     conversation_id: Mapped[str] = mapped_column(
         String(255), ForeignKey("conversations.id", ondelete="cascade")
     )
-    parent_id: Mapped[str | None] = mapped_column(
-        String(255), ForeignKey("messages.id", ondelete="set null")
-    )
+    # Not a foreign key: there's no unique index on the id alone to refer to
+    parent_id: Mapped[str | None] = mapped_column(String(255))
     who: Mapped[MessageTypeEnum] = mapped_column(
         Enum(MessageTypeEnum, native_enum=False, length=16),
         default=MessageTypeEnum.user,
@@ -39,5 +72,14 @@ class Message(BaseModel):
 
     conversation: Mapped["Conversation"] = relationship("Conversation")
     parent: Mapped["Message"] = relationship(
-        backref="replies", remote_side="Message.id"
+        backref="replies",
+        primaryjoin="foreign(Message.parent_id) == remote(Message.id)",
     )
+
+
+# Catches the rows no monthly partition has been created for
+event.listen(
+    Message.__table__,
+    "after_create",
+    DDL("CREATE TABLE messages_default PARTITION OF messages DEFAULT"),
+)
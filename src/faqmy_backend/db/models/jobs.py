@@ -0,0 +1,104 @@
+import datetime
+import enum
+
+from sqlalchemy import (
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from faqmy_backend.db.models.base import BaseModel
+
+
+class JobStatusEnum(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class IngestionKindEnum(str, enum.Enum):
+    upload = "upload"
+    url = "url"
+
+
+class ReplyJob(BaseModel):
+    """
+    A user message waiting for the bot reply.
+
+    The row lives until the reply is written; jobs which ran out of
+    attempts stay `failed` for inspection.
+    """
+
+    __id_prefix__ = "rjob"
+    __table_args__ = (
+        Index("ix_reply_jobs_status_run_after", "status", "run_after"),
+    )
+
+    # Not a foreign key, as messages are partitioned. The job of a deleted
+    # message finds nothing to reply to and completes
+    message_id: Mapped[str] = mapped_column(
+        String(255), unique=True, nullable=False
+    )
+    status: Mapped[JobStatusEnum] = mapped_column(
+        Enum(JobStatusEnum, native_enum=False, length=16),
+        default=JobStatusEnum.pending,
+    )
+    attempts: Mapped[int] = mapped_column(Integer(), default=0)
+    run_after: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    locked_until: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
+    last_error: Mapped[str | None] = mapped_column(Text())
+
+
+class IngestionJob(BaseModel):
+    """
+    Creates learned cards from an uploaded file or a scanned URL.
+
+    Finished jobs are kept, so the dashboard can show how it went.
+    """
+
+    __id_prefix__ = "ijob"
+    __table_args__ = (
+        Index("ix_ingestion_jobs_status_created_at", "status", "created_at"),
+    )
+
+    stack_id: Mapped[str] = mapped_column(
+        String(255),
+        ForeignKey("stacks.id", ondelete="cascade"),
+        nullable=False,
+    )
+    user_id: Mapped[str] = mapped_column(
+        String(255), ForeignKey("users.id", ondelete="cascade"), nullable=False
+    )
+    kind: Mapped[IngestionKindEnum] = mapped_column(
+        Enum(IngestionKindEnum, native_enum=False, length=16)
+    )
+    # The URL to scan or the path of the stored upload
+    source: Mapped[str] = mapped_column(Text())
+    filename: Mapped[str | None] = mapped_column(String(255))
+    content_type: Mapped[str | None] = mapped_column(String(255))
+
+    status: Mapped[JobStatusEnum] = mapped_column(
+        Enum(JobStatusEnum, native_enum=False, length=16),
+        default=JobStatusEnum.pending,
+    )
+    documents_parsed: Mapped[int] = mapped_column(Integer(), default=0)
+    cards_written: Mapped[int] = mapped_column(Integer(), default=0)
+    failures: Mapped[int] = mapped_column(Integer(), default=0)
+    error: Mapped[str | None] = mapped_column(Text())
+    locked_until: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
+    finished_at: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True)
+    )
@@ -1,6 +1,15 @@
 import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+import shortuuid
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from faqmy_backend.db.models.base import BaseModel
@@ -8,6 +17,9 @@ from faqmy_backend.db.models.base import BaseModel
 
 class Stack(BaseModel):
     __id_prefix__ = "st"
+    __table_args__ = (
+        Index("ix_stacks_user_id_created_at", "user_id", "created_at"),
+    )
 
     user_id: Mapped[str] = mapped_column(
         String(255), ForeignKey("users.id", ondelete="cascade"), nullable=False
@@ -23,12 +35,25 @@ class Stack(BaseModel):
     )
     widget_delay: Mapped[int | None] = mapped_column(Integer(), default=3)
     color: Mapped[str | None] = mapped_column(String(255), default="#000000")
+    # Bumped whenever the stack's cards change, so cached answers expire
+    cards_generation: Mapped[int] = mapped_column(
+        Integer(), default=0, server_default="0"
+    )
 
     user: Mapped["User"] = relationship("User")
 
+    @classmethod
+    def generate_new_id(cls) -> str:
+        # The bot service names its indexes after the UUID encoded in here,
+        # see `BotSDK.index_uuid`
+        return cls.id_prefix + shortuuid.uuid()
+
 
 class Card(BaseModel):
     __id_prefix__ = "card"
+    __table_args__ = (
+        Index("ix_cards_stack_id_learned", "stack_id", "learned"),
+    )
 
     stack_id: Mapped[str] = mapped_column(
         String(255),
@@ -39,5 +64,9 @@ class Card(BaseModel):
     answer: Mapped[str | None] = mapped_column(Text())
     learned: Mapped[bool] = mapped_column(Boolean, default=False)
     es_doc_id: Mapped[str | None] = mapped_column(String(32))
+    last_modified_at: Mapped[datetime.datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.datetime.utcnow,
+    )
 
     stack: Mapped[Stack] = relationship("Stack")
@@ -0,0 +1,31 @@
+import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from faqmy_backend.db.models.base import BaseModel
+
+
+class UsageCounter(BaseModel):
+    """
+    Messages visitors wrote to any stack of the user within an hour.
+
+    Counted as the messages are written, so a quota check sums the hours
+    of a billing period instead of counting messages. Counters never go
+    down: deleting a conversation doesn't give its messages back.
+    """
+
+    __id_prefix__ = "use"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "hour", name="uq_usage_counters_user_id_hour"
+        ),
+    )
+
+    user_id: Mapped[str] = mapped_column(
+        String(255), ForeignKey("users.id", ondelete="cascade"), nullable=False
+    )
+    hour: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    messages: Mapped[int] = mapped_column(Integer(), default=0)
@@ -0,0 +1,240 @@
+"""
+Monthly partitions of the messages table.
+
+A month of messages lives in its own partition, like `messages_y2026m10`.
+Rows of months without one go to `messages_default`, which is meant to
+stay empty: `python -m faqmy_backend partitions` creates the partitions of
+the coming months, and archives the ones older than the retention window
+so that the indexes of the table only cover the recent months.
+
+Archived partitions are either moved into the `archive` schema, with no
+indexes and with their texts compressed, or dumped into gzipped CSV files,
+and dropped afterwards.
+"""
+import asyncio
+import datetime
+import gzip
+import logging
+import pathlib
+import re
+from typing import AsyncContextManager, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+# Opens a connection in a transaction committed at the exit, as
+# `engine.begin` does
+Begin = Callable[[], AsyncContextManager[AsyncConnection]]
+
+TABLE = "messages"
+ARCHIVE_SCHEMA = "archive"
+# How long DETACH waits for the queries running on the table
+LOCK_TIMEOUT = "5s"
+NAME_RE = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def month_bound(month: datetime.date) -> str:
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+async def list_partitions(conn: AsyncConnection) -> list[datetime.date]:
+    """
+    The months which have their partitions
+    """
+    result = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": TABLE},
+    )
+    months = []
+    for (name,) in result:
+        if match := NAME_RE.match(name):
+            year, month = match.groups()
+            months.append(datetime.date(int(year), int(month), 1))
+    return sorted(months)
+
+
+async def create_partitions(
+    conn: AsyncConnection, start: datetime.date, months: int
+) -> list[str]:
+    """
+    Creates the missing partitions of `months` months since `start`'s one
+    """
+    existing = set(await list_partitions(conn))
+    created = []
+    month = start.replace(day=1)
+    for _ in range(months):
+        if month not in existing:
+            name = partition_name(month)
+            await conn.execute(
+                text(
+                    f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES "
+                    f"FROM ({month_bound(month)}) "
+                    f"TO ({month_bound(add_months(month, 1))})"
+                )
+            )
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+async def dump_table(
+    conn: AsyncConnection, name: str, path: pathlib.Path
+) -> None:
+    """
+    Writes the table into a gzipped CSV file with a header
+    """
+    raw = await conn.get_raw_connection()
+    with gzip.open(path, "wb") as fp:
+
+        async def write(chunk: bytes) -> None:
+            await asyncio.to_thread(fp.write, chunk)
+
+        await raw.driver_connection.copy_from_table(
+            name, output=write, format="csv", header=True
+        )
+
+
+async def list_detached(conn: AsyncConnection) -> list[str]:
+    """
+    Month tables which were detached but not archived yet, left behind by
+    an interrupted run
+    """
+    result = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = current_schema() AND c.relkind = 'r' "
+            "AND NOT c.relispartition"
+        )
+    )
+    return sorted(name for (name,) in result if NAME_RE.match(name))
+
+
+async def detach_partition(conn: AsyncConnection, name: str) -> None:
+    """
+    Takes the partition out of the table. DETACH locks the whole table, so
+    it runs in a transaction of its own and gives up instead of queueing
+    behind long queries; CONCURRENTLY is no option with a default partition
+    """
+    await conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    await conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+
+
+async def copy_table(
+    conn: AsyncConnection, name: str, dump_dir: pathlib.Path | None = None
+) -> None:
+    """
+    Copies the detached table into the archive schema or, with `dump_dir`,
+    into a file there
+    """
+    if dump_dir is not None:
+        await dump_table(conn, name, dump_dir / f"{name}.csv.gz")
+        return
+
+    copied = await conn.execute(
+        text("SELECT to_regclass(:name)"),
+        {"name": f"{ARCHIVE_SCHEMA}.{name}"},
+    )
+    if copied.scalar() is not None:
+        # The table is created along with its rows, so it's complete
+        return
+    # The copy has no indexes, and texts over 128 bytes are compressed
+    # instead of the default 2 kB
+    await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    await conn.execute(
+        text(
+            f"CREATE TABLE {ARCHIVE_SCHEMA}.{name} (LIKE {name}) "
+            f"WITH (toast_tuple_target = 128)"
+        )
+    )
+    await conn.execute(
+        text(f"INSERT INTO {ARCHIVE_SCHEMA}.{name} SELECT * FROM {name}")
+    )
+
+
+async def archive_partitions(
+    begin: Begin,
+    before: datetime.date,
+    dump_dir: pathlib.Path | None = None,
+) -> list[str]:
+    """
+    Takes the partitions of the months which ended by `before` out of the
+    table, into the archive schema or, with `dump_dir`, into files there.
+
+    Every step runs in its own transaction: the table is locked only for
+    the detach, and the copy of a month only locks the detached table. A
+    failed run is finished by the next one.
+    """
+    async with begin() as conn:
+        months = [
+            month
+            for month in await list_partitions(conn)
+            if add_months(month, 1) <= before
+        ]
+        names = await list_detached(conn)
+    for month in months:
+        name = partition_name(month)
+        async with begin() as conn:
+            await detach_partition(conn, name)
+        names.append(name)
+
+    for name in names:
+        async with begin() as conn:
+            await copy_table(conn, name, dump_dir)
+        async with begin() as conn:
+            await conn.execute(text(f"DROP TABLE {name}"))
+    return names
+
+
+async def maintain(
+    begin: Begin,
+    today: datetime.date,
+    ahead: int,
+    retention_months: int,
+    dump_dir: pathlib.Path | None = None,
+) -> tuple[list[str], list[str]]:
+    """
+    Creates the partitions of this and `ahead` coming months, and archives
+    the ones older than `retention_months` full months
+    """
+    month = today.replace(day=1)
+    async with begin() as conn:
+        created = await create_partitions(conn, month, ahead + 1)
+    archived = await archive_partitions(
+        begin, add_months(month, -retention_months), dump_dir
+    )
+    return created, archived
+
+
+async def run(
+    ahead: int, retention_months: int, dump_dir: pathlib.Path | None = None
+) -> None:
+    from faqmy_backend.db.connection import engine
+
+    created, archived = await maintain(
+        engine.begin,
+        datetime.datetime.now(datetime.UTC).date(),
+        ahead=ahead,
+        retention_months=retention_months,
+        dump_dir=dump_dir,
+    )
+    for name in created:
+        logger.info("Created partition %s", name)
+    for name in archived:
+        logger.info("Archived partition %s", name)
+    await engine.dispose()
@@ -1,8 +1,11 @@
 from abc import ABC
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from typing import (
     Any,
     AsyncGenerator,
+    AsyncIterator,
+    Callable,
     ClassVar,
     Generic,
     Sequence,
@@ -17,19 +20,51 @@ from sqlalchemy import (
     exists,
     func,
     insert,
+    literal,
     select,
+    tuple_,
     update,
 )
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.sql import Executable
+from sqlalchemy.sql import Executable, Select
 
+from faqmy_backend.db.connection import STICK_TO_PRIMARY
 from faqmy_backend.db.exceptions import DatabaseError
+from faqmy_backend.db.utils import decode_cursor, encode_cursor
 
 Model = TypeVar("Model")
 ModelClass = ClassVar[Type[Model]]
 
+# Marks an argument the caller didn't pass, as None is a valid value
+not_set = object()
+
+PAGE_SIZE = 50
+# Rows fetched from a server-side cursor at a time
+STREAM_CHUNK_SIZE = 500
+
+
+@dataclass
+class Page(Generic[Model]):
+    items: list[Model]
+    # Passed back to get the following page, None on the last one
+    next_cursor: str | None = None
+
+
+def columns(model: Any, row: Any) -> list:
+    """
+    The model's columns a projection row (a NamedTuple) is made of
+    """
+    return [getattr(model, name) for name in row._fields]
+
+
+def row_cursor(row: Any) -> str:
+    """
+    `BaseModel.cursor` for projection rows, to be used as a property
+    """
+    return encode_cursor(row.created_at, row.id)
+
 
 class BaseRepository(ABC, Generic[Model]):
     model: ModelClass
@@ -40,16 +75,37 @@ class BaseRepository(ABC, Generic[Model]):
         else:
             self._session = session_or_pool
 
-    async def _execute(self, stmt):
-        async with self.__transaction:
-            return await self._session.execute(stmt)
+    async def _execute(
+        self,
+        stmt,
+        params: Sequence[dict] | None = None,
+        replica: bool = False,
+    ):
+        """
+        Executes the statement, a read-only one may go to a replica
+        """
+        async with self._atomic:
+            return await self._session.execute(
+                stmt, params, bind_arguments={"replica": replica}
+            )
+
+    def stick_to_primary(self) -> None:
+        """
+        Makes the rest of the session read from the primary, for rows which
+        may not have reached replicas yet
+        """
+        self._session.info[STICK_TO_PRIMARY] = True
 
     async def commit(self):
         await self._session.commit()
 
     @property
     @asynccontextmanager
-    async def __transaction(self) -> AsyncGenerator:
+    async def _atomic(self) -> AsyncGenerator:
+        """
+        Runs the statements inside in a single transaction, or in the one
+        that is already open
+        """
         if not self._session.in_transaction() and self._session.is_active:
             async with self._session.begin() as transaction:
                 yield transaction
@@ -64,6 +120,23 @@ class BaseRepository(ABC, Generic[Model]):
         except (IntegrityError, ) as ex:
             raise DatabaseError(ex)
 
+    async def _insert_many(
+        self, rows: Sequence[dict[str, Any]]
+    ) -> list[Model]:
+        """
+        Inserts all the rows with a single multi-row INSERT ... RETURNING
+        """
+        if not rows:
+            return []
+        try:
+            return list(
+                (await self._execute(insert_many_stmt(self.model, rows)))
+                .scalars()
+                .all()
+            )
+        except (IntegrityError, ) as ex:
+            raise DatabaseError(ex)
+
     async def _update(self, *clauses: Any, **values: Any) -> None:
         try:
             await self._execute(
@@ -72,16 +145,60 @@ class BaseRepository(ABC, Generic[Model]):
         except (IntegrityError, ) as ex:
             raise DatabaseError(ex)
 
+    async def _update_one(self, *clauses: Any, **values: Any) -> Model | None:
+        """
+        Updates the row matching the clauses and returns it, or None if
+        nothing matched, within a single UPDATE ... RETURNING
+        """
+        query = (
+            update(self.model)
+            .where(*clauses)
+            .values(**values)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        try:
+            return (await self._execute(query)).scalars().first()
+        except (IntegrityError, ) as ex:
+            raise DatabaseError(ex)
+
+    async def _patch(self, *clauses: Any, **values: Any) -> Model | None:
+        """
+        Sets only the passed fields (the ones which aren't `not_set`) of the
+        row matching the clauses, stamps `last_modified_at` if the model has
+        one, and returns the row as it is after the update
+        """
+        values = {k: v for k, v in values.items() if v is not not_set}
+        if not values:
+            # From the primary, as the update would have returned it
+            query = select(self.model).where(*clauses)
+            return (await self._execute(query)).scalars().first()
+        if hasattr(self.model, "last_modified_at"):
+            values["last_modified_at"] = func.now()
+        return await self._update_one(*clauses, **values)
+
     async def _delete(self, *clauses: Any) -> list[Model]:
         query = delete(self.model).where(*clauses).returning(self.model)
         return list((await self._execute(query)).mappings().all())
 
+    async def _delete_one(self, *clauses: Any) -> Model | None:
+        """
+        Deletes the row matching the clauses and returns it, or None if
+        nothing matched, within a single DELETE ... RETURNING
+        """
+        query = delete(self.model).where(*clauses).returning(self.model)
+        try:
+            return (await self._execute(query)).scalars().first()
+        except (IntegrityError, ) as ex:
+            raise DatabaseError(ex)
+
     # @asynccontextmanager
     async def _select(self, *clauses: Any, **cond: Any) -> ScalarResult:
         # Sequence[Model]:
         return (
             await self._execute(
-                cast(Executable, select_stmt(self.model, *clauses, **cond))
+                cast(Executable, select_stmt(self.model, *clauses, **cond)),
+                replica=True,
             )
         ).scalars()
 
@@ -93,15 +210,84 @@ class BaseRepository(ABC, Generic[Model]):
         result = cast(Model, (await self._select(*clauses, **cond)).first())
         return result
 
+    async def _paginate(
+        self,
+        query: Select,
+        limit: int = PAGE_SIZE,
+        cursor: str | None = None,
+        since: str | None = None,
+        descending: bool = False,
+        row: Callable[[Any], Any] | None = None,
+    ) -> Page[Model]:
+        """
+        Reads a page of the query's rows in the (created_at, id) order.
+
+        The page starts right after the `cursor` row, `since` keeps only the
+        rows created after its row whichever the order is. Both are compared
+        to the key in the WHERE clause, so the index on `created_at` is
+        used however deep the page is. Raises ValueError on a bad cursor.
+
+        A query of entities gives a page of them, a query of columns gives
+        a page of projection rows, which `row` builds out of result rows
+        """
+        created_at, id = self.model.created_at, self.model.id
+        key = tuple_(created_at, id)
+
+        def position(value: str):
+            at, row_id = decode_cursor(value)
+            return tuple_(literal(at, created_at.type), literal(row_id))
+
+        if since is not None:
+            query = query.where(key > position(since))
+        if cursor is not None:
+            after = position(cursor)
+            query = query.where(key < after if descending else key > after)
+        order = (created_at, id)
+        if descending:
+            order = (created_at.desc(), id.desc())
+        result = await self._execute(
+            query.order_by(None).order_by(*order).limit(limit + 1),
+            replica=True,
+        )
+        if row is None:
+            rows = result.scalars().all()
+        else:
+            rows = [row(r) for r in result]
+        items = list(rows[:limit])
+        if len(rows) > limit:
+            return Page(items, items[-1].cursor)
+        return Page(items)
+
+    async def _stream(
+        self, query: Select, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[Model]:
+        """
+        Yields the query's rows read through a server-side cursor, a chunk
+        at a time, so that only one chunk is held in memory however many
+        rows there are
+        """
+        async with self._atomic:
+            result = await self._session.stream_scalars(
+                query,
+                execution_options={"yield_per": chunk_size},
+                bind_arguments={"replica": True},
+            )
+            async for row in result:
+                yield row
+
     async def _exists(self, *clauses: Any) -> bool | None:
         result = (
-            await self._execute(exists_stmt(self.model, *clauses))
+            await self._execute(
+                exists_stmt(self.model, *clauses), replica=True
+            )
         ).scalar()
         return cast(bool | None, result)
 
     async def _count(self) -> int:
         result = (
-            (await self._execute(count_stmt(self.model))).scalars().first()
+            (await self._execute(count_stmt(self.model), replica=True))
+            .scalars()
+            .first()
         )
         return cast(int, result)
 
@@ -118,6 +304,10 @@ def insert_stmt(model: Model, values):
     return insert(model).values(**values).returning(model)
 
 
+def insert_many_stmt(model: Model, rows):
+    return insert(model).values(list(rows)).returning(model)
+
+
 def update_stmt(model: Model, *clauses, **values):
     return update(model).where(*clauses).values(**values).returning(None)
 
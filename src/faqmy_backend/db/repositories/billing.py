@@ -0,0 +1,111 @@
+import datetime
+from typing import Any
+
+from sqlalchemy import and_, select
+from sqlalchemy.dialects.postgresql import insert
+
+from faqmy_backend.db.models.billing import (
+    StripeCustomer,
+    StripeProduct,
+    StripeSubscription,
+)
+from faqmy_backend.db.repositories.base import BaseRepository, Model
+
+# Subscriptions which give access to the widget
+LIVE_STATUSES = ("active", "trialing")
+
+
+class StripeMirrorRepository(BaseRepository[Model]):
+    """
+    Writes the Stripe objects of the model, skipping the events which are
+    older than the row. The row of a deleted object stays as its tombstone
+    """
+
+    async def upsert(self, values: dict[str, Any]) -> bool:
+        """
+        Inserts or overwrites the object, returns False if the row was
+        written from a later event
+        """
+        query = insert(self.model).values(values)
+        query = query.on_conflict_do_update(
+            index_elements=[self.model.id],
+            set_={
+                name: query.excluded[name] for name in values if name != "id"
+            },
+            where=self.model.synced_at <= query.excluded.synced_at,
+        ).returning(self.model.id)
+        return (await self._execute(query)).first() is not None
+
+    async def remove(self, id: str, synced_at: datetime.datetime) -> bool:
+        """
+        Marks the object deleted, the mark is written even if the object
+        isn't there yet, so that its stale events are skipped as well
+        """
+        values = {
+            "id": id,
+            "created_at": synced_at,
+            "synced_at": synced_at,
+            "deleted_at": synced_at,
+        }
+        query = insert(self.model).values(values)
+        query = query.on_conflict_do_update(
+            index_elements=[self.model.id],
+            set_={
+                "synced_at": query.excluded.synced_at,
+                "deleted_at": query.excluded.deleted_at,
+            },
+            where=self.model.synced_at <= query.excluded.synced_at,
+        ).returning(self.model.id)
+        return (await self._execute(query)).first() is not None
+
+
+class StripeCustomerRepository(StripeMirrorRepository[StripeCustomer]):
+    model = StripeCustomer
+
+    async def get_id_by_email(self, email: str) -> str | None:
+        """
+        The latest Stripe customer with the email, as Stripe lists them
+        """
+        query = (
+            select(StripeCustomer.id)
+            .where(
+                StripeCustomer.email == email,
+                StripeCustomer.deleted_at.is_(None),
+            )
+            .order_by(StripeCustomer.created_at.desc())
+            .limit(1)
+        )
+        return (await self._execute(query, replica=True)).scalar()
+
+
+class StripeProductRepository(StripeMirrorRepository[StripeProduct]):
+    model = StripeProduct
+
+
+class StripeSubscriptionRepository(StripeMirrorRepository[StripeSubscription]):
+    model = StripeSubscription
+
+    async def get_live(
+        self, customer_id: str
+    ) -> list[tuple[StripeSubscription, StripeProduct | None]]:
+        """
+        The customer's active and trialing subscriptions, latest first,
+        along with their products unless those are archived or deleted
+        """
+        query = (
+            select(StripeSubscription, StripeProduct)
+            .outerjoin(
+                StripeProduct,
+                and_(
+                    StripeProduct.id == StripeSubscription.product_id,
+                    StripeProduct.active,
+                    StripeProduct.deleted_at.is_(None),
+                ),
+            )
+            .where(
+                StripeSubscription.customer_id == customer_id,
+                StripeSubscription.status.in_(LIVE_STATUSES),
+            )
+            .order_by(StripeSubscription.created_at.desc())
+        )
+        return [tuple(row) for row in await self._execute(query, replica=True)]
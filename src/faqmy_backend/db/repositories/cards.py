@@ -1,11 +1,42 @@
-from sqlalchemy import select
+import datetime
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable, NamedTuple
+
+from sqlalchemy import bindparam, func, select, update
 from sqlalchemy.exc import IntegrityError
 
 from faqmy_backend.db.exceptions import DatabaseError
 from faqmy_backend.db.models.stack import Card, Stack
-from faqmy_backend.db.repositories.base import BaseRepository, Model
+from faqmy_backend.db.repositories.base import (
+    PAGE_SIZE,
+    BaseRepository,
+    Model,
+    Page,
+    columns,
+    not_set,
+    row_cursor,
+)
+
+if TYPE_CHECKING:
+    from faqmy_backend.services.bot import Document
+
+
+class CardRow(NamedTuple):
+    """
+    The columns of a card the lists and the batch learning need
+    """
+
+    id: str
+    question: str | None
+    answer: str | None
+    learned: bool
+    es_doc_id: str | None
+    created_at: datetime.datetime
 
-not_set = object()
+    cursor = property(row_cursor)
+
+
+# Keeps a multi-row INSERT well below the 32767 bind parameters limit
+INSERT_BATCH_SIZE = 1000
 
 
 class CardRepository(BaseRepository[Card]):
@@ -31,9 +62,61 @@ class CardRepository(BaseRepository[Card]):
             learned=False,
         )
 
+    async def create_many(
+        self, stack_id: str, documents: Iterable["Document"]
+    ) -> list[Model]:
+        """
+        Writes cards for documents the bot has already learned, one
+        multi-row INSERT per batch
+        """
+        rows = [
+            {
+                "stack_id": stack_id,
+                "question": doc.name,
+                "answer": doc.content,
+                "learned": True,
+                "es_doc_id": doc.id,
+            }
+            for doc in documents
+        ]
+        cards = []
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            batch = rows[start : start + INSERT_BATCH_SIZE]
+            cards.extend(await self._insert_many(batch))
+        return cards
+
     async def get_by_id(self, id: str) -> Model:
         return await self._select_one(Card.id == id)
 
+    @staticmethod
+    def owned_by(user_id: str):
+        return Card.stack_id.in_(
+            select(Stack.id).where(Stack.user_id == user_id)
+        )
+
+    async def get_owned(self, card_id: str, user_id: str) -> Model | None:
+        """
+        Returns the card if it belongs to a stack of the user
+        """
+        return await self._select_one(
+            Card.id == card_id, self.owned_by(user_id)
+        )
+
+    async def update_owned(
+        self, card_id: str, user_id: str, **values: Any
+    ) -> Model | None:
+        return await self._patch(
+            Card.id == card_id, self.owned_by(user_id), **values
+        )
+
+    async def delete_owned(self, card_id: str, user_id: str) -> Model | None:
+        """
+        Deletes the user's card, returns the deleted card or None
+        """
+        return await self._delete_one(
+            Card.id == card_id, self.owned_by(user_id)
+        )
+
     async def mark_learned(
         self, card_id: str, es_doc_id: str | None = None
     ) -> Model:
@@ -42,17 +125,103 @@ class CardRepository(BaseRepository[Card]):
         }
         if es_doc_id is not None:
             values["es_doc_id"] = es_doc_id
-        return await self._update(Card.id == card_id, **values)
+        return await self._patch(Card.id == card_id, **values)
+
+    async def bump_generation(self, stack_id: str) -> None:
+        """
+        Marks the stack's cards as changed, so answers cached for the
+        previous generation are never served again
+        """
+        await self._execute(
+            update(Stack)
+            .where(Stack.id == stack_id)
+            .values(cards_generation=Stack.cards_generation + 1)
+        )
+
+    async def mark_learned_many(self, es_doc_ids: dict[str, str]) -> None:
+        """
+        Marks cards learned by a {card id: bot document id} mapping with a
+        single executemany UPDATE
+        """
+        if not es_doc_ids:
+            return
+        cards = Card.__table__
+        await self._execute(
+            update(cards)
+            .where(cards.c.id == bindparam("card_id"))
+            .values(
+                learned=True,
+                es_doc_id=bindparam("doc_id"),
+                last_modified_at=func.now(),
+            ),
+            [
+                {"card_id": card_id, "doc_id": doc_id}
+                for card_id, doc_id in es_doc_ids.items()
+            ],
+        )
+
+    async def mark_unlearned_many(self, card_ids: Iterable[str]) -> None:
+        card_ids = list(card_ids)
+        if card_ids:
+            await self._update(
+                Card.id.in_(card_ids),
+                learned=False,
+                es_doc_id=None,
+                last_modified_at=func.now(),
+            )
+
+    async def get_by_ids(
+        self, stack_id: str, ids: Iterable[str]
+    ) -> list[Model]:
+        return await self._select_all(
+            Card.stack_id == stack_id, Card.id.in_(list(ids))
+        )
 
     async def get_by_stack_id(
         self,
         stack_id: str,
         learned: bool | None = None,
-    ) -> list[Model]:
+    ) -> list[CardRow]:
+        query = select(*columns(Card, CardRow)).where(
+            *self._stack_cards(stack_id, learned)
+        )
+        result = await self._execute(query, replica=True)
+        return [CardRow._make(row) for row in result]
+
+    async def get_page_by_stack_id(
+        self,
+        stack_id: str,
+        learned: bool | None = None,
+        limit: int = PAGE_SIZE,
+        cursor: str | None = None,
+        since: str | None = None,
+    ) -> Page[CardRow]:
+        query = select(*columns(Card, CardRow)).where(
+            *self._stack_cards(stack_id, learned)
+        )
+        return await self._paginate(
+            query, limit=limit, cursor=cursor, since=since, row=CardRow._make
+        )
+
+    def stream_by_stack_id(
+        self, stack_id: str, learned: bool | None = None
+    ) -> AsyncIterator[Model]:
+        """
+        Yields all the cards of the stack, oldest first, for exports
+        """
+        query = (
+            select(Card)
+            .where(*self._stack_cards(stack_id, learned))
+            .order_by(Card.created_at, Card.id)
+        )
+        return self._stream(query)
+
+    @staticmethod
+    def _stack_cards(stack_id: str, learned: bool | None) -> list:
         conds = [Card.stack_id == stack_id]
         if learned is not None:
             conds.append(Card.learned.is_(learned))
-        return await self._select_all(*conds)
+        return conds
 
     async def delete(self, stack_id: str) -> None:
         try:
@@ -62,20 +231,16 @@ class CardRepository(BaseRepository[Card]):
 
     async def update(
         self,
-        card_id: str | None = not_set,
+        card_id: str,
         question: str | None = not_set,
         answer: str | None = not_set,
         learned: bool | None = not_set,
         es_doc_id: str | None = not_set,
-    ) -> None:
-        card = await self.get_by_id(card_id)
-        values = {}
-        fields = ["question", "answer", "learned", "es_doc_id"]
-
-        for field in fields:
-            current_value = getattr(card, field)
-            new_value = locals()[field]
-            if current_value != new_value and new_value is not not_set:
-                values[field] = new_value
-        if values:
-            await self._update(Card.id == card.id, **values)
+    ) -> Model | None:
+        return await self._patch(
+            Card.id == card_id,
+            question=question,
+            answer=answer,
+            learned=learned,
+            es_doc_id=es_doc_id,
+        )
@@ -1,3 +1,6 @@
+import datetime
+from typing import Any, NamedTuple
+
 import shortuuid
 from sqlalchemy import select
 from sqlalchemy.exc import NoResultFound
@@ -5,7 +8,40 @@ from sqlalchemy.exc import NoResultFound
 from faqmy_backend.db.exceptions import DatabaseError
 from faqmy_backend.db.models.conversations import Conversation
 from faqmy_backend.db.models.stack import Stack
-from faqmy_backend.db.repositories.base import BaseRepository, Model
+from faqmy_backend.db.repositories.base import (
+    PAGE_SIZE,
+    BaseRepository,
+    Model,
+    Page,
+    columns,
+    row_cursor,
+)
+
+
+class StackRow(NamedTuple):
+    id: str
+    name: str | None
+    description: str | None
+    initial_question: str | None
+    widget_delay: int | None
+    color: str | None
+    created_at: datetime.datetime
+
+
+class ConversationRow(NamedTuple):
+    """
+    A conversation with its stack as the dashboard lists them
+    """
+
+    id: str
+    created_at: datetime.datetime
+    stack: StackRow
+
+    cursor = property(row_cursor)
+
+    @classmethod
+    def from_row(cls, row: Any) -> "ConversationRow":
+        return cls(row[0], row[1], StackRow._make(row[2:]))
 
 
 class ConversationRepository(BaseRepository[Conversation]):
@@ -28,6 +64,14 @@ class ConversationRepository(BaseRepository[Conversation]):
             )
         ).scalar()
 
+    async def exists_sealed(self, conversation_id: str, password: str) -> bool:
+        return bool(
+            await self._exists(
+                Conversation.id == conversation_id,
+                Conversation.password == password,
+            )
+        )
+
     async def create(self, stack_id: str) -> Model:
         return await self._insert(stack_id=stack_id, password=shortuuid.uuid())
 
@@ -37,15 +81,55 @@ class ConversationRepository(BaseRepository[Conversation]):
         except (NoResultFound,) as exc_info:
             raise DatabaseError(exc_info)
 
-    async def get_by_user_id(self, user_id: str) -> list[Model]:
+    async def get_by_user_id(
+        self,
+        user_id: str,
+        limit: int = PAGE_SIZE,
+        cursor: str | None = None,
+        since: str | None = None,
+    ) -> Page[ConversationRow]:
+        """
+        Lists conversations of all the user's stacks, newest first
+        """
         query = (
-            select(Conversation, Stack)
+            select(
+                Conversation.id,
+                Conversation.created_at,
+                *columns(Stack, StackRow),
+            )
+            .select_from(Conversation)
             .join(Stack)
             .filter(Stack.user_id == user_id)
-            .order_by(Conversation.created_at.desc())
         )
-        res = await self._execute(query)
-        return res.scalars().all()
+        return await self._paginate(
+            query,
+            limit=limit,
+            cursor=cursor,
+            since=since,
+            descending=True,
+            row=ConversationRow.from_row,
+        )
+
+    async def get_owned(self, id: str, user_id: str) -> Model | None:
+        """
+        Returns the conversation if it belongs to a stack of the user
+        """
+        query = (
+            select(Conversation)
+            .join(Stack)
+            .filter(Conversation.id == id, Stack.user_id == user_id)
+        )
+        return (await self._execute(query, replica=True)).scalar()
+
+    async def delete_owned(self, id: str, user_id: str) -> bool:
+        return (
+            await self._delete_one(
+                Conversation.id == id,
+                Conversation.stack_id.in_(
+                    select(Stack.id).where(Stack.user_id == user_id)
+                ),
+            )
+        ) is not None
 
     async def get_by_id(self, id: str) -> Model:
         query = (
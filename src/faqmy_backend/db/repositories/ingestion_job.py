@@ -0,0 +1,160 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import aliased
+
+from faqmy_backend.db.models.jobs import (
+    IngestionJob,
+    IngestionKindEnum,
+    JobStatusEnum,
+)
+from faqmy_backend.db.repositories.base import BaseRepository, Model
+from faqmy_backend.db.repositories.reply_job import seconds_from_now
+
+
+class IngestionJobRepository(BaseRepository[IngestionJob]):
+    model = IngestionJob
+
+    async def create(
+        self,
+        stack_id: str,
+        user_id: str,
+        kind: IngestionKindEnum,
+        source: str,
+        filename: str | None = None,
+        content_type: str | None = None,
+    ) -> Model:
+        return await self._insert(
+            stack_id=stack_id,
+            user_id=user_id,
+            kind=kind,
+            source=source,
+            filename=filename,
+            content_type=content_type,
+            status=JobStatusEnum.pending,
+            documents_parsed=0,
+            cards_written=0,
+            failures=0,
+        )
+
+    async def get_by_id(self, id: str, user_id: str | None = None) -> Model:
+        conditions = [IngestionJob.id == id]
+        if user_id is not None:
+            conditions.append(IngestionJob.user_id == user_id)
+        return await self._select_one(*conditions)
+
+    async def claim_next(
+        self,
+        lease: float,
+        per_user_concurrency: int,
+        job_id: str | None = None,
+    ) -> Model | None:
+        """
+        Locks the oldest pending job (or the given one) of a user who has
+        less than `per_user_concurrency` jobs running, so one tenant's huge
+        crawl doesn't hold every slot while the others wait.
+        """
+        running = aliased(IngestionJob)
+        busy = (
+            select(func.count())
+            .where(
+                running.user_id == IngestionJob.user_id,
+                running.status == JobStatusEnum.running,
+            )
+            .scalar_subquery()
+        )
+        conditions = [
+            IngestionJob.status == JobStatusEnum.pending,
+            busy < per_user_concurrency,
+        ]
+        if job_id is not None:
+            conditions.append(IngestionJob.id == job_id)
+        due = (
+            select(IngestionJob.id)
+            .where(*conditions)
+            .order_by(IngestionJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        jobs = await self._lock(
+            IngestionJob.id.in_(due.scalar_subquery()), lease=lease
+        )
+        return jobs[0] if jobs else None
+
+    async def _lock(self, *clauses, lease: float) -> list[Model]:
+        query = (
+            update(IngestionJob)
+            .where(*clauses)
+            .values(
+                status=JobStatusEnum.running,
+                locked_until=seconds_from_now(lease),
+            )
+            .returning(IngestionJob)
+            .execution_options(synchronize_session=False)
+        )
+        return list((await self._execute(query)).scalars().all())
+
+    async def fail_abandoned(self) -> list[Model]:
+        """
+        Fails and returns the jobs whose worker died, i.e. which haven't
+        renewed their lease in time: rerunning them would duplicate the
+        cards they have already written
+        """
+        query = (
+            update(IngestionJob)
+            .where(
+                IngestionJob.status == JobStatusEnum.running,
+                IngestionJob.locked_until < func.now(),
+            )
+            .values(
+                status=JobStatusEnum.failed,
+                error="Interrupted",
+                locked_until=None,
+                finished_at=func.now(),
+            )
+            .returning(IngestionJob)
+            .execution_options(synchronize_session=False)
+        )
+        return list((await self._execute(query)).scalars().all())
+
+    async def add_progress(
+        self,
+        job_id: str,
+        documents_parsed: int = 0,
+        cards_written: int = 0,
+        failures: int = 0,
+        lease: float | None = None,
+    ) -> None:
+        """
+        Counts a written batch, and renews the job's lease when given one
+        """
+        values = {}
+        if lease is not None:
+            values["locked_until"] = seconds_from_now(lease)
+        await self._update(
+            IngestionJob.id == job_id,
+            documents_parsed=IngestionJob.documents_parsed + documents_parsed,
+            cards_written=IngestionJob.cards_written + cards_written,
+            failures=IngestionJob.failures + failures,
+            **values,
+        )
+
+    async def finish(self, job_id: str, error: str | None = None) -> None:
+        """
+        Completes the running job, one failed as abandoned stays failed
+        """
+        await self._update(
+            IngestionJob.id == job_id,
+            IngestionJob.status == JobStatusEnum.running,
+            status=JobStatusEnum.failed if error else JobStatusEnum.done,
+            error=error,
+            locked_until=None,
+            finished_at=func.now(),
+        )
+
+    async def depth(self) -> dict[str, int]:
+        query = select(IngestionJob.status, func.count()).group_by(
+            IngestionJob.status
+        )
+        counts = {status.value: 0 for status in JobStatusEnum}
+        for status, count in (await self._execute(query)).all():
+            counts[JobStatusEnum(status).value] = count
+        return counts
@@ -1,3 +1,6 @@
+import datetime
+from typing import Any, AsyncIterator, NamedTuple
+
 from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 
@@ -6,32 +9,84 @@ from faqmy_backend.db.models.conversations import (
     Message,
     MessageTypeEnum,
 )
+from faqmy_backend.db.models.jobs import ReplyJob
 from faqmy_backend.db.models.stack import Stack
-from faqmy_backend.db.repositories.base import BaseRepository, Model
+from faqmy_backend.db.repositories.base import (
+    PAGE_SIZE,
+    BaseRepository,
+    Model,
+    Page,
+    columns,
+    row_cursor,
+)
+from faqmy_backend.db.repositories.reply_job import ReplyJobRepository
+from faqmy_backend.db.repositories.usage import UsageRepository
+
+
+class MessageRow(NamedTuple):
+    """
+    The columns of a message the lists show
+    """
+
+    id: str
+    text: str
+    created_at: datetime.datetime
+    who: MessageTypeEnum
+    parent_id: str | None
+
+    cursor = property(row_cursor)
 
 
 class MessageRepository(BaseRepository[Message]):
     model = Message
 
     async def create_message(self, conversation_id: str, text: str) -> Model:
-        return await self._insert(
-            conversation_id=conversation_id,
-            text=text,
-            who=MessageTypeEnum.user,
-        )
+        """
+        Writes a visitor's message and counts it into the stack owner's
+        usage in the same transaction
+        """
+        async with self._atomic:
+            message = await self._insert(
+                conversation_id=conversation_id,
+                text=text,
+                who=MessageTypeEnum.user,
+            )
+            await UsageRepository(self._session).count_message(conversation_id)
+        return message
+
+    async def create_with_reply_job(
+        self, conversation_id: str, text: str
+    ) -> tuple[Model, ReplyJob]:
+        """
+        Writes a visitor's message and queues the job replying to it, both
+        or neither
+        """
+        async with self._atomic:
+            message = await self.create_message(conversation_id, text)
+            job = await ReplyJobRepository(self._session).enqueue(message.id)
+        return message, job
 
     async def reply_message(self, message_id: str, text: str) -> Model:
-        parent = await self._select_one(Message.id == message_id)
+        parent = await self.get_by_id(message_id)
         reply = await self._insert(
             conversation_id=parent.conversation_id,
             parent_id=parent.id,
             text=text,
             who=MessageTypeEnum.bot,
         )
-        return await self._find_message(Message.id == reply.id)
+        return await self._find_message(
+            Message.id == reply.id, Message.created_at == reply.created_at
+        )
+
+    async def get_by_id(self, id: str) -> Model:
+        return await self._select_one(
+            Message.id == id, *Message.created_near(id)
+        )
 
     async def get_by_parent_id(self, parent_id: str) -> Model:
-        return await self._find_message(Message.parent_id == parent_id)
+        return await self._find_message(
+            Message.parent_id == parent_id, *Message.created_after(parent_id)
+        )
 
     async def _find_message(self, *cond):
         query = (
@@ -44,22 +99,76 @@ class MessageRepository(BaseRepository[Message]):
         res = await self._execute(query)
         return res.scalar()
 
-    async def get_by_conversation(self, conversation_id: str) -> list[Model]:
-        return await self.get_msg_list(conversation_id)
+    async def get_by_conversation(
+        self,
+        conversation_id: str,
+        limit: int = PAGE_SIZE,
+        cursor: str | None = None,
+        since: str | None = None,
+        who: MessageTypeEnum | None = None,
+    ) -> Page[MessageRow]:
+        cond = [] if who is None else [Message.who == who]
+        return await self.get_msg_list(
+            conversation_id, *cond, limit=limit, cursor=cursor, since=since
+        )
 
     async def get_by_conversation_sealed(
-        self, conversation_id: str, password: str
-    ) -> list[Model]:
+        self,
+        conversation_id: str,
+        password: str,
+        limit: int = PAGE_SIZE,
+        cursor: str | None = None,
+        since: str | None = None,
+        descending: bool = False,
+    ) -> Page[MessageRow]:
         return await self.get_msg_list(
-            conversation_id, Conversation.password == password
+            conversation_id,
+            Conversation.password == password,
+            limit=limit,
+            cursor=cursor,
+            since=since,
+            descending=descending,
         )
 
-    async def get_msg_list(self, conversation_id: str, *cond) -> list[Model]:
+    async def get_msg_list(
+        self, conversation_id: str, *cond, **page: Any
+    ) -> Page[MessageRow]:
+        """
+        Lists the conversation's messages oldest first unless `descending`,
+        see `_paginate` for the page arguments
+        """
+        query = (
+            select(*columns(Message, MessageRow))
+            .join(Conversation)
+            .filter(
+                Message.conversation_id == conversation_id,
+                *Message.created_after(conversation_id),
+                *cond,
+            )
+        )
+        return await self._paginate(query, row=MessageRow._make, **page)
+
+    def stream_user_messages(
+        self,
+        user_id: str,
+        start: datetime.datetime,
+        end: datetime.datetime | None = None,
+        stack_id: str | None = None,
+    ) -> AsyncIterator[Model]:
+        """
+        Yields messages of the user's stacks created in [start, end), oldest
+        first, for exports
+        """
+        cond = [Stack.user_id == user_id, Message.created_at >= start]
+        if end is not None:
+            cond.append(Message.created_at < end)
+        if stack_id is not None:
+            cond.append(Conversation.stack_id == stack_id)
         query = (
             select(Message)
             .join(Conversation)
-            .filter(Message.conversation_id == conversation_id, *cond)
-            .order_by(Message.created_at)
+            .join(Stack)
+            .filter(*cond)
+            .order_by(Message.created_at, Message.id)
         )
-        res = await self._execute(query)
-        return res.scalars().all()
+        return self._stream(query)
@@ -0,0 +1,110 @@
+import datetime
+
+from sqlalchemy import delete, func, select, update
+
+from faqmy_backend.db.models.jobs import JobStatusEnum, ReplyJob
+from faqmy_backend.db.repositories.base import BaseRepository, Model
+
+
+def seconds_from_now(value: float):
+    return func.now() + datetime.timedelta(seconds=value)
+
+
+class ReplyJobRepository(BaseRepository[ReplyJob]):
+    model = ReplyJob
+
+    async def enqueue(self, message_id: str) -> Model:
+        return await self._insert(
+            message_id=message_id,
+            status=JobStatusEnum.pending,
+            attempts=0,
+        )
+
+    async def claim(self, limit: int, lease: float) -> list[Model]:
+        """
+        Locks up to `limit` due jobs for `lease` seconds.
+
+        Jobs whose lease has expired (the worker died holding them) are due
+        again. SKIP LOCKED lets any number of workers poll concurrently.
+        """
+        due = (
+            select(ReplyJob.id)
+            .where(
+                (
+                    (ReplyJob.status == JobStatusEnum.pending)
+                    & (ReplyJob.run_after <= func.now())
+                )
+                | (
+                    (ReplyJob.status == JobStatusEnum.running)
+                    & (ReplyJob.locked_until < func.now())
+                )
+            )
+            .order_by(ReplyJob.run_after)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return await self._lock(
+            ReplyJob.id.in_(due.scalar_subquery()), lease=lease
+        )
+
+    async def claim_one(self, job_id: str, lease: float) -> Model | None:
+        jobs = await self._lock(
+            ReplyJob.id == job_id,
+            ReplyJob.status == JobStatusEnum.pending,
+            lease=lease,
+        )
+        return jobs[0] if jobs else None
+
+    async def _lock(self, *clauses, lease: float) -> list[Model]:
+        query = (
+            update(ReplyJob)
+            .where(*clauses)
+            .values(
+                status=JobStatusEnum.running,
+                attempts=ReplyJob.attempts + 1,
+                locked_until=seconds_from_now(lease),
+            )
+            .returning(ReplyJob)
+            .execution_options(synchronize_session=False)
+        )
+        return list((await self._execute(query)).scalars().all())
+
+    async def complete(self, job_id: str) -> None:
+        await self._execute(delete(ReplyJob).where(ReplyJob.id == job_id))
+
+    async def retry(self, job_id: str, error: str, delay: float) -> None:
+        await self._update(
+            ReplyJob.id == job_id,
+            status=JobStatusEnum.pending,
+            run_after=seconds_from_now(delay),
+            locked_until=None,
+            last_error=error,
+        )
+
+    async def postpone(self, job_id: str, error: str, delay: float) -> None:
+        """
+        Puts the job back without counting the attempt it was claimed for
+        """
+        await self._update(
+            ReplyJob.id == job_id,
+            status=JobStatusEnum.pending,
+            attempts=ReplyJob.attempts - 1,
+            run_after=seconds_from_now(delay),
+            locked_until=None,
+            last_error=error,
+        )
+
+    async def fail(self, job_id: str, error: str) -> None:
+        await self._update(
+            ReplyJob.id == job_id,
+            status=JobStatusEnum.failed,
+            locked_until=None,
+            last_error=error,
+        )
+
+    async def depth(self) -> dict[str, int]:
+        query = select(ReplyJob.status, func.count()).group_by(ReplyJob.status)
+        counts = {status.value: 0 for status in JobStatusEnum}
+        for status, count in (await self._execute(query)).all():
+            counts[JobStatusEnum(status).value] = count
+        return counts
@@ -1,12 +1,12 @@
+from typing import Any
+
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 
 from faqmy_backend.db.exceptions import DatabaseError
 from faqmy_backend.db.models.conversations import Conversation, Message
 from faqmy_backend.db.models.stack import Stack
-from faqmy_backend.db.repositories.base import BaseRepository, Model
-
-not_set = object()
+from faqmy_backend.db.repositories.base import BaseRepository, Model, not_set
 
 
 class StackRepository(BaseRepository[Stack]):
@@ -55,7 +55,7 @@ class StackRepository(BaseRepository[Stack]):
             select(Stack)
             .join(Conversation)
             .join(Message)
-            .filter(Message.id == id)
+            .filter(Message.id == id, *Message.created_near(id))
         )
         res = await self._execute(query)
         return res.scalar()
@@ -70,25 +70,33 @@ class StackRepository(BaseRepository[Stack]):
         initial_question: str | None = not_set,
         widget_delay: int | None = not_set,
         color: str | None = not_set,
-    ) -> None:
-        stack = await self.get_by_id(stack_id)
+    ) -> Model | None:
+        return await self._patch(
+            Stack.id == stack_id,
+            user_id=user_id,
+            name=name,
+            description=description,
+            initial_question=initial_question,
+            widget_delay=widget_delay,
+            color=color,
+        )
+
+    async def update_owned(
+        self, stack_id: str, user_id: str, **values: Any
+    ) -> Model | None:
+        """
+        Updates the user's stack, returns None if there's no such stack
+        """
+        return await self._patch(
+            Stack.id == stack_id, Stack.user_id == user_id, **values
+        )
 
-        values = {}
-        fields = [
-            "user_id",
-            "name",
-            "description",
-            "initial_question",
-            "widget_delay",
-            "color",
-        ]
-        for field in fields:
-            current_value = getattr(stack, field)
-            new_value = locals()[field]
-            if current_value != new_value and new_value is not not_set:
-                values[field] = new_value
-        if values:
-            await self._update(Stack.id == stack.id, **values)
+    async def delete_owned(self, stack_id: str, user_id: str) -> bool:
+        return (
+            await self._delete_one(
+                Stack.id == stack_id, Stack.user_id == user_id
+            )
+        ) is not None
 
     async def delete(self, stack_id: str) -> None:
         try:
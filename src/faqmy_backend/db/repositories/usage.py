@@ -0,0 +1,94 @@
+import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from faqmy_backend.db.models.conversations import (
+    Conversation,
+    Message,
+    MessageTypeEnum,
+)
+from faqmy_backend.db.models.stack import Stack
+from faqmy_backend.db.models.usage import UsageCounter
+from faqmy_backend.db.repositories.base import BaseRepository
+
+# Keeps a multi-row INSERT well below the 32767 bind parameters limit
+UPSERT_BATCH_SIZE = 1000
+
+
+def hour_of(at: datetime.datetime) -> datetime.datetime:
+    return at.astimezone(datetime.UTC).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+
+class UsageRepository(BaseRepository[UsageCounter]):
+    model = UsageCounter
+
+    async def count_message(self, conversation_id: str) -> None:
+        """
+        Adds a visitor's message to the current hour of the stack owner
+        """
+        owner = (
+            select(Stack.user_id)
+            .join(Conversation)
+            .where(Conversation.id == conversation_id)
+            .scalar_subquery()
+        )
+        query = insert(UsageCounter).values(
+            user_id=owner,
+            hour=hour_of(datetime.datetime.now(datetime.UTC)),
+            messages=1,
+        )
+        await self._execute(
+            query.on_conflict_do_update(
+                constraint="uq_usage_counters_user_id_hour",
+                set_={"messages": UsageCounter.messages + 1},
+            )
+        )
+
+    async def count_since(self, user_id: str, start: datetime.datetime) -> int:
+        """
+        Messages written to the user's stacks since the hour of `start`
+        """
+        query = select(
+            func.coalesce(func.sum(UsageCounter.messages), 0)
+        ).where(
+            UsageCounter.user_id == user_id,
+            UsageCounter.hour >= hour_of(start),
+        )
+        return (await self._execute(query, replica=True)).scalar_one()
+
+    async def reconcile(self, since: datetime.datetime) -> int:
+        """
+        Recounts the messages since the hour of `since` and raises the
+        counters which are behind, returns how many were raised or added
+        """
+        hour = func.date_trunc("hour", Message.created_at, "UTC")
+        query = (
+            select(Stack.user_id, hour, func.count())
+            .select_from(Message)
+            .join(Conversation)
+            .join(Stack)
+            .where(
+                Message.who == MessageTypeEnum.user,
+                Message.created_at >= hour_of(since),
+            )
+            .group_by(Stack.user_id, hour)
+        )
+        counts = [
+            {"user_id": user_id, "hour": at, "messages": messages}
+            for user_id, at, messages in await self._execute(query)
+        ]
+        raised = 0
+        for start in range(0, len(counts), UPSERT_BATCH_SIZE):
+            upsert = insert(UsageCounter).values(
+                counts[start : start + UPSERT_BATCH_SIZE]
+            )
+            upsert = upsert.on_conflict_do_update(
+                constraint="uq_usage_counters_user_id_hour",
+                set_={"messages": upsert.excluded.messages},
+                where=UsageCounter.messages < upsert.excluded.messages,
+            ).returning(UsageCounter.id)
+            raised += len((await self._execute(upsert)).all())
+        return raised
@@ -1,4 +1,9 @@
+import base64
+import datetime
 import re
+import secrets
+import threading
+import time
 
 from yarl import URL
 
@@ -12,3 +17,110 @@ def normalize_pg_url(url: str, asynchronous: bool = False) -> str:
     if asynchronous:
         url = URL(url).with_scheme("postgresql+asyncpg").human_repr()
     return url
+
+
+def plain_pg_url(url: str) -> str:
+    """
+    The URL without a SQLAlchemy driver, as libpq and asyncpg take it
+    """
+    return URL(url).with_scheme("postgresql").human_repr()
+
+
+def encode_cursor(created_at: datetime.datetime, id: str) -> str:
+    """
+    Packs a row's position in the (created_at, id) order into an opaque
+    string to be passed back by clients
+    """
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, str]:
+    """
+    Unpacks `encode_cursor`, raises ValueError if the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = raw.decode().split("|", 1)
+        key = datetime.datetime.fromisoformat(created_at), id
+    except ValueError:  # covers binascii and unicode errors too
+        raise ValueError(f"Malformed cursor {cursor!r}")
+    if key[0].tzinfo is None or not id:
+        raise ValueError(f"Malformed cursor {cursor!r}")
+    return key
+
+
+class UlidGenerator:
+    """
+    Generates ULIDs: 48 bits of milliseconds since the epoch followed by 80
+    random bits, written as 26 Crockford's base32 characters.
+
+    The ids sort in the order they were generated, so new rows land on the
+    rightmost B-tree pages. Within the same millisecond the random part is
+    incremented, which keeps the order monotonic even if the clock goes back.
+    """
+
+    ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+    LENGTH = 26
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._last_random = 0
+
+    def __call__(self) -> str:
+        ms = time.time_ns() // 1_000_000
+        with self._lock:
+            if ms > self._last_ms:
+                random_part = secrets.randbits(80)
+            else:
+                ms = self._last_ms
+                random_part = self._last_random + 1
+                if random_part >> 80:  # the millisecond ran out of ids
+                    ms += 1
+                    random_part = secrets.randbits(80)
+            self._last_ms, self._last_random = ms, random_part
+        return self.encode(ms << 80 | random_part)
+
+    @classmethod
+    def encode(cls, value: int) -> str:
+        chars = []
+        for _ in range(cls.LENGTH):
+            chars.append(cls.ALPHABET[value & 31])
+            value >>= 5
+        return "".join(reversed(chars))
+
+    @classmethod
+    def timestamp_ms(cls, value: str) -> int:
+        """
+        Extracts the generation time in milliseconds from the id
+        """
+        return (
+            int(
+                "".join(
+                    f"{cls.ALPHABET.index(c):05b}"
+                    for c in value[-cls.LENGTH :]
+                ),
+                2,
+            )
+            >> 80
+        )
+
+
+ulid = UlidGenerator()
+
+
+def ulid_time(value: str) -> datetime.datetime | None:
+    """
+    When a ULID, bare or prefixed as our ids are, was generated. None for
+    ids of other kinds, like the shortuuid ones of older rows
+    """
+    suffix = value.rsplit("_", 1)[-1]
+    if len(suffix) != UlidGenerator.LENGTH:
+        return None
+    try:
+        return datetime.datetime.fromtimestamp(
+            UlidGenerator.timestamp_ms(suffix) / 1000, datetime.UTC
+        )
+    except (ValueError, OverflowError, OSError):
+        return None
@@ -0,0 +1,104 @@
+"""
+A stand-in for the bot service to run the backend against locally.
+
+It serves the endpoints `BotSDK` calls with made-up content, answering
+after a random delay and failing at the configured rates.
+"""
+import asyncio
+import dataclasses
+import random
+import uuid
+
+from fastapi import APIRouter, FastAPI, File, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+
+@dataclasses.dataclass
+class FakeBotConfig:
+    # Median latency, in seconds
+    latency: float = 0.3
+    # Spread of the log-normal latency distribution, 0 makes it constant
+    latency_sigma: float = 0.5
+    # Share of requests failing with 503
+    error_rate: float = 0.0
+    # Share of requests hanging for `hang_time` before being answered
+    hang_rate: float = 0.0
+    hang_time: float = 120
+    # How many documents a scan or an upload yields
+    documents: int = 20
+
+
+def build_fakebot(config: FakeBotConfig) -> FastAPI:
+    app = FastAPI(title="Fake bot service")
+    router = APIRouter()
+    documents: dict[str, dict] = {}
+
+    def make_documents(source: str) -> list[dict]:
+        return [
+            {
+                "id": str(uuid.uuid4()),
+                "name": f"{source} #{i}",
+                "content": f"Q: What is {i} in {source}?\nA: It's {i}.",
+            }
+            for i in range(config.documents)
+        ]
+
+    @app.middleware("http")
+    async def simulate_conditions(request: Request, call_next):
+        if random.random() < config.hang_rate:
+            await asyncio.sleep(config.hang_time)
+        else:
+            await asyncio.sleep(
+                random.lognormvariate(0, config.latency_sigma) * config.latency
+            )
+        if random.random() < config.error_rate:
+            return PlainTextResponse("Simulated failure", status_code=503)
+        return await call_next(request)
+
+    @router.post("/documents")
+    async def create_document(request: Request):
+        doc = await request.json()
+        doc_id = str(uuid.uuid4())
+        documents[doc_id] = {
+            "id": doc_id,
+            "content": doc.get("content"),
+            "meta": {"name": doc.get("name")},
+        }
+        return {"id": doc_id}
+
+    @router.post("/documents/ask")
+    async def ask(request: Request):
+        question = (await request.json())["question"]
+        return f"This is a made-up answer to {question!r}"
+
+    @router.post("/documents/scan")
+    async def scan(request: Request):
+        return make_documents((await request.json())["url"])
+
+    @router.get("/documents/{doc_id}")
+    async def get_document(doc_id: str):
+        if doc_id not in documents:
+            return JSONResponse({"error": "Document not found"}, 404)
+        return documents[doc_id]
+
+    @router.get("/documents/{doc_id}/delete")
+    async def delete_document(doc_id: str):
+        documents.pop(doc_id, None)
+        return {"status": "document deleted"}
+
+    @router.post("/upload")
+    async def upload(file: UploadFile = File()):
+        while await file.read(1024 * 1024):
+            pass
+        return make_documents(file.filename or "upload")
+
+    app.include_router(router, prefix="/i/{index}")
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "documents": len(documents),
+            "config": dataclasses.asdict(config),
+        }
+
+    return app
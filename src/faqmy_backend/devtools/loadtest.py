@@ -0,0 +1,156 @@
+"""
+Drives the widget flow against a running backend and reports latencies.
+
+Every virtual user opens the stack, starts a conversation and posts
+messages one by one, polling for the bot reply to each of them.
+"""
+import asyncio
+import collections
+import dataclasses
+import math
+import time
+
+import httpx
+
+
+@dataclasses.dataclass
+class LoadTestConfig:
+    base_url: str
+    stack_id: str
+    users: int = 10
+    messages: int = 5
+    poll_interval: float = 0.5
+    reply_timeout: float = 60
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = collections.defaultdict(list)
+        self.errors: collections.Counter[str] = collections.Counter()
+
+    async def timed(self, step: str, coro):
+        started = time.perf_counter()
+        try:
+            result = await coro
+        except Exception:
+            self.errors[step] += 1
+            raise
+        self.latencies[step].append(time.perf_counter() - started)
+        return result
+
+
+def percentile(values: list[float], share: float) -> float:
+    """
+    Nearest-rank percentile of sorted values
+    """
+    if not values:
+        return math.nan
+    return values[max(0, math.ceil(share * len(values)) - 1)]
+
+
+async def wait_reply(
+    client: httpx.AsyncClient,
+    conversation: dict,
+    sent: dict,
+    config: LoadTestConfig,
+) -> dict:
+    """
+    Polls the messages written after the sent one, as the widget does, so
+    the reply is found however long the conversation is
+    """
+    deadline = time.monotonic() + config.reply_timeout
+    while time.monotonic() < deadline:
+        resp = await client.get(
+            "/v1/client/messages",
+            params={
+                "conversation_id": conversation["id"],
+                "password": conversation["password"],
+                "since": sent["cursor"],
+            },
+        )
+        resp.raise_for_status()
+        for message in resp.json():
+            if message["parent_id"] == sent["id"]:
+                return message
+        await asyncio.sleep(config.poll_interval)
+    raise TimeoutError(f"No reply to {sent['id']}")
+
+
+async def virtual_user(
+    client: httpx.AsyncClient, config: LoadTestConfig, recorder: Recorder
+) -> None:
+    async def call(method: str, url: str, **kwargs) -> dict:
+        resp = await client.request(method, url, **kwargs)
+        resp.raise_for_status()
+        return resp.json()
+
+    try:
+        await recorder.timed(
+            "stack", call("GET", f"/v1/client/stacks/{config.stack_id}")
+        )
+        conversation = await recorder.timed(
+            "conversation",
+            call(
+                "POST",
+                "/v1/client/conversations",
+                json={"stack_id": config.stack_id},
+            ),
+        )
+        for i in range(config.messages):
+            message = await recorder.timed(
+                "message",
+                call(
+                    "POST",
+                    "/v1/client/messages",
+                    json={
+                        "conversation_id": conversation["id"],
+                        "text": f"Load test question #{i}",
+                    },
+                ),
+            )
+            await recorder.timed(
+                "reply",
+                wait_reply(client, conversation, message, config),
+            )
+    except Exception:
+        pass  # counted by the recorder, the user gives up
+
+
+async def run(config: LoadTestConfig) -> Recorder:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=config.users)
+    async with httpx.AsyncClient(
+        base_url=config.base_url, limits=limits, timeout=config.reply_timeout
+    ) as client:
+        await asyncio.gather(
+            *(
+                virtual_user(client, config, recorder)
+                for _ in range(config.users)
+            )
+        )
+    return recorder
+
+
+def report(recorder: Recorder, elapsed: float) -> str:
+    lines = [
+        f"{'step':<14}{'ok':>7}{'errors':>8}{'rps':>9}"
+        f"{'p50, ms':>10}{'p95, ms':>10}{'p99, ms':>10}"
+    ]
+    for step in ("stack", "conversation", "message", "reply"):
+        values = sorted(recorder.latencies[step])
+        lines.append(
+            f"{step:<14}{len(values):>7}{recorder.errors[step]:>8}"
+            f"{len(values) / elapsed:>9.1f}"
+            + "".join(
+                f"{percentile(values, share) * 1000:>10.0f}"
+                for share in (0.5, 0.95, 0.99)
+            )
+        )
+    lines.append(f"Elapsed {elapsed:.1f}s")
+    return "\n".join(lines)
+
+
+async def main(config: LoadTestConfig) -> None:
+    started = time.perf_counter()
+    recorder = await run(config)
+    print(report(recorder, time.perf_counter() - started))
@@ -0,0 +1,265 @@
+import asyncio
+import collections
+import datetime
+import io
+import logging
+import time
+from typing import Any, Callable
+
+import httpx
+from async_stripe import stripe
+from async_stripe.http_client import TornadoAsyncHTTPClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from faqmy_backend.conf import StripeSettings, settings
+from faqmy_backend.db.repositories.billing import (
+    StripeCustomerRepository,
+    StripeMirrorRepository,
+    StripeProductRepository,
+    StripeSubscriptionRepository,
+)
+from faqmy_backend.services import metrics
+
+logger = logging.getLogger(__name__)
+
+stripe_latency: dict[str, metrics.Histogram] = collections.defaultdict(
+    metrics.Histogram
+)
+stripe_errors: collections.Counter[str] = collections.Counter()
+
+
+def stripe_stats() -> dict[str, Any]:
+    return {
+        "latency": {op: hist.stats() for op, hist in stripe_latency.items()},
+        "errors": dict(stripe_errors),
+    }
+
+
+metrics.register("stripe", stripe_stats)
+
+
+def operation_of(method: str, url: str) -> str:
+    """
+    Names an API call by its method and resource, leaving out the ids:
+    "GET /v1/customers"
+    """
+    resource = "/".join(httpx.URL(url).path.split("/")[:3])
+    return f"{method.upper()} {resource}"
+
+
+class StripeHTTPClient(TornadoAsyncHTTPClient):
+    """
+    Sends the Stripe API calls through a pooled httpx client, each within
+    its deadline, recording their latency.
+
+    Derived from the async_stripe client, as its requestor replaces any
+    other client with a new Tornado one; retries are left to it as well.
+    """
+
+    name = "faqmy_httpx"
+
+    def __init__(self, config: StripeSettings, **kwargs):
+        # Skips the parent's Tornado client
+        super(TornadoAsyncHTTPClient, self).__init__(**kwargs)
+        self.config = config
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    self.config.timeout, connect=self.config.connect_timeout
+                ),
+                limits=httpx.Limits(
+                    max_connections=self.config.max_connections,
+                    max_keepalive_connections=(
+                        self.config.max_keepalive_connections
+                    ),
+                    keepalive_expiry=self.config.keepalive_expiry,
+                ),
+            )
+        return self._client
+
+    async def _request_internal(
+        self, method, url, headers, post_data, is_streaming
+    ):
+        operation = operation_of(method, url)
+        started = time.perf_counter()
+        try:
+            resp = await asyncio.wait_for(
+                self.client.request(
+                    method, url, headers=headers, content=post_data
+                ),
+                self.config.timeout,
+            )
+        except (httpx.HTTPError, TimeoutError) as ex:
+            stripe_errors[operation] += 1
+            self._handle_request_error(ex)
+        finally:
+            stripe_latency[operation].observe(time.perf_counter() - started)
+
+        content = resp.content
+        if is_streaming:
+            content = io.BytesIO(content)
+        return content, resp.status_code, dict(resp.headers)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+stripe.api_key = settings.stripe.key
+stripe.max_network_retries = settings.stripe.max_network_retries
+stripe.enable_telemetry = False
+
+http_client = StripeHTTPClient(settings.stripe)
+stripe.default_http_client = http_client
+
+# Stripe's maximum page size
+BACKFILL_PAGE_SIZE = 100
+
+
+def from_timestamp(value: int | None) -> datetime.datetime | None:
+    if value is None:
+        return None
+    return datetime.datetime.fromtimestamp(value, datetime.UTC)
+
+
+def to_timestamp(value: datetime.datetime | None) -> int | None:
+    if value is None:
+        return None
+    return int(value.timestamp())
+
+
+def customer_values(customer: dict) -> dict[str, Any]:
+    return {
+        "id": customer["id"],
+        "created_at": from_timestamp(customer["created"]),
+        "email": customer.get("email"),
+    }
+
+
+def subscription_values(subscription: dict) -> dict[str, Any]:
+    plan = subscription.get("plan") or {}
+    return {
+        "id": subscription["id"],
+        "created_at": from_timestamp(subscription["created"]),
+        "customer_id": subscription["customer"],
+        "status": subscription["status"],
+        "product_id": plan.get("product"),
+        "plan_id": plan.get("id"),
+        "plan_interval": plan.get("interval"),
+        "plan_interval_count": plan.get("interval_count"),
+        "plan_amount": plan.get("amount"),
+        "start_date": from_timestamp(subscription.get("start_date")),
+        "trial_start": from_timestamp(subscription.get("trial_start")),
+        "trial_end": from_timestamp(subscription.get("trial_end")),
+        "current_period_start": from_timestamp(
+            subscription.get("current_period_start")
+        ),
+        "current_period_end": from_timestamp(
+            subscription.get("current_period_end")
+        ),
+    }
+
+
+def product_values(product: dict) -> dict[str, Any]:
+    messages_count = (product.get("metadata") or {}).get("messages_count")
+    return {
+        "id": product["id"],
+        "created_at": from_timestamp(product["created"]),
+        "name": product.get("name"),
+        "active": product.get("active", True),
+        "messages_count": (
+            int(messages_count) if messages_count is not None else None
+        ),
+    }
+
+
+# The mirrored Stripe objects by their `object` field
+MIRRORS: dict[
+    str,
+    tuple[type[StripeMirrorRepository], Callable[[dict], dict[str, Any]]],
+] = {
+    "customer": (StripeCustomerRepository, customer_values),
+    "subscription": (StripeSubscriptionRepository, subscription_values),
+    "product": (StripeProductRepository, product_values),
+}
+
+
+async def apply_event(session: AsyncSession, event: dict) -> bool:
+    """
+    Writes the object of a Stripe webhook event into the mirror, returns
+    False if the event is of no interest or stale.
+
+    A deleted subscription is kept with its `canceled` status, deleted
+    customers and products are removed.
+    """
+    obj = event["data"]["object"]
+    if obj.get("object") not in MIRRORS:
+        return False
+    repo_class, values = MIRRORS[obj["object"]]
+    repo = repo_class(session)
+    synced_at = from_timestamp(event["created"])
+
+    if event["type"].endswith(".deleted") and obj["object"] != "subscription":
+        return await repo.remove(obj["id"], synced_at)
+    return await repo.upsert({**values(obj), "synced_at": synced_at})
+
+
+async def backfill(
+    session_factory: Callable[[], AsyncSession]
+) -> dict[str, int]:
+    """
+    Copies every customer, subscription and product from Stripe into the
+    mirror, returns how many objects of each kind were written.
+
+    Rows are stamped with the time the backfill started, so any webhook
+    event which came in meanwhile still wins. Each page is committed on its
+    own, and an interrupted backfill can simply be run again.
+    """
+    started_at = datetime.datetime.now(datetime.UTC)
+    listings = {
+        "customer": (stripe.Customer, {}),
+        "subscription": (stripe.Subscription, {"status": "all"}),
+        "product": (stripe.Product, {}),
+    }
+    written = {}
+    for kind, (resource, params) in listings.items():
+        repo_class, values = MIRRORS[kind]
+        written[kind] = 0
+        starting_after = None
+        while True:
+            page = await resource.list(
+                limit=BACKFILL_PAGE_SIZE,
+                starting_after=starting_after,
+                **params,
+            )
+            async with session_factory() as session:
+                repo = repo_class(session)
+                for obj in page["data"]:
+                    written[kind] += await repo.upsert(
+                        {**values(obj), "synced_at": started_at}
+                    )
+                await session.commit()
+            if not page["has_more"] or not page["data"]:
+                break
+            starting_after = page["data"][-1]["id"]
+    return written
+
+
+async def run() -> None:
+    from faqmy_backend.db.connection import create_primary_session
+
+    try:
+        written = await backfill(create_primary_session)
+    finally:
+        await http_client.aclose()
+    logger.info(
+        "Backfilled %d customers, %d subscriptions and %d products",
+        written["customer"],
+        written["subscription"],
+        written["product"],
+    )
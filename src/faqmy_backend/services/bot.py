@@ -1,3 +1,8 @@
+import asyncio
+import collections
+import contextlib
+import functools
+import time
 import typing
 
 import httpx
@@ -5,6 +10,15 @@ import pydantic
 from shortuuid import decode
 
 from faqmy_backend.conf import settings
+from faqmy_backend.services import metrics
+from faqmy_backend.services.cache import answer_cache
+from faqmy_backend.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    retry,
+)
+from faqmy_backend.services.singleflight import SingleFlight
+from faqmy_backend.services.streaming import MultipartFile, iter_json_array
 
 
 class Document(pydantic.BaseModel):
@@ -13,10 +27,111 @@ class Document(pydantic.BaseModel):
     content: str
 
 
+_http_client: httpx.AsyncClient | None = None
+
+inflight_asks: SingleFlight[str] = SingleFlight()
+metrics.register("inflight_asks", inflight_asks.stats)
+
+bot_breaker = CircuitBreaker(
+    "bot",
+    failure_threshold=settings.bot.breaker_failure_threshold,
+    recovery_time=settings.bot.breaker_recovery_time,
+)
+bot_latency: dict[str, metrics.Histogram] = collections.defaultdict(
+    metrics.Histogram
+)
+bot_errors: collections.Counter[str] = collections.Counter()
+
+
+def bot_stats() -> dict[str, typing.Any]:
+    return {
+        "breaker": bot_breaker.stats(),
+        "latency": {op: hist.stats() for op, hist in bot_latency.items()},
+        "errors": dict(bot_errors),
+    }
+
+
+metrics.register("bot", bot_stats)
+
+
+def is_unavailable(ex: BaseException) -> bool:
+    """
+    Tells errors of an unhealthy bot service from the ones of a bad request
+    """
+    if isinstance(ex, httpx.HTTPStatusError):
+        return ex.response.status_code >= 500
+    return isinstance(ex, (httpx.TransportError, TimeoutError))
+
+
+@contextlib.asynccontextmanager
+async def guarded(operation: str) -> typing.AsyncIterator[None]:
+    """
+    Runs a bot operation through the circuit breaker, recording its latency
+    """
+    bot_breaker.before()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as ex:
+        bot_errors[operation] += 1
+        if is_unavailable(ex):
+            bot_breaker.failure()
+        elif isinstance(ex, httpx.HTTPStatusError):
+            bot_breaker.success()
+        else:
+            bot_breaker.release()
+        raise
+    except BaseException:
+        bot_breaker.release()
+        raise
+    else:
+        bot_breaker.success()
+    finally:
+        bot_latency[operation].observe(time.perf_counter() - started)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=settings.bot.timeout,
+        limits=httpx.Limits(
+            max_connections=settings.bot.max_connections,
+            max_keepalive_connections=settings.bot.max_keepalive_connections,
+            keepalive_expiry=settings.bot.keepalive_expiry,
+        ),
+        http2=settings.bot.http2,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide keep-alive client shared by every BotSDK.
+
+    It's created on the application startup, but code running outside of
+    the application lifespan (scripts, tests) gets a lazily created one.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
 class BotSDK:
-    def __init__(self, index_name: str):
+    def __init__(
+        self, index_name: str, client: httpx.AsyncClient | None = None
+    ):
         self.index_name = index_name
-        self._client = httpx.AsyncClient(timeout=60)
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_http_client()
 
     @property
     def upload_url(self) -> str:
@@ -38,16 +153,53 @@ class BotSDK:
     def index_url_prefix(self) -> str:
         return f"{settings.bot.url.rstrip('/')}/i/{self.index_uuid}"
 
+    async def request(
+        self,
+        operation: str,
+        method: str,
+        url: str,
+        idempotent: bool = False,
+        **kwargs,
+    ) -> typing.Any:
+        """
+        Makes a request within the operation's deadline, retrying it on
+        the bot's unavailability when it's safe to repeat
+        """
+        timeout = getattr(settings.bot, f"{operation}_timeout")
+
+        async def attempt():
+            async with guarded(operation):
+                resp = await asyncio.wait_for(
+                    self.client.request(method, url, **kwargs), timeout
+                )
+                resp.raise_for_status()
+                return resp.json()
+
+        if not idempotent:
+            return await attempt()
+        return await retry(
+            attempt,
+            attempts=settings.bot.retries + 1,
+            should_retry=is_unavailable,
+            backoff_base=settings.bot.retry_backoff_base,
+            backoff_max=settings.bot.retry_backoff_max,
+        )
+
     async def make_query(
-        self, method: str, suffix: str = "", params: dict | None = None
+        self,
+        method: str,
+        suffix: str = "",
+        params: dict | None = None,
+        operation: str = "documents",
+        idempotent: bool = False,
     ) -> dict:
-        async with httpx.AsyncClient(timeout=60) as client:
-            url = self.url_prefix + suffix
-            kwargs = {}
-            if params:
-                kwargs.update(json=params)
-            resp = await getattr(client, method.lower())(url, **kwargs)
-            return resp.json()
+        url = self.url_prefix + suffix
+        kwargs = {}
+        if params:
+            kwargs.update(json=params)
+        return await self.request(
+            operation, method, url, idempotent=idempotent, **kwargs
+        )
 
     async def post_json(
         self, url: str | None = None, params: dict[str, str] | None = None
@@ -57,44 +209,144 @@ class BotSDK:
     async def ask(self, question: str) -> str:
         return str(
             await self.make_query(
-                "post", "/ask", params={"question": question}
+                "post",
+                "/ask",
+                params={"question": question},
+                operation="ask",
+                idempotent=True,
             )
         )
 
+    async def answer(self, question: str, generation: int = 0) -> str:
+        """
+        Same as `ask`, but repeated questions are served from the answer
+        cache as long as the stack's cards generation stays the same, and
+        identical questions asked at the same time share one bot request
+        """
+        answer = answer_cache.get(self.index_name, generation, question)
+        if answer is not None:
+            return answer
+
+        # The fallback answer isn't cached, the real one comes back as
+        # soon as the bot service recovers
+        if settings.bot.fallback_answer is not None:
+            try:
+                bot_breaker.before()
+            except CircuitOpenError:
+                return settings.bot.fallback_answer
+            bot_breaker.release()
+
+        async def ask_and_cache() -> str:
+            result = await self.ask(question)
+            answer_cache.set(self.index_name, generation, question, result)
+            return result
+
+        key = answer_cache.make_key(self.index_name, generation, question)
+        return await inflight_asks.do(key, ask_and_cache)
+
     async def scan(self, url: str) -> list[Document]:
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post(self.scrape_url, json={"url": url})
-            return self.parse_cards(resp.json())
-
-    async def upload(self, uploaded_file) -> list[Document]:
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post(
-                url=self.upload_url,
-                files={
-                    "file": (
-                        uploaded_file.filename,
-                        await uploaded_file.read(),
-                        uploaded_file.content_type,
-                    )
-                },
-            )
-            return self.parse_cards(resp.json())
+        return [doc async for doc in self.scan_iter(url)]
 
-    def parse_cards(self, list_of_docs) -> list[Document]:
+    async def scan_iter(self, url: str) -> typing.AsyncIterator[Document]:
+        async with guarded("scan"), self.client.stream(
+            "POST",
+            self.scrape_url,
+            json={"url": url},
+            timeout=settings.bot.scan_timeout,
+        ) as resp:
+            resp.raise_for_status()
+            async for doc in self.iter_cards(resp):
+                yield doc
+
+    async def upload(
+        self,
+        filename: str | None,
+        file: typing.BinaryIO,
+        content_type: str | None = None,
+    ) -> list[Document]:
         return [
-            Document(id=row["id"], name=row["name"], content=row["content"])
-            for row in list_of_docs
+            doc async for doc in self.upload_iter(filename, file, content_type)
         ]
 
+    async def upload_iter(
+        self,
+        filename: str | None,
+        file: typing.BinaryIO,
+        content_type: str | None = None,
+    ) -> typing.AsyncIterator[Document]:
+        """
+        Sends the file chunk by chunk and yields documents as the bot's
+        response arrives, so neither side is held in memory as a whole
+        """
+        body = MultipartFile("file", filename, file, content_type)
+        async with guarded("upload"), self.client.stream(
+            "POST",
+            self.upload_url,
+            content=body,
+            headers=body.headers,
+            timeout=settings.bot.upload_timeout,
+        ) as resp:
+            resp.raise_for_status()
+            async for doc in self.iter_cards(resp):
+                yield doc
+
+    async def iter_cards(
+        self, resp: httpx.Response
+    ) -> typing.AsyncIterator[Document]:
+        async for row in iter_json_array(resp.aiter_text()):
+            yield self.parse_card(row)
+
+    def parse_cards(self, list_of_docs) -> list[Document]:
+        return [self.parse_card(row) for row in list_of_docs]
+
+    def parse_card(self, row: dict) -> Document:
+        return Document(id=row["id"], name=row["name"], content=row["content"])
+
     async def create_document(self, name: str, content: str) -> str:
         return (
             await self.post_json(params={"name": name, "content": content})
         )["id"]
 
+    async def create_documents(
+        self, documents: typing.Sequence[tuple[str | None, str]]
+    ) -> list[str | BaseException]:
+        """
+        Creates documents out of (name, content) pairs. The bot has no batch
+        endpoint, so requests run concurrently up to `batch_concurrency`.
+        Failed documents get their exception in place of the id.
+        """
+        return await self._gather_bounded(
+            functools.partial(self.create_document, name, content)
+            for name, content in documents
+        )
+
+    async def delete_documents(
+        self, doc_ids: typing.Sequence[str]
+    ) -> list[typing.Any | BaseException]:
+        return await self._gather_bounded(
+            functools.partial(self.delete_document, doc_id)
+            for doc_id in doc_ids
+        )
+
+    async def _gather_bounded(
+        self, calls: typing.Iterable[typing.Callable[[], typing.Awaitable]]
+    ) -> list:
+        semaphore = asyncio.Semaphore(settings.bot.batch_concurrency)
+
+        async def run(call):
+            async with semaphore:
+                return await call()
+
+        return await asyncio.gather(
+            *(run(call) for call in calls), return_exceptions=True
+        )
+
     async def delete_document(self, doc_id: str):
         return await self.make_query(
-            "get", suffix="/" + str(doc_id) + "/delete"
+            "get", suffix="/" + str(doc_id) + "/delete", idempotent=True
         )
 
     async def get_document(self, doc_id: str):
-        return await self.make_query("get", suffix="/" + str(doc_id))
+        return await self.make_query(
+            "get", suffix="/" + str(doc_id), idempotent=True
+        )
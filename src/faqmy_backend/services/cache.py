@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+
+from faqmy_backend.conf import settings
+from faqmy_backend.db.repositories.cards import CardRepository
+from faqmy_backend.services import metrics
+
+CacheKey = tuple[str, int, str]
+
+
+def normalize_question(question: str) -> str:
+    """
+    Makes trivially different spellings of a question share a cache entry
+    """
+    return " ".join(question.casefold().split()).rstrip("?!. ")
+
+
+class AnswerCache:
+    """
+    Bounded LRU cache of bot answers with a time-to-live for every entry.
+
+    Entries are keyed on the stack id, the stack's cards generation and the
+    normalized question, so bumping the generation makes every answer given
+    before the cards changed unreachable.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[CacheKey, tuple[float, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(stack_id: str, generation: int, question: str) -> CacheKey:
+        return stack_id, generation, normalize_question(question)
+
+    def get(self, stack_id: str, generation: int, question: str) -> str | None:
+        key = self.make_key(stack_id, generation, question)
+        entry = self._entries.get(key)
+
+        if entry is not None and entry[0] < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(
+        self, stack_id: str, generation: int, question: str, answer: str
+    ) -> None:
+        if self.max_size <= 0:
+            return
+        key = self.make_key(stack_id, generation, question)
+        self._entries[key] = (time.monotonic() + self.ttl, answer)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, stack_id: str) -> None:
+        """
+        Drops every answer of the stack right away instead of waiting for
+        the outdated generations to fall out of the LRU
+        """
+        for key in [k for k in self._entries if k[0] == stack_id]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+answer_cache = AnswerCache(
+    max_size=settings.bot.answer_cache_size,
+    ttl=settings.bot.answer_cache_ttl,
+)
+metrics.register("answer_cache", answer_cache.stats)
+
+
+async def cards_changed(card_repo: CardRepository, stack_id: str) -> None:
+    """
+    Makes the answers cached for the stack stale.
+
+    Call it once the bot has got the card changes, otherwise an answer built
+    on the old documents may be cached for the new generation.
+    """
+    await card_repo.bump_generation(stack_id)
+    answer_cache.invalidate(stack_id)
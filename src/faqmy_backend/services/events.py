@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import asyncpg
+
+from faqmy_backend.services import metrics
+from faqmy_backend.services.resilience import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Delays between the attempts to reconnect the listener, seconds
+RECONNECT_BACKOFF_BASE = 0.5
+RECONNECT_BACKOFF_MAX = 30
+
+
+class MessageEvents:
+    """
+    Fans new messages out to the widgets listening to their conversation.
+
+    Every web process keeps one LISTEN connection to PostgreSQL, so a reply
+    written by any process (or by a separate worker) reaches subscribers
+    connected to any other one. Until the listener is started, events are
+    only dispatched inside the current process. A dropped listener is
+    reconnected in the background, meanwhile events stay process-local.
+    """
+
+    channel = "faqmy_messages"
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._connection: asyncpg.Connection | None = None
+        self._dsn: str | None = None
+        self._reconnecting: asyncio.Task | None = None
+        # asyncpg connections don't allow concurrent operations
+        self._lock = asyncio.Lock()
+        self._warned = False
+        self.dropped = 0
+        self.reconnects = 0
+        self.local_fallbacks = 0
+
+    @property
+    def listening(self) -> bool:
+        connection = self._connection
+        return connection is not None and not connection.is_closed()
+
+    async def start(self, dsn: str) -> None:
+        self._dsn = dsn
+        if not await self._connect():
+            self._reconnect()
+
+    async def stop(self) -> None:
+        self._dsn = None
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+            self._reconnecting = None
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            await connection.close()
+
+    async def publish(self, conversation_id: str, message_id: str) -> None:
+        """
+        Announces a committed message to every subscriber of its conversation
+        """
+        if self.listening:
+            payload = json.dumps({"c": conversation_id, "m": message_id})
+            try:
+                async with self._lock:
+                    await self._connection.execute(
+                        "SELECT pg_notify($1, $2)", self.channel, payload
+                    )
+                return
+            except (OSError, asyncpg.PostgresError) as ex:
+                logger.warning("Failed to notify of a message: %s", ex)
+        if self._dsn is not None:
+            self._fall_back()
+        self.dispatch(conversation_id, message_id)
+
+    def dispatch(self, conversation_id: str, message_id: str) -> None:
+        for queue in self._subscribers.get(conversation_id, ()):
+            try:
+                queue.put_nowait(message_id)
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+    @asynccontextmanager
+    async def subscribe(
+        self, conversation_id: str
+    ) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue[str] = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(conversation_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers[conversation_id]
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[conversation_id]
+
+    async def _connect(self) -> bool:
+        try:
+            connection = await asyncpg.connect(self._dsn)
+            await connection.add_listener(self.channel, self._on_notify)
+        except (OSError, asyncpg.PostgresError) as ex:
+            logger.warning("Message events stay process-local: %s", ex)
+            return False
+        connection.add_termination_listener(self._on_terminate)
+        self._connection = connection
+        self._warned = False
+        return True
+
+    def _reconnect(self) -> None:
+        if self._reconnecting is None or self._reconnecting.done():
+            self._reconnecting = asyncio.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self) -> None:
+        attempt = 0
+        while self._dsn is not None and not self.listening:
+            await asyncio.sleep(
+                backoff_delay(
+                    attempt, RECONNECT_BACKOFF_BASE, RECONNECT_BACKOFF_MAX
+                )
+            )
+            attempt += 1
+            if self._dsn is not None and await self._connect():
+                self.reconnects += 1
+                logger.info("Message events listener reconnected")
+
+    def _fall_back(self) -> None:
+        self.local_fallbacks += 1
+        if not self._warned:
+            logger.error(
+                "Message events listener is down, events of other "
+                "processes don't reach this one's subscribers"
+            )
+            self._warned = True
+        self._reconnect()
+
+    def _on_terminate(self, connection) -> None:
+        if connection is not self._connection or self._dsn is None:
+            return
+        logger.warning("Message events listener connection was lost")
+        self._connection = None
+        self._reconnect()
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        event = json.loads(payload)
+        self.dispatch(event["c"], event["m"])
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "listening": self.listening,
+            "conversations": len(self._subscribers),
+            "subscribers": sum(map(len, self._subscribers.values())),
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+            "local_fallbacks": self.local_fallbacks,
+        }
+
+
+message_events = MessageEvents()
+metrics.register("message_events", message_events.stats)
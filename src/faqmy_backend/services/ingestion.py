@@ -0,0 +1,175 @@
+import logging
+import pathlib
+import shutil
+from typing import Any, AsyncIterator, Callable, Sequence
+
+import shortuuid
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from faqmy_backend.conf import IngestionSettings, settings
+from faqmy_backend.db.connection import create_primary_session
+from faqmy_backend.db.exceptions import DatabaseError
+from faqmy_backend.db.models.jobs import IngestionJob, IngestionKindEnum
+from faqmy_backend.db.repositories.cards import CardRepository
+from faqmy_backend.db.repositories.ingestion_job import IngestionJobRepository
+from faqmy_backend.services import metrics
+from faqmy_backend.services.bot import BotSDK, Document
+from faqmy_backend.services.cache import cards_changed
+from faqmy_backend.services.jobs import JobWorker
+
+logger = logging.getLogger(__name__)
+
+# How many cards are written between two progress updates
+PROGRESS_BATCH_SIZE = 500
+
+
+async def save_upload(upload: UploadFile) -> str:
+    """
+    Stores the uploaded file for the ingestion worker, returns its path
+    """
+    directory = pathlib.Path(settings.ingestion.upload_dir)
+    path = directory / shortuuid.uuid()
+
+    def copy():
+        directory.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as fp:
+            shutil.copyfileobj(upload.file, fp, 1024 * 1024)
+
+    await run_in_threadpool(copy)
+    return str(path)
+
+
+def remove_upload(job: IngestionJob) -> None:
+    if job.kind == IngestionKindEnum.upload:
+        pathlib.Path(job.source).unlink(missing_ok=True)
+
+
+async def fetch_documents(job: IngestionJob) -> AsyncIterator[Document]:
+    bot_sdk = BotSDK(job.stack_id)
+    if job.kind == IngestionKindEnum.upload:
+        with open(job.source, "rb") as fp:
+            async for doc in bot_sdk.upload_iter(
+                job.filename, fp, job.content_type
+            ):
+                yield doc
+    else:
+        async for doc in bot_sdk.scan_iter(job.source):
+            yield doc
+
+
+async def batched(
+    items: AsyncIterator[Document], size: int
+) -> AsyncIterator[list[Document]]:
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def ingest(
+    session: AsyncSession, job: IngestionJob, lease: float
+) -> None:
+    """
+    Writes cards while the bot is still parsing the source, so the job
+    progress moves and memory stays flat however large the source is.
+    Every batch renews the job's lease for `lease` seconds.
+    """
+    job_repo = IngestionJobRepository(session)
+    card_repo = CardRepository(session)
+
+    async for batch in batched(fetch_documents(job), PROGRESS_BATCH_SIZE):
+        try:
+            written = len(await card_repo.create_many(job.stack_id, batch))
+        except DatabaseError:
+            logger.exception("Failed to write cards of job %s", job.id)
+            written = 0
+        await job_repo.add_progress(
+            job.id,
+            documents_parsed=len(batch),
+            cards_written=written,
+            failures=len(batch) - written,
+            lease=lease,
+        )
+
+    await cards_changed(card_repo, job.stack_id)
+
+
+class IngestionWorker(JobWorker[IngestionJob]):
+    """
+    Turns uploaded files and scanned URLs into learned cards
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        config: IngestionSettings,
+    ):
+        super().__init__(
+            session_factory, config.concurrency, config.poll_interval
+        )
+        self.config = config
+        self.done = 0
+        self.failed = 0
+
+    async def claim(
+        self, session: AsyncSession, limit: int
+    ) -> Sequence[IngestionJob]:
+        repo = IngestionJobRepository(session)
+        for abandoned in await repo.fail_abandoned():
+            logger.warning("Ingestion job %s was abandoned", abandoned.id)
+            remove_upload(abandoned)
+
+        jobs = []
+        for _ in range(limit):
+            job = await repo.claim_next(
+                self.config.lease, self.config.per_user_concurrency
+            )
+            if job is None:
+                break
+            jobs.append(job)
+        return jobs
+
+    async def claim_one(
+        self, session: AsyncSession, job_id: str
+    ) -> IngestionJob | None:
+        return await IngestionJobRepository(session).claim_next(
+            self.config.lease, self.config.per_user_concurrency, job_id
+        )
+
+    async def process(self, job: IngestionJob) -> None:
+        async with self.session_factory() as session:
+            repo = IngestionJobRepository(session)
+            try:
+                await ingest(session, job, self.config.lease)
+            except Exception as ex:
+                logger.exception("Ingestion job %s failed", job.id)
+                if session.in_transaction():
+                    await session.rollback()
+                await repo.finish(job.id, error=f"{type(ex).__name__}: {ex}")
+                self.failed += 1
+            else:
+                await repo.finish(job.id)
+                self.done += 1
+            finally:
+                remove_upload(job)
+
+    async def stats(self) -> dict[str, Any]:
+        async with self.session_factory() as session:
+            queue = await IngestionJobRepository(session).depth()
+        return {
+            "queue": queue,
+            "busy": self._busy,
+            "concurrency": self.concurrency,
+            "done": self.done,
+            "failed": self.failed,
+        }
+
+
+ingestion_worker = IngestionWorker(create_primary_session, settings.ingestion)
+metrics.register("ingestion_worker", ingestion_worker.stats)
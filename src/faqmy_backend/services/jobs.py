@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, Generic, Sequence, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+Job = TypeVar("Job")
+
+
+class JobWorker(ABC, Generic[Job]):
+    """
+    Runs jobs stored in a table with bounded concurrency.
+
+    `run` polls for due jobs until `stop` is called, `run_job` lets the web
+    process start a just enqueued job straight away when there's a free
+    slot; otherwise the job waits for the poller.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        concurrency: int,
+        poll_interval: float,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._busy = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._wakeup: asyncio.Event | None = None
+        self._stopped = False
+
+    @abstractmethod
+    async def claim(self, session: AsyncSession, limit: int) -> Sequence[Job]:
+        ...
+
+    @abstractmethod
+    async def claim_one(self, session: AsyncSession, job_id: str) -> Job:
+        ...
+
+    @abstractmethod
+    async def process(self, job: Job) -> None:
+        ...
+
+    @property
+    def free_slots(self) -> int:
+        return self.concurrency - self._busy
+
+    async def run(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._stopped = False
+
+        while not self._stopped:
+            if self.free_slots > 0:
+                for job in await self._claim(self.free_slots):
+                    self._spawn(job)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake()
+
+    async def run_job(self, job_id: str) -> None:
+        if self.free_slots <= 0:
+            return
+
+        self._busy += 1
+        try:
+            async with self.session_factory() as session:
+                job = await self.claim_one(session, job_id)
+            if job is not None:
+                await self.process(job)
+        finally:
+            self._busy -= 1
+            self._wake()
+
+    async def _claim(self, limit: int) -> Sequence[Job]:
+        try:
+            async with self.session_factory() as session:
+                return await self.claim(session, limit)
+        except Exception:
+            logger.exception("%s failed to poll jobs", type(self).__name__)
+            return []
+
+    def _spawn(self, job: Job) -> None:
+        self._busy += 1
+        task = asyncio.create_task(self.process(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._release)
+
+    def _release(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._busy -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
@@ -0,0 +1,54 @@
+import inspect
+from typing import Any, Awaitable, Callable
+
+Collector = Callable[[], dict[str, Any] | Awaitable[dict[str, Any]]]
+
+_collectors: dict[str, Collector] = {}
+
+
+def register(name: str, collector: Collector) -> None:
+    """
+    Registers a callable reporting a group of metrics under the given name
+    """
+    _collectors[name] = collector
+
+
+async def collect() -> dict[str, Any]:
+    result = {}
+    for name, collector in _collectors.items():
+        value = collector()
+        if inspect.isawaitable(value):
+            value = await value
+        result[name] = value
+    return result
+
+
+class Histogram:
+    """
+    Counts observed values into cumulative buckets, like Prometheus does
+    """
+
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "buckets": {
+                **{str(b): c for b, c in zip(self.buckets, self.counts)},
+                "+Inf": self.count,
+            },
+        }
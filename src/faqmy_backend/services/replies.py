@@ -0,0 +1,144 @@
+import logging
+from typing import Any, Callable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from faqmy_backend.conf import WorkerSettings, settings
+from faqmy_backend.db.connection import create_primary_session
+from faqmy_backend.db.models.conversations import Message
+from faqmy_backend.db.models.jobs import ReplyJob
+from faqmy_backend.db.repositories.cards import CardRepository
+from faqmy_backend.db.repositories.message import MessageRepository
+from faqmy_backend.db.repositories.reply_job import ReplyJobRepository
+from faqmy_backend.db.repositories.stack import StackRepository
+from faqmy_backend.services import metrics
+from faqmy_backend.services.bot import BotSDK
+from faqmy_backend.services.events import message_events
+from faqmy_backend.services.jobs import JobWorker
+from faqmy_backend.services.resilience import CircuitOpenError, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+async def generate_reply(
+    session: AsyncSession, job: ReplyJob
+) -> Message | None:
+    """
+    Asks the bot and stores its reply along with the job completion.
+
+    No transaction is kept open while waiting for the bot, and the reply
+    is written in the same transaction which removes the job, so a crash
+    never leaves a job done twice or a reply without its job cleared.
+    """
+    message = await MessageRepository(session).get_by_id(job.message_id)
+    if message is None:
+        # The conversation has gone along with its messages
+        await ReplyJobRepository(session).complete(job.id)
+        return None
+    stack = await StackRepository(session).get_by_message_id(message.id)
+
+    bot_sdk = BotSDK(stack.id)
+    answer = await bot_sdk.answer(message.text, stack.cards_generation)
+
+    async with session.begin():
+        reply_msg = await MessageRepository(session).reply_message(
+            message_id=message.id, text=answer
+        )
+        await CardRepository(session).create(
+            stack_id=stack.id,
+            question=message.text,
+            answer=answer,
+        )
+        await ReplyJobRepository(session).complete(job.id)
+    return reply_msg
+
+
+class ReplyWorker(JobWorker[ReplyJob]):
+    """
+    Generates bot replies. Failed jobs are retried with a jittered
+    exponential backoff until they run out of attempts. While the bot's
+    circuit is open, jobs wait for it to close without spending attempts.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        config: WorkerSettings,
+    ):
+        super().__init__(
+            session_factory, config.concurrency, config.poll_interval
+        )
+        self.config = config
+        self.processed = 0
+        self.retried = 0
+        self.postponed = 0
+        self.failed = 0
+
+    async def claim(
+        self, session: AsyncSession, limit: int
+    ) -> Sequence[ReplyJob]:
+        return await ReplyJobRepository(session).claim(
+            limit, lease=self.config.lease
+        )
+
+    async def claim_one(
+        self, session: AsyncSession, job_id: str
+    ) -> ReplyJob | None:
+        return await ReplyJobRepository(session).claim_one(
+            job_id, lease=self.config.lease
+        )
+
+    async def process(self, job: ReplyJob) -> None:
+        async with self.session_factory() as session:
+            try:
+                reply_msg = await generate_reply(session, job)
+            except Exception as ex:
+                logger.exception("Reply job %s failed", job.id)
+                if session.in_transaction():
+                    await session.rollback()
+                await self._reschedule(session, job, ex)
+                return
+
+        self.processed += 1
+        if reply_msg is not None:
+            await message_events.publish(
+                reply_msg.conversation_id, reply_msg.id
+            )
+
+    def backoff(self, attempts: int) -> float:
+        return backoff_delay(
+            attempts - 1, self.config.backoff_base, self.config.backoff_max
+        )
+
+    async def _reschedule(
+        self, session: AsyncSession, job: ReplyJob, ex: Exception
+    ) -> None:
+        repo = ReplyJobRepository(session)
+        error = f"{type(ex).__name__}: {ex}"
+        if isinstance(ex, CircuitOpenError):
+            delay = max(ex.retry_after, self.config.poll_interval)
+            await repo.postpone(job.id, error, delay)
+            self.postponed += 1
+        elif job.attempts >= self.config.max_attempts:
+            await repo.fail(job.id, error)
+            self.failed += 1
+        else:
+            await repo.retry(job.id, error, self.backoff(job.attempts))
+            self.retried += 1
+
+    async def stats(self) -> dict[str, Any]:
+        async with self.session_factory() as session:
+            queue = await ReplyJobRepository(session).depth()
+        return {
+            "queue": queue,
+            "busy": self._busy,
+            "concurrency": self.concurrency,
+            "processed": self.processed,
+            "retried": self.retried,
+            "postponed": self.postponed,
+            "failed": self.failed,
+        }
+
+
+reply_worker = ReplyWorker(create_primary_session, settings.worker)
+metrics.register("reply_worker", reply_worker.stats)
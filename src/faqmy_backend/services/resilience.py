@@ -0,0 +1,126 @@
+import asyncio
+import enum
+import random
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+
+    def __str__(self) -> str:
+        return (
+            f"Circuit {self.name!r} is open, "
+            f"retry in {self.retry_after:.1f}s"
+        )
+
+
+class CircuitState(str, enum.Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while.
+
+    After `failure_threshold` failures in a row the circuit opens and every
+    call fails fast with `CircuitOpenError`. Once `recovery_time` passes,
+    a single trial call is let through: its success closes the circuit,
+    its failure opens it again.
+    """
+
+    def __init__(
+        self, name: str, failure_threshold: int, recovery_time: float
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.state = CircuitState.closed
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.rejected = 0
+        self.trips = 0
+
+    def before(self) -> None:
+        """
+        Raises `CircuitOpenError` unless a call may be made now
+        """
+        if self.state == CircuitState.open:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.recovery_time:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.recovery_time - elapsed)
+            self.state = CircuitState.half_open
+
+        if self.state == CircuitState.half_open:
+            if self.trial_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, 0)
+            self.trial_in_flight = True
+
+    def success(self) -> None:
+        self.trial_in_flight = False
+        self.failures = 0
+        self.state = CircuitState.closed
+
+    def failure(self) -> None:
+        self.trial_in_flight = False
+        self.failures += 1
+        if (
+            self.state == CircuitState.half_open
+            or self.failures >= self.failure_threshold
+        ):
+            if self.state != CircuitState.open:
+                self.trips += 1
+            self.state = CircuitState.open
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """
+        Forgets a call that neither succeeded nor failed, e.g. a cancelled one
+        """
+        self.trial_in_flight = False
+
+    def reset(self) -> None:
+        self.state = CircuitState.closed
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """
+    Exponential backoff with full jitter, `attempt` starts from zero
+    """
+    return random.uniform(0, min(maximum, base * 2**attempt))
+
+
+async def retry(
+    fn: Callable[[], Awaitable[T]],
+    attempts: int,
+    should_retry: Callable[[BaseException], bool],
+    backoff_base: float,
+    backoff_max: float,
+) -> T:
+    for attempt in range(attempts):
+        try:
+            return await fn()
+        except Exception as ex:
+            if attempt + 1 == attempts or not should_retry(ex):
+                raise
+        await asyncio.sleep(backoff_delay(attempt, backoff_base, backoff_max))
+    raise AssertionError("unreachable")  # pragma: no cover
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls sharing the same key into a single call.
+
+    The first caller starts the call in a separate task, everyone arriving
+    while it's in flight awaits the very same task. Cancelling one of the
+    waiters doesn't cancel the call the others are waiting for.
+    """
+
+    def __init__(self):
+        self._tasks: dict[Hashable, asyncio.Task[T]] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.calls += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task[T]) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Nobody may be left waiting, retrieve it to keep asyncio silent
+            task.exception()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": len(self._tasks),
+            "calls": self.calls,
+            "shared": self.shared,
+        }
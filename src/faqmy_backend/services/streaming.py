@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+import secrets
+from typing import Any, AsyncIterable, AsyncIterator, BinaryIO
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_whitespace = " \t\r\n"
+
+
+async def iter_json_array(chunks: AsyncIterable[str]) -> AsyncIterator[Any]:
+    """
+    Yields the items of a JSON array as soon as each of them is received,
+    so a huge response body never has to be held in memory at once
+    """
+    buffer = ""
+    started = finished = False
+
+    async for chunk in chunks:
+        buffer += chunk
+        pos = 0
+        while not finished:
+            while pos < len(buffer) and buffer[pos] in _whitespace:
+                pos += 1
+            if pos == len(buffer):
+                break
+
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("A JSON array expected")
+                started = True
+                pos += 1
+            elif buffer[pos] == ",":
+                pos += 1
+            elif buffer[pos] == "]":
+                finished = True
+                pos += 1
+            else:
+                try:
+                    item, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break  # the item isn't complete yet
+                if end == len(buffer) and not isinstance(item, (dict, list)):
+                    break  # a scalar may go on in the next chunk
+                yield item
+                pos = end
+        buffer = buffer[pos:]
+
+    if not finished or buffer.strip():
+        raise ValueError("Malformed or truncated JSON array")
+
+
+class MultipartFile:
+    """
+    A multipart/form-data body of a single file field, read from the file
+    chunk by chunk in a thread so neither memory nor the event loop suffer
+    """
+
+    def __init__(
+        self,
+        field: str,
+        filename: str | None,
+        file: BinaryIO,
+        content_type: str | None = None,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.boundary = secrets.token_hex(16)
+
+        disposition = f'form-data; name="{field}"'
+        if filename is not None:
+            disposition += '; filename="{}"'.format(
+                filename.replace('"', "%22").replace("\r\n", " ")
+            )
+        self._head = (
+            f"--{self.boundary}\r\n"
+            f"Content-Disposition: {disposition}\r\n"
+            f"Content-Type: {content_type or 'application/octet-stream'}\r\n"
+            "\r\n"
+        ).encode()
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "Content-Type": f"multipart/form-data; boundary={self.boundary}"
+        }
+        size = self._file_size()
+        if size is not None:
+            headers["Content-Length"] = str(
+                len(self._head) + size + len(self._tail)
+            )
+        return headers
+
+    def _file_size(self) -> int | None:
+        try:
+            return os.fstat(self.file.fileno()).st_size - self.file.tell()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield self._head
+        while chunk := await asyncio.to_thread(
+            self.file.read, self.chunk_size
+        ):
+            yield chunk
+        yield self._tail
@@ -0,0 +1,73 @@
+import asyncio
+import datetime
+import logging
+from typing import Callable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from faqmy_backend.conf import UsageSettings, settings
+from faqmy_backend.db.connection import create_primary_session
+from faqmy_backend.db.repositories.usage import UsageRepository
+
+logger = logging.getLogger(__name__)
+
+# Only one process reconciles at a time
+LOCK_KEY = 0x75736167
+
+
+class UsageReconciler:
+    """
+    Checks the usage counters against the messages of the recent hours
+    every now and then, and raises the ones which fell behind. Messages
+    written bypassing `MessageRepository.create_message` are counted this
+    way.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        config: UsageSettings,
+    ):
+        self.session_factory = session_factory
+        self.config = config
+        self.raised = 0
+        self._stopped: asyncio.Event | None = None
+
+    async def reconcile(self) -> int:
+        since = datetime.datetime.now(datetime.UTC) - datetime.timedelta(
+            hours=self.config.reconcile_window_hours
+        )
+        async with self.session_factory() as session:
+            async with session.begin():
+                locked = await session.scalar(
+                    select(func.pg_try_advisory_xact_lock(LOCK_KEY))
+                )
+                if not locked:
+                    return 0
+                raised = await UsageRepository(session).reconcile(since)
+        if raised:
+            logger.warning("Raised %d usage counters", raised)
+        self.raised += raised
+        return raised
+
+    async def run(self) -> None:
+        self._stopped = asyncio.Event()
+        while not self._stopped.is_set():
+            try:
+                await self.reconcile()
+            except Exception:
+                logger.exception("Usage reconciliation failed")
+            try:
+                await asyncio.wait_for(
+                    self._stopped.wait(), self.config.reconcile_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+
+
+usage_reconciler = UsageReconciler(create_primary_session, settings.usage)
@@ -1,18 +1,25 @@
-from typing import AsyncGenerator
-
 from fastapi import Depends
 from fastapi_users.db import SQLAlchemyUserDatabase
+from sqlalchemy import Select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from faqmy_backend.app.dependencies import UserDbMarker
-from faqmy_backend.db.connection import create_session
 from faqmy_backend.db.models.users import User
 
 
-async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
-    async with create_session() as session:
-        yield session
+class UserDatabase(SQLAlchemyUserDatabase):
+    """
+    The session is shared with the repositories of the request, so the
+    user is read in a transaction of its own, the way repositories do it,
+    instead of leaving one open for the rest of the request
+    """
+
+    async def _get_user(self, statement: Select) -> User | None:
+        if self.session.in_transaction():
+            return await super()._get_user(statement)
+        async with self.session.begin():
+            return await super()._get_user(statement)
 
 
 async def get_user_db(session: AsyncSession = Depends(UserDbMarker)):
-    yield SQLAlchemyUserDatabase(session, User)
+    yield UserDatabase(session, User)
@@ -0,0 +1,34 @@
+import asyncio
+import signal
+
+from faqmy_backend.conf import settings
+from faqmy_backend.db.utils import plain_pg_url
+from faqmy_backend.services.bot import close_http_client, get_http_client
+from faqmy_backend.services.events import message_events
+from faqmy_backend.services.ingestion import ingestion_worker
+from faqmy_backend.services.replies import reply_worker
+from faqmy_backend.services.usage import usage_reconciler
+
+workers = (reply_worker, ingestion_worker, usage_reconciler)
+
+
+def stop() -> None:
+    for worker in workers:
+        worker.stop()
+
+
+async def run() -> None:
+    """
+    Runs the background workers until SIGINT or SIGTERM is received
+    """
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop)
+
+    get_http_client()
+    await message_events.start(plain_pg_url(settings.db.url))
+    try:
+        await asyncio.gather(*(worker.run() for worker in workers))
+    finally:
+        await message_events.stop()
+        await close_http_client()
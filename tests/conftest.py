@@ -12,6 +12,7 @@ from faqmy_backend.db.metadata import metadata
 from faqmy_backend.db.models.stack import Stack
 from faqmy_backend.db.models.users import User
 from faqmy_backend.db.utils import normalize_pg_url
+from faqmy_backend.services.bot import bot_breaker
 
 
 @pytest.fixture
@@ -19,6 +20,12 @@ def test_root() -> pathlib.Path:
     return pathlib.Path(__file__).parent
 
 
+@pytest.fixture(autouse=True)
+def reset_bot_breaker():
+    yield
+    bot_breaker.reset()
+
+
 @pytest.fixture(scope="session")
 def database_url():
     image = "postgres:15.2-alpine"
@@ -77,6 +84,17 @@ async def stack(session, user):
     yield stack
 
 
+@pytest.fixture
+async def other_stack(session):
+    stack = Stack(
+        user=User(email="jane@example.com", hashed_password="!"),
+        name="Jane's Stack",
+    )
+    session.add(stack)
+    await session.commit()
+    yield stack
+
+
 @pytest.fixture
 def dependency_overrides():
     """
@@ -1,5 +1,6 @@
 import pytest
 
+from faqmy_backend.db.repositories.cards import CardRepository
 from faqmy_backend.db.repositories.conversation import ConversationRepository
 from faqmy_backend.db.repositories.message import MessageRepository
 from faqmy_backend.db.repositories.stack import StackRepository
@@ -18,3 +19,8 @@ async def message_repo(session) -> MessageRepository:
 @pytest.fixture
 async def stack_repo(session) -> StackRepository:
     yield StackRepository(session)
+
+
+@pytest.fixture
+async def card_repo(session) -> CardRepository:
+    yield CardRepository(session)
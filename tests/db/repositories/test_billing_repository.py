@@ -0,0 +1,135 @@
+import datetime
+
+import pytest
+
+from faqmy_backend.db.repositories.billing import (
+    StripeCustomerRepository,
+    StripeProductRepository,
+    StripeSubscriptionRepository,
+)
+
+NOW = datetime.datetime(2024, 3, 1, tzinfo=datetime.UTC)
+
+
+def ago(days: int) -> datetime.datetime:
+    return NOW - datetime.timedelta(days=days)
+
+
+@pytest.fixture
+def customer_repo(session) -> StripeCustomerRepository:
+    yield StripeCustomerRepository(session)
+
+
+@pytest.fixture
+def subscription_repo(session) -> StripeSubscriptionRepository:
+    yield StripeSubscriptionRepository(session)
+
+
+@pytest.fixture
+def product_repo(session) -> StripeProductRepository:
+    yield StripeProductRepository(session)
+
+
+def subscription(id: str, created_at, **values) -> dict:
+    return {
+        "id": id,
+        "created_at": created_at,
+        "customer_id": "cus_1",
+        "status": "active",
+        "product_id": "prod_1",
+        "synced_at": NOW,
+        **values,
+    }
+
+
+async def test_upsert_skips_stale(customer_repo):
+    customer = {"id": "cus_1", "created_at": ago(9), "email": "a@x.com"}
+
+    assert await customer_repo.upsert({**customer, "synced_at": ago(1)})
+    assert not await customer_repo.upsert(
+        {**customer, "email": "old@x.com", "synced_at": ago(2)}
+    )
+    assert await customer_repo.upsert(
+        {**customer, "email": "new@x.com", "synced_at": NOW}
+    )
+
+    assert await customer_repo.get_id_by_email("a@x.com") is None
+    assert await customer_repo.get_id_by_email("new@x.com") == "cus_1"
+
+
+async def test_remove_skips_stale(customer_repo):
+    await customer_repo.upsert(
+        {"id": "cus_1", "created_at": ago(9), "synced_at": NOW}
+    )
+
+    assert not await customer_repo.remove("cus_1", ago(1))
+    assert await customer_repo.remove("cus_1", NOW)
+
+
+async def test_removed_stays_removed(customer_repo):
+    customer = {"id": "cus_1", "created_at": ago(9), "email": "a@x.com"}
+    await customer_repo.upsert({**customer, "synced_at": ago(2)})
+
+    assert await customer_repo.remove("cus_1", ago(1))
+    assert not await customer_repo.upsert({**customer, "synced_at": ago(2)})
+    assert await customer_repo.get_id_by_email("a@x.com") is None
+
+
+async def test_remove_before_create(customer_repo):
+    assert await customer_repo.remove("cus_1", NOW)
+    assert not await customer_repo.upsert(
+        {
+            "id": "cus_1",
+            "created_at": ago(9),
+            "email": "a@x.com",
+            "synced_at": ago(1),
+        }
+    )
+    assert await customer_repo.get_id_by_email("a@x.com") is None
+
+
+async def test_get_id_by_email_latest(customer_repo):
+    for id, created_at in (("cus_1", ago(9)), ("cus_2", ago(3))):
+        await customer_repo.upsert(
+            {
+                "id": id,
+                "created_at": created_at,
+                "email": "a@x.com",
+                "synced_at": NOW,
+            }
+        )
+
+    assert await customer_repo.get_id_by_email("a@x.com") == "cus_2"
+
+
+async def test_get_live(subscription_repo, product_repo):
+    await product_repo.upsert(
+        {
+            "id": "prod_1",
+            "created_at": ago(30),
+            "messages_count": 100,
+            "synced_at": NOW,
+        }
+    )
+    await product_repo.upsert(
+        {
+            "id": "prod_2",
+            "created_at": ago(30),
+            "active": False,
+            "synced_at": NOW,
+        }
+    )
+    for row in (
+        subscription("sub_1", ago(9)),
+        subscription("sub_2", ago(3), product_id="prod_2"),
+        subscription("sub_3", ago(1), status="canceled"),
+        subscription("sub_4", ago(1), customer_id="cus_2"),
+    ):
+        await subscription_repo.upsert(row)
+
+    live = await subscription_repo.get_live("cus_1")
+
+    assert [(s.id, p and p.id) for s, p in live] == [
+        ("sub_2", None),
+        ("sub_1", "prod_1"),
+    ]
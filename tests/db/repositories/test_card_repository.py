@@ -0,0 +1,95 @@
+from faqmy_backend.db.repositories.cards import CardRepository
+from faqmy_backend.services.bot import Document
+
+
+async def test_create_many(card_repo: CardRepository, stack):
+    docs = [
+        Document(id=str(i), name=f"Question {i}", content=f"Answer {i}")
+        for i in range(3)
+    ]
+
+    cards = await card_repo.create_many(stack.id, docs)
+
+    assert len({card.id for card in cards}) == 3
+    assert all(
+        (
+            card.stack_id == stack.id,
+            card.learned,
+            card.es_doc_id == doc.id,
+            card.question == doc.name,
+            card.answer == doc.content,
+        )
+        for card, doc in zip(cards, docs)
+    )
+    assert len(await card_repo.get_by_stack_id(stack.id, learned=True)) == 3
+
+
+async def test_create_many_nothing(card_repo: CardRepository, stack):
+    assert await card_repo.create_many(stack.id, []) == []
+
+
+async def test_owned(card_repo: CardRepository, stack, other_stack):
+    card = await card_repo.create(stack.id, "Question", "Answer")
+    foreign = await card_repo.create(other_stack.id, "Question", "Answer")
+
+    assert (await card_repo.get_owned(card.id, stack.user_id)).id == card.id
+    assert await card_repo.get_owned(foreign.id, stack.user_id) is None
+
+    updated = await card_repo.update_owned(
+        card.id, stack.user_id, answer="New answer"
+    )
+    assert updated.answer == "New answer"
+    assert (
+        await card_repo.update_owned(foreign.id, stack.user_id, answer="!")
+        is None
+    )
+
+    assert await card_repo.delete_owned(foreign.id, stack.user_id) is None
+    assert (await card_repo.delete_owned(card.id, stack.user_id)).id == card.id
+    assert await card_repo.get_by_id(card.id) is None
+
+
+async def test_update(card_repo: CardRepository, stack):
+    card = await card_repo.create(stack.id, "Question", "Answer")
+
+    updated = await card_repo.update(card.id, learned=True)
+
+    assert (updated.question, updated.answer) == ("Question", "Answer")
+    assert updated.learned
+    assert updated.last_modified_at is not None
+    assert await card_repo.update("card_missing", learned=True) is None
+
+
+async def test_learning_stamps_last_modified_at(
+    card_repo: CardRepository, stack, session
+):
+    cards = [
+        await card_repo.create(stack.id, f"Question {i}", "Answer")
+        for i in range(3)
+    ]
+
+    learned = await card_repo.mark_learned(cards[0].id, "doc_0")
+    await card_repo.mark_learned_many({cards[1].id: "doc_1"})
+    await card_repo.mark_unlearned_many([cards[2].id])
+
+    assert learned.last_modified_at is not None
+    for card in cards[1:]:
+        await session.refresh(card)
+        assert card.last_modified_at is not None
+
+
+async def test_stream_by_stack_id(card_repo: CardRepository, stack):
+    cards = [
+        await card_repo.create(stack.id, f"Question {i}", "Answer")
+        for i in range(5)
+    ]
+    await card_repo.update(cards[0].id, learned=True)
+
+    streamed = [c.id async for c in card_repo.stream_by_stack_id(stack.id)]
+    not_learned = [
+        c.id
+        async for c in card_repo.stream_by_stack_id(stack.id, learned=False)
+    ]
+
+    assert streamed == [c.id for c in cards]
+    assert not_learned == streamed[1:]
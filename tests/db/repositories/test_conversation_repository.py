@@ -1,6 +1,7 @@
 import pytest
 
 from faqmy_backend.db.exceptions import DatabaseError
+from faqmy_backend.db.repositories.conversation import ConversationRow
 
 
 async def test_create_new_conversation(conversation_repo, stack):
@@ -19,3 +20,51 @@ async def test_delete_conversation(conversation_repo, stack):
 
     with pytest.raises(DatabaseError):
         await conversation_repo.get_by_id(conv.id)
+
+
+async def test_exists_sealed(conversation_repo, stack):
+    conv = await conversation_repo.create(stack.id)
+
+    assert await conversation_repo.exists_sealed(conv.id, conv.password)
+    assert not await conversation_repo.exists_sealed(conv.id, "wrong")
+
+
+async def test_owned(conversation_repo, stack, other_stack):
+    conv = await conversation_repo.create(stack.id)
+    foreign = await conversation_repo.create(other_stack.id)
+
+    assert (await conversation_repo.get_owned(conv.id, stack.user_id)).id
+    assert await conversation_repo.get_owned(foreign.id, stack.user_id) is None
+
+    assert not await conversation_repo.delete_owned(foreign.id, stack.user_id)
+    assert await conversation_repo.delete_owned(conv.id, stack.user_id)
+    assert await conversation_repo.get_owned(conv.id, stack.user_id) is None
+
+
+async def test_get_by_user_id_newest_first(conversation_repo, stack):
+    conversations = [await conversation_repo.create(stack.id) for _ in "abc"]
+
+    first = await conversation_repo.get_by_user_id(stack.user_id, limit=2)
+    last = await conversation_repo.get_by_user_id(
+        stack.user_id, limit=2, cursor=first.next_cursor
+    )
+
+    assert [c.id for c in first.items + last.items] == [
+        c.id for c in reversed(conversations)
+    ]
+    assert last.next_cursor is None
+
+
+async def test_get_by_user_id_projects_rows(conversation_repo, session, stack):
+    conv = await conversation_repo.create(stack.id)
+    session.expunge_all()
+
+    [row] = (await conversation_repo.get_by_user_id(stack.user_id)).items
+
+    assert isinstance(row, ConversationRow)
+    assert (row.id, row.stack.id, row.stack.name) == (
+        conv.id,
+        stack.id,
+        "My Stack",
+    )
+    assert not list(session.identity_map.values())
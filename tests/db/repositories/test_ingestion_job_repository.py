@@ -0,0 +1,78 @@
+import pytest
+
+from faqmy_backend.db.models.jobs import IngestionKindEnum, JobStatusEnum
+from faqmy_backend.db.repositories.ingestion_job import IngestionJobRepository
+
+
+@pytest.fixture
+async def job_repo(session) -> IngestionJobRepository:
+    yield IngestionJobRepository(session)
+
+
+async def create_job(job_repo, stack):
+    return await job_repo.create(
+        stack_id=stack.id,
+        user_id=stack.user_id,
+        kind=IngestionKindEnum.url,
+        source="https://libraryofbabel.info/book.cgi",
+    )
+
+
+async def test_claim_next_is_fair_between_users(job_repo, stack, other_stack):
+    first = await create_job(job_repo, stack)
+    await create_job(job_repo, stack)
+    other = await create_job(job_repo, other_stack)
+
+    claimed = [
+        await job_repo.claim_next(lease=60, per_user_concurrency=1)
+        for _ in range(3)
+    ]
+
+    assert [job.id for job in claimed[:2]] == [first.id, other.id]
+    assert claimed[2] is None
+
+
+async def test_progress_and_finish(job_repo, stack, session):
+    job = await create_job(job_repo, stack)
+    await job_repo.claim_next(lease=60, per_user_concurrency=1)
+    await job_repo.add_progress(job.id, documents_parsed=3)
+    await job_repo.add_progress(job.id, cards_written=2, failures=1)
+    await job_repo.finish(job.id)
+
+    job = await job_repo.get_by_id(job.id)
+    await session.refresh(job)
+    assert all(
+        (
+            job.status == JobStatusEnum.done,
+            job.documents_parsed == 3,
+            job.cards_written == 2,
+            job.failures == 1,
+            job.finished_at is not None,
+        )
+    )
+
+
+async def test_get_by_id_of_foreign_user(job_repo, stack, other_stack):
+    job = await create_job(job_repo, stack)
+    found = await job_repo.get_by_id(job.id, user_id=other_stack.user_id)
+    assert found is None
+
+
+async def test_progress_renews_lease(job_repo, stack, session):
+    job = await create_job(job_repo, stack)
+    await job_repo.claim_next(lease=-1, per_user_concurrency=1)
+    await job_repo.add_progress(job.id, documents_parsed=1, lease=60)
+
+    assert await job_repo.fail_abandoned() == []
+
+
+async def test_abandoned_job_stays_failed(job_repo, stack, session):
+    job = await create_job(job_repo, stack)
+    await job_repo.claim_next(lease=-1, per_user_concurrency=1)
+
+    assert [j.id for j in await job_repo.fail_abandoned()] == [job.id]
+    await job_repo.finish(job.id)
+
+    job = await job_repo.get_by_id(job.id)
+    await session.refresh(job)
+    assert (job.status, job.error) == (JobStatusEnum.failed, "Interrupted")
@@ -1,5 +1,7 @@
 import pytest
 
+from faqmy_backend.db.models.jobs import JobStatusEnum
+
 
 @pytest.fixture
 async def conversation(conversation_repo, stack):
@@ -13,6 +15,17 @@ async def test_create_message(conversation, message_repo):
     assert all((msg.id, msg.conversation == conversation, msg.who == "user"))
 
 
+async def test_create_with_reply_job(conversation, message_repo):
+    msg, job = await message_repo.create_with_reply_job(
+        conversation.id, "Do you accept AmEx?"
+    )
+    assert (job.message_id, job.status, job.attempts) == (
+        msg.id,
+        JobStatusEnum.pending,
+        0,
+    )
+
+
 async def test_reply_message(conversation, message_repo):
     msg = await message_repo.create_message(
         conversation_id=conversation.id, text="Hi, I to buy some stuff"
@@ -39,9 +52,10 @@ async def test_list(conversation_repo, message_repo, stack):
     msg_1 = await message_repo.create_message(conv_1.id, "Message in conv #1")
     msg_2 = await message_repo.create_message(conv_2.id, "Message in conv #2")
 
-    message_list = await message_repo.get_by_conversation(conv_1.id)
+    message_list = (await message_repo.get_by_conversation(conv_1.id)).items
 
-    assert all((msg_1 in message_list, msg_2 not in message_list))
+    ids = [m.id for m in message_list]
+    assert all((msg_1.id in ids, msg_2.id not in ids))
 
 
 async def test_list_sealed(conversation_repo, message_repo, stack):
@@ -51,11 +65,14 @@ async def test_list_sealed(conversation_repo, message_repo, stack):
     msg_1 = await message_repo.create_message(conv_1.id, "Message in conv #1")
     msg_2 = await message_repo.create_message(conv_2.id, "Message in conv #2")
 
-    message_list = await message_repo.get_by_conversation_sealed(
-        conversation_id=conv_1.id, password=conv_1.password
-    )
+    message_list = (
+        await message_repo.get_by_conversation_sealed(
+            conversation_id=conv_1.id, password=conv_1.password
+        )
+    ).items
 
-    assert all((msg_1 in message_list, msg_2 not in message_list))
+    ids = [m.id for m in message_list]
+    assert all((msg_1.id in ids, msg_2.id not in ids))
 
 
 async def test_list_sealed_wrong_password(
@@ -67,8 +84,40 @@ async def test_list_sealed_wrong_password(
     msg_1 = await message_repo.create_message(conv_1.id, "Message in conv #1")
     msg_2 = await message_repo.create_message(conv_2.id, "Message in conv #2")
 
-    message_list = await message_repo.get_by_conversation_sealed(
-        conversation_id=conv_1.id, password="wrong password"
+    message_list = (
+        await message_repo.get_by_conversation_sealed(
+            conversation_id=conv_1.id, password="wrong password"
+        )
+    ).items
+
+    assert message_list == []
+
+
+async def test_list_pages(conversation, message_repo):
+    messages = [
+        await message_repo.create_message(conversation.id, f"Q{i}")
+        for i in range(5)
+    ]
+
+    listed, cursor = [], None
+    while True:
+        page = await message_repo.get_by_conversation(
+            conversation.id, limit=2, cursor=cursor
+        )
+        listed.extend(page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    assert [m.id for m in listed] == [m.id for m in messages]
+
+    newer = await message_repo.get_by_conversation(
+        conversation.id, since=messages[2].cursor
     )
+    assert [m.id for m in newer.items] == [m.id for m in messages[3:]]
+    assert newer.next_cursor is None
+
 
-    assert all((msg_1 not in message_list, msg_2 not in message_list))
+async def test_list_bad_cursor(conversation, message_repo):
+    with pytest.raises(ValueError):
+        await message_repo.get_by_conversation(conversation.id, cursor="!")
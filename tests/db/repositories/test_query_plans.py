@@ -0,0 +1,138 @@
+"""
+Checks that the hot repository queries are served by indexes.
+
+Sequential scans are switched off, so the planner falls back to them only
+when no index fits. A full index scan without an index condition is the
+same thing in disguise and is reported as well. Hash and merge joins are
+switched off too, so that on a tiny seeded table joins are planned as the
+index lookups they become on a real one.
+"""
+import datetime
+
+import pytest
+from sqlalchemy import event
+
+from faqmy_backend.db.repositories.billing import (
+    StripeCustomerRepository,
+    StripeSubscriptionRepository,
+)
+from faqmy_backend.db.repositories.cards import CardRepository
+from faqmy_backend.db.repositories.conversation import ConversationRepository
+from faqmy_backend.db.repositories.message import MessageRepository
+from faqmy_backend.db.repositories.stack import StackRepository
+from faqmy_backend.db.repositories.usage import UsageRepository
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+PLANNER_OFF = ("enable_seqscan", "enable_hashjoin", "enable_mergejoin")
+
+QUERIES = {
+    "messages_of_conversation": lambda session, stack, convs: (
+        MessageRepository(session).get_by_conversation_sealed(
+            convs[0].id, convs[0].password
+        )
+    ),
+    "messages_since_cursor": lambda session, stack, convs: (
+        MessageRepository(session).get_by_conversation(
+            convs[0].id, limit=2, since=convs[0].cursor
+        )
+    ),
+    "message_reply": lambda session, stack, convs: (
+        MessageRepository(session).get_by_parent_id("msg_unknown")
+    ),
+    "billing_usage": lambda session, stack, convs: (
+        UsageRepository(session).count_since(
+            stack.user_id, datetime.datetime(2000, 1, 1, tzinfo=datetime.UTC)
+        )
+    ),
+    "billing_customer": lambda session, stack, convs: (
+        StripeCustomerRepository(session).get_id_by_email("a@example.com")
+    ),
+    "billing_subscriptions": lambda session, stack, convs: (
+        StripeSubscriptionRepository(session).get_live("cus_unknown")
+    ),
+    "cards_of_stack": lambda session, stack, convs: (
+        CardRepository(session).get_by_stack_id(stack.id, learned=False)
+    ),
+    "conversations_of_user": lambda session, stack, convs: (
+        ConversationRepository(session).get_by_user_id(stack.user_id)
+    ),
+    "conversations_after_cursor": lambda session, stack, convs: (
+        ConversationRepository(session).get_by_user_id(
+            stack.user_id, limit=1, cursor=convs[1].cursor
+        )
+    ),
+    "stacks_of_user": lambda session, stack, convs: (
+        StackRepository(session).get_by_user_id(stack.user_id)
+    ),
+}
+
+
+@pytest.fixture
+async def seeded(session, stack, conversation_repo, message_repo, card_repo):
+    conversations = []
+    for _ in range(3):
+        conv = await conversation_repo.create(stack.id)
+        for i in range(3):
+            message = await message_repo.create_message(conv.id, f"Q{i}")
+            await message_repo.reply_message(message.id, f"A{i}")
+        conversations.append(conv)
+    for i in range(3):
+        await card_repo.create(stack.id, f"Q{i}", f"A{i}")
+    yield conversations
+
+
+async def explain(session, repo_call) -> list[dict]:
+    """
+    Runs the repository call and returns the plans of its SELECTs
+    """
+    engine = session.bind.sync_engine
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        await repo_call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    conn = await session.connection()
+    for setting in PLANNER_OFF:
+        await conn.exec_driver_sql(f"SET {setting} = off")
+    try:
+        plans = []
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(
+                "EXPLAIN (FORMAT JSON) " + statement, parameters
+            )
+            plans.append(result.scalar()[0]["Plan"])
+        return plans
+    finally:
+        for setting in PLANNER_OFF:
+            await conn.exec_driver_sql(f"RESET {setting}")
+
+
+def full_scans(plan: dict) -> list[str]:
+    found = []
+    node = plan["Node Type"]
+    if node == "Seq Scan" or (
+        node in INDEX_SCANS and "Index Cond" not in plan
+    ):
+        target = plan.get("Index Name") or plan.get("Relation Name")
+        found.append(f"{node} on {target}")
+    for child in plan.get("Plans", []):
+        found.extend(full_scans(child))
+    return found
+
+
+@pytest.mark.parametrize(argnames="query", argvalues=QUERIES)
+async def test_no_full_scans(session, stack, seeded, query):
+    plans = await explain(
+        session, lambda: QUERIES[query](session, stack, seeded)
+    )
+
+    assert plans
+    for plan in plans:
+        assert full_scans(plan) == []
@@ -0,0 +1,62 @@
+import pytest
+
+from faqmy_backend.db.models.jobs import JobStatusEnum
+from faqmy_backend.db.repositories.reply_job import ReplyJobRepository
+
+
+@pytest.fixture
+async def job_repo(session) -> ReplyJobRepository:
+    yield ReplyJobRepository(session)
+
+
+@pytest.fixture
+async def message(conversation_repo, message_repo, stack):
+    conv = await conversation_repo.create(stack.id)
+    yield await message_repo.create_message(conv.id, "Do you accept AmEx?")
+
+
+async def test_enqueue(job_repo, message):
+    job = await job_repo.enqueue(message.id)
+    assert all(
+        (
+            job.id.startswith("rjob_"),
+            job.status == JobStatusEnum.pending,
+            job.attempts == 0,
+        )
+    )
+
+
+async def test_claim(job_repo, message):
+    job = await job_repo.enqueue(message.id)
+
+    claimed = await job_repo.claim(10, lease=60)
+    assert [j.id for j in claimed] == [job.id]
+    assert claimed[0].status == JobStatusEnum.running
+    assert claimed[0].attempts == 1
+
+    assert await job_repo.claim(10, lease=60) == []
+
+
+async def test_claim_one_only_pending(job_repo, message):
+    job = await job_repo.enqueue(message.id)
+
+    assert (await job_repo.claim_one(job.id, lease=60)).id == job.id
+    assert await job_repo.claim_one(job.id, lease=60) is None
+
+
+async def test_retry_is_not_due_before_delay(job_repo, message):
+    job = await job_repo.enqueue(message.id)
+    await job_repo.claim_one(job.id, lease=60)
+    await job_repo.retry(job.id, "Bot is down", delay=60)
+
+    assert await job_repo.claim(10, lease=60) == []
+    assert (await job_repo.depth())["pending"] == 1
+
+
+async def test_complete_and_fail(job_repo, message):
+    job = await job_repo.enqueue(message.id)
+    await job_repo.fail(job.id, "Bot is down")
+    assert (await job_repo.depth())["failed"] == 1
+
+    await job_repo.complete(job.id)
+    assert sum((await job_repo.depth()).values()) == 0
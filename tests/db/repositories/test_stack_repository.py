@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy import event
 
 from faqmy_backend.db.repositories.stack import StackRepository
 
@@ -44,11 +45,65 @@ async def test_update_stack(user, stack_repo: StackRepository, spec):
     }
 
     stack = await stack_repo.create(user.id, **original_stack_data)
-    await stack_repo.update(stack.id, **spec)
+    updated = await stack_repo.update(stack.id, **spec)
 
-    stack = await stack_repo.get_by_id(stack.id)
+    for stack in (updated, await stack_repo.get_by_id(stack.id)):
+        for field, value in original_stack_data.items():
+            if field in spec:
+                value = spec[field]
+            assert getattr(stack, field) == value
 
-    for field, value in original_stack_data.items():
-        if field in spec:
-            value = spec[field]
-        assert getattr(stack, field) == value
+
+async def test_update_sets_only_passed_fields(
+    session, stack_repo: StackRepository, stack
+):
+    before = await stack_repo.get_by_id(stack.id)
+    name, modified_at = before.name, before.last_modified_at
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE"):
+            statements.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        updated = await stack_repo.update(stack.id, description=None)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert (updated.name, updated.description) == (name, None)
+    assert updated.last_modified_at > modified_at
+    [statement] = statements
+    assert "RETURNING" in statement
+    set_clause = statement.split(" SET ")[1].split(" WHERE ")[0]
+    assert "description" in set_clause
+    assert "last_modified_at=now()" in set_clause
+    assert "name" not in set_clause
+
+
+async def test_update_missing(stack_repo: StackRepository):
+    assert await stack_repo.update("st_missing", name="Nope") is None
+
+
+async def test_update_owned(stack_repo: StackRepository, stack, other_stack):
+    updated = await stack_repo.update_owned(
+        stack.id, stack.user_id, name="Renamed", widget_delay=0
+    )
+    assert (updated.name, updated.widget_delay) == ("Renamed", 0)
+
+    assert (
+        await stack_repo.update_owned(
+            other_stack.id, stack.user_id, name="Stolen"
+        )
+        is None
+    )
+    assert (await stack_repo.get_by_id(other_stack.id)).name == "Jane's Stack"
+
+
+async def test_delete_owned(stack_repo: StackRepository, stack, other_stack):
+    assert not await stack_repo.delete_owned(other_stack.id, stack.user_id)
+    assert await stack_repo.delete_owned(stack.id, stack.user_id)
+
+    assert await stack_repo.get_by_id(stack.id) is None
+    assert await stack_repo.get_by_id(other_stack.id) is not None
@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+from sqlalchemy import update
+
+from faqmy_backend.db.models import UsageCounter
+from faqmy_backend.db.repositories.usage import UsageRepository, hour_of
+
+
+@pytest.fixture
+async def usage_repo(session) -> UsageRepository:
+    yield UsageRepository(session)
+
+
+@pytest.fixture
+async def conversation(conversation_repo, stack):
+    yield await conversation_repo.create(stack.id)
+
+
+def test_hour_of():
+    at = datetime.datetime(
+        2024,
+        3,
+        1,
+        2,
+        45,
+        10,
+        tzinfo=datetime.timezone(datetime.timedelta(hours=3)),
+    )
+
+    assert hour_of(at) == datetime.datetime(
+        2024, 2, 29, 23, tzinfo=datetime.UTC
+    )
+
+
+async def test_create_message_counts(
+    conversation, message_repo, usage_repo, stack, other_stack
+):
+    before = datetime.datetime.now(datetime.UTC)
+    for text in ("Question", "One more"):
+        msg = await message_repo.create_message(conversation.id, text)
+    await message_repo.reply_message(msg.id, "Answer")
+
+    assert await usage_repo.count_since(stack.user_id, before) == 2
+    assert await usage_repo.count_since(other_stack.user_id, before) == 0
+    assert (
+        await usage_repo.count_since(
+            stack.user_id, before + datetime.timedelta(hours=1)
+        )
+        == 0
+    )
+
+
+async def test_reconcile_raises_counters(
+    session, conversation, message_repo, usage_repo, stack
+):
+    before = datetime.datetime.now(datetime.UTC)
+    for text in ("Question", "One more"):
+        await message_repo.create_message(conversation.id, text)
+    await session.execute(update(UsageCounter).values(messages=1))
+
+    assert await usage_repo.reconcile(before) == 1
+    assert await usage_repo.count_since(stack.user_id, before) == 2
+    assert await usage_repo.reconcile(before) == 0
+
+
+async def test_reconcile_never_lowers(
+    session, conversation, message_repo, usage_repo, stack
+):
+    before = datetime.datetime.now(datetime.UTC)
+    await message_repo.create_message(conversation.id, "Question")
+    await session.execute(update(UsageCounter).values(messages=5))
+
+    assert await usage_repo.reconcile(before) == 0
+    assert await usage_repo.count_since(stack.user_id, before) == 5
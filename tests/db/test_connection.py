@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import select, text, update
+
+from faqmy_backend.db.connection import (
+    InstrumentedPool,
+    create_session_maker,
+    create_sqlalchemy_engine,
+    engine_name,
+    pool_stats,
+    pools_stats,
+)
+from faqmy_backend.db.models.users import User
+
+
+async def test_pool_stats(database_url):
+    engine = create_sqlalchemy_engine(database_url, asynchronous=True)
+
+    assert isinstance(engine.sync_engine.pool, InstrumentedPool)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        stats = pool_stats(engine)
+        assert (stats["checked_out"], stats["overflow"]) == (1, 0)
+
+    stats = pool_stats(engine)
+    assert (stats["checked_out"], stats["idle"]) == (0, 1)
+    assert stats["checkout_wait"]["count"] == 1
+    await engine.dispose()
+    assert pool_stats(engine)["checkout_wait"]["count"] == 1
+
+
+async def test_pools_stats_per_engine(database_url):
+    primary = create_sqlalchemy_engine(database_url, asynchronous=True)
+    replica = create_sqlalchemy_engine(database_url, asynchronous=True)
+
+    async with replica.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+    stats = pools_stats(primary, [replica])
+    assert stats["primary"]["checkout_wait"]["count"] == 0
+    assert stats["replicas"][engine_name(replica)]["checkout_wait"] == (
+        pool_stats(replica)["checkout_wait"]
+    )
+    assert pool_stats(replica)["checkout_wait"]["count"] == 1
+    await replica.dispose()
+    await primary.dispose()
+
+
+@pytest.fixture
+async def routing_session(pg_create_schema, database_url):
+    session_maker = create_session_maker(
+        database_url, replica_urls=[database_url], asynchronous=True
+    )
+    async with session_maker() as session:
+        yield session
+        await session.rollback()
+
+
+async def test_reads_go_to_replica(routing_session):
+    sync_session = routing_session.sync_session
+    [replica] = sync_session.replicas
+
+    assert sync_session.get_bind(replica=True) is replica
+    assert sync_session.get_bind() is not replica
+    assert (
+        await routing_session.execute(
+            select(1), bind_arguments={"replica": True}
+        )
+    ).scalar() == 1
+
+
+async def test_write_sticks_to_primary(routing_session):
+    sync_session = routing_session.sync_session
+
+    await routing_session.execute(
+        update(User).where(User.id == "usr_none").values(name="John")
+    )
+    assert sync_session.get_bind(replica=True) is not sync_session.replicas[0]
+
+
+async def test_flush_sticks_to_primary(routing_session):
+    sync_session = routing_session.sync_session
+
+    routing_session.add(User(email="john@example.com", hashed_password="!"))
+    await routing_session.flush()
+    assert sync_session.get_bind(replica=True) is not sync_session.replicas[0]
+
+
+async def test_no_replicas_means_primary(pg_create_schema, database_url):
+    session_maker = create_session_maker(database_url, asynchronous=True)
+    async with session_maker() as session:
+        assert session.sync_session.get_bind(replica=True) is (
+            session.bind.sync_engine
+        )
@@ -0,0 +1,47 @@
+import time
+
+import shortuuid
+
+from faqmy_backend.db.models.base import get_class_by_table
+from faqmy_backend.db.models.conversations import Message
+from faqmy_backend.db.models.stack import Card, Stack
+from faqmy_backend.db.utils import UlidGenerator, ulid
+
+
+def test_ulid_is_sortable():
+    ids = [ulid() for _ in range(10_000)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert {len(i) for i in ids} == {UlidGenerator.LENGTH}
+
+
+def test_ulid_carries_timestamp():
+    now_ms = time.time_ns() // 1_000_000
+    assert abs(UlidGenerator.timestamp_ms(ulid()) - now_ms) < 1000
+
+
+def test_ulid_survives_clock_going_back(monkeypatch):
+    generator = UlidGenerator()
+    first = generator()
+    monkeypatch.setattr(time, "time_ns", lambda: 0)
+
+    assert generator() > first
+
+
+def test_class_by_table():
+    assert get_class_by_table(Message.__table__) is Message
+    assert get_class_by_table(Card.__table__) is Card
+
+
+def test_ids_keep_prefixes():
+    message_id = Message.generate_new_id()
+
+    assert message_id.startswith("msg_")
+    assert message_id < Message.generate_new_id()
+    assert Card.generate_new_id().startswith("card_")
+
+
+def test_stack_id_encodes_uuid():
+    stack_id = Stack.generate_new_id()
+    assert shortuuid.decode(stack_id.removeprefix("st_")).version == 4
@@ -0,0 +1,153 @@
+import contextlib
+import csv
+import datetime
+import gzip
+
+import pytest
+from sqlalchemy import func, insert, select, text
+
+from faqmy_backend.db.models.conversations import Message
+from faqmy_backend.db.partitions import (
+    add_months,
+    archive_partitions,
+    create_partitions,
+    detach_partition,
+    list_detached,
+    list_partitions,
+    maintain,
+)
+from faqmy_backend.db.repositories.conversation import ConversationRepository
+
+JAN = datetime.date(2020, 1, 1)
+
+
+@pytest.fixture
+async def conn(session):
+    yield await session.connection()
+
+
+@pytest.fixture
+def begin(conn):
+    """
+    Runs every step on the test's connection, inside its transaction
+    """
+
+    @contextlib.asynccontextmanager
+    async def begin():
+        yield conn
+
+    yield begin
+
+
+async def add_message(conn, conversation_id: str, day: datetime.date) -> str:
+    created_at = datetime.datetime.combine(
+        day, datetime.time(12), datetime.UTC
+    )
+    return (
+        await conn.execute(
+            insert(Message)
+            .values(
+                conversation_id=conversation_id,
+                text="Old question",
+                created_at=created_at,
+            )
+            .returning(Message.id)
+        )
+    ).scalar_one()
+
+
+async def partition_of(conn, message_id: str) -> str:
+    return (
+        await conn.execute(
+            select(text("tableoid::regclass::text"))
+            .select_from(Message)
+            .where(Message.id == message_id)
+        )
+    ).scalar_one()
+
+
+@pytest.mark.parametrize(
+    argnames=["month", "months", "expected"],
+    argvalues=[
+        (JAN, 1, datetime.date(2020, 2, 1)),
+        (JAN, 12, datetime.date(2021, 1, 1)),
+        (JAN, -1, datetime.date(2019, 12, 1)),
+        (datetime.date(2020, 12, 1), 1, datetime.date(2021, 1, 1)),
+    ],
+)
+def test_add_months(month, months, expected):
+    assert add_months(month, months) == expected
+
+
+async def test_create_partitions(session, conn, stack):
+    conv = await ConversationRepository(session).create(stack.id)
+
+    assert await create_partitions(conn, JAN, 2) == [
+        "messages_y2020m01",
+        "messages_y2020m02",
+    ]
+    assert await create_partitions(conn, JAN, 3) == ["messages_y2020m03"]
+    assert {JAN, add_months(JAN, 2)} <= set(await list_partitions(conn))
+
+    message_id = await add_message(conn, conv.id, datetime.date(2020, 2, 29))
+    assert await partition_of(conn, message_id) == "messages_y2020m02"
+    message_id = await add_message(conn, conv.id, datetime.date(2019, 1, 1))
+    assert await partition_of(conn, message_id) == "messages_default"
+
+
+async def test_archive_into_schema(session, conn, begin, stack):
+    conv = await ConversationRepository(session).create(stack.id)
+    await create_partitions(conn, JAN, 2)
+    old = await add_message(conn, conv.id, datetime.date(2020, 1, 10))
+    kept = await add_message(conn, conv.id, datetime.date(2020, 2, 10))
+
+    archived = await archive_partitions(begin, add_months(JAN, 1))
+
+    assert archived == ["messages_y2020m01"]
+    assert JAN not in await list_partitions(conn)
+    ids = (await conn.execute(select(Message.id))).scalars().all()
+    assert old not in ids and kept in ids
+    archive = text("SELECT id FROM archive.messages_y2020m01")
+    assert (await conn.execute(archive)).scalars().all() == [old]
+
+
+async def test_archive_into_files(session, conn, begin, stack, tmp_path):
+    conv = await ConversationRepository(session).create(stack.id)
+    await create_partitions(conn, JAN, 1)
+    old = await add_message(conn, conv.id, datetime.date(2020, 1, 10))
+
+    await archive_partitions(begin, add_months(JAN, 1), dump_dir=tmp_path)
+
+    with gzip.open(tmp_path / "messages_y2020m01.csv.gz", "rt") as fp:
+        rows = list(csv.DictReader(fp))
+    assert [(row["id"], row["text"]) for row in rows] == [
+        (old, "Old question")
+    ]
+    count = select(func.count()).select_from(Message)
+    assert (await conn.execute(count.where(Message.id == old))).scalar() == 0
+
+
+async def test_maintain(conn, begin):
+    today = datetime.date(2020, 3, 15)
+    await create_partitions(conn, JAN, 1)
+
+    created, archived = await maintain(
+        begin, today, ahead=1, retention_months=1
+    )
+
+    assert created == ["messages_y2020m03", "messages_y2020m04"]
+    assert archived == ["messages_y2020m01"]
+
+
+async def test_archive_finishes_detached(session, conn, begin, stack):
+    conv = await ConversationRepository(session).create(stack.id)
+    await create_partitions(conn, JAN, 1)
+    old = await add_message(conn, conv.id, datetime.date(2020, 1, 10))
+    # A run which failed right after the detach
+    await detach_partition(conn, "messages_y2020m01")
+
+    assert await list_detached(conn) == ["messages_y2020m01"]
+    assert await archive_partitions(begin, JAN) == ["messages_y2020m01"]
+    assert await list_detached(conn) == []
+    archive = text("SELECT id FROM archive.messages_y2020m01")
+    assert (await conn.execute(archive)).scalars().all() == [old]
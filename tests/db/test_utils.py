@@ -0,0 +1,58 @@
+import datetime
+
+import pytest
+import shortuuid
+
+from faqmy_backend.db.utils import (
+    decode_cursor,
+    encode_cursor,
+    plain_pg_url,
+    ulid,
+    ulid_time,
+)
+
+
+def test_cursor_round_trip():
+    created_at = datetime.datetime(2026, 1, 2, 3, 4, 5, 6, datetime.UTC)
+
+    cursor = encode_cursor(created_at, "msg_01J|x")
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, "msg_01J|x")
+
+
+@pytest.mark.parametrize(
+    argnames="cursor",
+    argvalues=[
+        "",
+        "not base64!",
+        encode_cursor(datetime.datetime(2026, 1, 2), "msg_1"),
+        encode_cursor(datetime.datetime.now(datetime.UTC), ""),
+        "bm90IGEgY3Vyc29y",  # "not a cursor"
+    ],
+)
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_ulid_time():
+    before = datetime.datetime.now(datetime.UTC)
+    at = ulid_time("msg_" + ulid())
+
+    assert before - datetime.timedelta(seconds=1) <= at
+    assert at <= datetime.datetime.now(datetime.UTC)
+    assert ulid_time("msg_" + shortuuid.uuid()) is None
+    assert ulid_time("msg_" + "Z" * 26) is None
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "postgresql://app:secret@db:5432/faqmy",
+        "postgresql+psycopg2://app:secret@db:5432/faqmy",
+        "postgresql+asyncpg://app:secret@db:5432/faqmy",
+    ],
+)
+def test_plain_pg_url(url):
+    assert plain_pg_url(url) == "postgresql://app:secret@db:5432/faqmy"
@@ -0,0 +1,47 @@
+import io
+
+import httpx
+import pytest
+import shortuuid
+
+from faqmy_backend.conf import settings
+from faqmy_backend.devtools.fakebot import FakeBotConfig, build_fakebot
+from faqmy_backend.services.bot import BotSDK
+
+
+@pytest.fixture
+async def fake_bot_sdk(monkeypatch) -> BotSDK:
+    monkeypatch.setattr(settings.bot, "url", "http://fakebot")
+    app = build_fakebot(FakeBotConfig(latency=0, documents=3))
+    async with httpx.AsyncClient(app=app) as client:
+        yield BotSDK("st_" + shortuuid.uuid(), client=client)
+
+
+async def test_documents(fake_bot_sdk):
+    doc_id = await fake_bot_sdk.create_document("my-doc", "Content")
+    assert (await fake_bot_sdk.get_document(doc_id))["content"] == "Content"
+
+    await fake_bot_sdk.delete_document(doc_id)
+    with pytest.raises(httpx.HTTPStatusError):
+        await fake_bot_sdk.get_document(doc_id)
+
+
+async def test_ask(fake_bot_sdk):
+    assert "AmEx" in await fake_bot_sdk.ask("Do you accept AmEx?")
+
+
+async def test_scan_and_upload(fake_bot_sdk):
+    scanned = await fake_bot_sdk.scan("https://example.com")
+    uploaded = await fake_bot_sdk.upload("faq.txt", io.BytesIO(b"Q: A"))
+
+    assert len(scanned) == len(uploaded) == 3
+
+
+async def test_errors_are_simulated(monkeypatch):
+    monkeypatch.setattr(settings.bot, "url", "http://fakebot")
+    monkeypatch.setattr(settings.bot, "retries", 0)
+    app = build_fakebot(FakeBotConfig(latency=0, error_rate=1))
+    async with httpx.AsyncClient(app=app) as client:
+        bot_sdk = BotSDK("st_" + shortuuid.uuid(), client=client)
+        with pytest.raises(httpx.HTTPStatusError):
+            await bot_sdk.ask("Do you accept AmEx?")
@@ -0,0 +1,21 @@
+import math
+
+from faqmy_backend.devtools.loadtest import Recorder, percentile, report
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([1.0], 0.95) == 1
+    assert math.isnan(percentile([], 0.5))
+
+
+def test_report():
+    recorder = Recorder()
+    recorder.latencies["reply"] = [0.1, 0.2]
+    recorder.errors["reply"] = 1
+
+    lines = report(recorder, elapsed=2).splitlines()
+    assert lines[4].split()[:4] == ["reply", "2", "1", "1.0"]
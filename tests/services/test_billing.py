@@ -0,0 +1,51 @@
+import json
+
+import httpx
+import pytest
+from async_stripe import stripe
+
+from faqmy_backend.services.billing import (
+    http_client,
+    operation_of,
+    stripe_errors,
+    stripe_latency,
+)
+
+
+@pytest.fixture(autouse=True)
+async def no_retries(monkeypatch):
+    monkeypatch.setattr(stripe, "max_network_retries", 0)
+    yield
+    await http_client.aclose()
+
+
+def test_operation_of():
+    assert (
+        operation_of("get", "https://api.stripe.com/v1/customers/cus_1")
+        == "GET /v1/customers"
+    )
+
+
+async def test_call_goes_through_httpx(httpx_mock):
+    httpx_mock.add_response(
+        url=stripe.api_base + "/v1/customers/cus_1",
+        method="GET",
+        content=json.dumps(
+            {"id": "cus_1", "object": "customer", "email": "a@x.com"}
+        ).encode(),
+    )
+    observed = stripe_latency["GET /v1/customers"].count
+
+    customer = await stripe.Customer.retrieve("cus_1")
+
+    assert customer["email"] == "a@x.com"
+    assert stripe_latency["GET /v1/customers"].count == observed + 1
+
+
+async def test_timeout_is_connection_error(httpx_mock):
+    httpx_mock.add_exception(httpx.ReadTimeout("Stripe is slow"))
+    errors = stripe_errors["GET /v1/customers"]
+
+    with pytest.raises(stripe.error.APIConnectionError):
+        await stripe.Customer.retrieve("cus_1")
+    assert stripe_errors["GET /v1/customers"] == errors + 1
@@ -1,9 +1,13 @@
 import json
 import uuid
 
+import httpx
 import pytest
 
-from faqmy_backend.services.bot import BotSDK
+from faqmy_backend.conf import settings
+from faqmy_backend.services.bot import BotSDK, bot_breaker, close_http_client
+from faqmy_backend.services.cache import answer_cache
+from faqmy_backend.services.resilience import CircuitOpenError
 
 
 @pytest.fixture
@@ -88,3 +92,118 @@ async def test_ask(bot_sdk, httpx_mock):
 
     answer = await bot_sdk.ask("Do you accept AmEx?")
     assert answer == "We accept all major credit cards, including AmEx."
+
+
+async def test_http_client_is_shared(bot_sdk, stack):
+    assert bot_sdk.client is BotSDK(stack.id).client
+    assert not bot_sdk.client.is_closed
+
+
+async def test_http_client_is_recreated_after_close(bot_sdk):
+    client = bot_sdk.client
+    await close_http_client()
+
+    assert client.is_closed
+    assert bot_sdk.client is not client
+
+
+async def test_answer_is_cached(bot_sdk, httpx_mock):
+    httpx_mock.add_response(
+        url=bot_sdk.url_prefix + "/ask",
+        method="POST",
+        content=b'"We accept all major credit cards, including AmEx."',
+    )
+
+    first = await bot_sdk.answer("Do you accept AmEx?")
+    second = await bot_sdk.answer("do you accept amex")
+
+    assert first == second
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_answer_new_generation_asks_again(bot_sdk, httpx_mock):
+    httpx_mock.add_response(
+        url=bot_sdk.url_prefix + "/ask",
+        method="POST",
+        content=b'"We accept all major credit cards, including AmEx."',
+    )
+
+    await bot_sdk.answer("Do you accept AmEx?", generation=0)
+    await bot_sdk.answer("Do you accept AmEx?", generation=1)
+
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_create_documents_reports_failures(bot_sdk, httpx_mock):
+    httpx_mock.add_response(
+        url=bot_sdk.url_prefix,
+        method="POST",
+        content=json.dumps({"id": "es_doc_id"}).encode(),
+    )
+    httpx_mock.add_exception(httpx.ConnectError("Bot is down"))
+
+    results = await bot_sdk.create_documents(
+        [("Question 1", "Answer 1"), ("Question 2", "Answer 2")]
+    )
+
+    assert results[0] == "es_doc_id"
+    assert isinstance(results[1], httpx.ConnectError)
+
+
+async def test_upload_is_streamed(bot_sdk, httpx_mock, tmp_path):
+    docs = [
+        {"id": str(i), "name": f"doc-{i}", "content": f"Content {i}"}
+        for i in range(3)
+    ]
+    httpx_mock.add_response(url=bot_sdk.upload_url, method="POST", json=docs)
+    path = tmp_path / "docs.txt"
+    path.write_bytes(b"Some text")
+
+    with path.open("rb") as fp:
+        result = [doc async for doc in bot_sdk.upload_iter("docs.txt", fp)]
+
+    request = httpx_mock.get_request()
+    assert b"Some text" in request.content
+    assert request.headers["Content-Length"] == str(len(request.content))
+    assert [doc.id for doc in result] == ["0", "1", "2"]
+
+
+async def test_ask_is_retried(bot_sdk, httpx_mock):
+    url = bot_sdk.url_prefix + "/ask"
+    httpx_mock.add_response(url=url, method="POST", status_code=503)
+    httpx_mock.add_response(url=url, method="POST", content=b'"Yes"')
+
+    assert await bot_sdk.ask("Do you accept AmEx?") == "Yes"
+    assert bot_breaker.stats()["state"] == "closed"
+
+
+async def test_create_document_is_not_retried(bot_sdk, httpx_mock):
+    httpx_mock.add_response(
+        url=bot_sdk.url_prefix, method="POST", status_code=503
+    )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await bot_sdk.create_document("my-doc", "Content of my doc")
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_open_circuit_fails_fast(bot_sdk, httpx_mock, monkeypatch):
+    monkeypatch.setattr(bot_breaker, "failure_threshold", 1)
+    httpx_mock.add_exception(httpx.ConnectError("Bot is down"))
+
+    with pytest.raises(httpx.ConnectError):
+        await bot_sdk.create_document("my-doc", "Content of my doc")
+    with pytest.raises(CircuitOpenError):
+        await bot_sdk.ask("Do you accept AmEx?")
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_open_circuit_answers_fallback(bot_sdk, httpx_mock, monkeypatch):
+    monkeypatch.setattr(settings.bot, "fallback_answer", "Back soon")
+    monkeypatch.setattr(bot_breaker, "failure_threshold", 1)
+    httpx_mock.add_exception(httpx.ConnectError("Bot is down"))
+
+    with pytest.raises(httpx.ConnectError):
+        await bot_sdk.create_document("my-doc", "Content of my doc")
+    assert await bot_sdk.answer("Do you accept AmEx?") == "Back soon"
+    assert not answer_cache.get(bot_sdk.index_name, 0, "Do you accept AmEx?")
@@ -0,0 +1,64 @@
+import pytest
+
+from faqmy_backend.services import cache
+from faqmy_backend.services.cache import AnswerCache, normalize_question
+
+
+@pytest.fixture
+def answer_cache() -> AnswerCache:
+    yield AnswerCache(max_size=2, ttl=60)
+
+
+@pytest.mark.parametrize(
+    argnames="question",
+    argvalues=[
+        "Do you accept AmEx?",
+        "do you accept amex",
+        "  Do   you accept AMEX ?? ",
+    ],
+)
+def test_normalize_question(question):
+    assert normalize_question(question) == "do you accept amex"
+
+
+def test_hit_and_miss(answer_cache):
+    assert answer_cache.get("st_1", 0, "Hi?") is None
+    answer_cache.set("st_1", 0, "Hi?", "Hello")
+
+    assert answer_cache.get("st_1", 0, "hi") == "Hello"
+    assert answer_cache.stats()["hits"] == 1
+    assert answer_cache.stats()["misses"] == 1
+
+
+def test_new_generation_misses(answer_cache):
+    answer_cache.set("st_1", 0, "Hi?", "Hello")
+    assert answer_cache.get("st_1", 1, "Hi?") is None
+
+
+def test_lru_eviction(answer_cache):
+    answer_cache.set("st_1", 0, "one", "1")
+    answer_cache.set("st_1", 0, "two", "2")
+    answer_cache.get("st_1", 0, "one")
+    answer_cache.set("st_1", 0, "three", "3")
+
+    assert answer_cache.get("st_1", 0, "two") is None
+    assert answer_cache.get("st_1", 0, "one") == "1"
+    assert answer_cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiration(answer_cache, monkeypatch):
+    answer_cache.set("st_1", 0, "Hi?", "Hello")
+    now = cache.time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + 61)
+
+    assert answer_cache.get("st_1", 0, "Hi?") is None
+    assert answer_cache.stats()["expirations"] == 1
+
+
+def test_invalidate(answer_cache):
+    answer_cache.set("st_1", 0, "Hi?", "Hello")
+    answer_cache.set("st_2", 0, "Hi?", "Hey")
+    answer_cache.invalidate("st_1")
+
+    assert answer_cache.get("st_1", 0, "Hi?") is None
+    assert answer_cache.get("st_2", 0, "Hi?") == "Hey"
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from faqmy_backend.db.utils import plain_pg_url
+from faqmy_backend.services import events as events_module
+from faqmy_backend.services.events import MessageEvents
+
+
+@pytest.fixture
+def events() -> MessageEvents:
+    yield MessageEvents(queue_size=1)
+
+
+async def test_publish_reaches_subscriber(events):
+    async with events.subscribe("conv_1") as queue:
+        await events.publish("conv_1", "msg_1")
+        assert await asyncio.wait_for(queue.get(), 1) == "msg_1"
+
+
+async def test_publish_skips_other_conversations(events):
+    async with events.subscribe("conv_1") as queue:
+        await events.publish("conv_2", "msg_1")
+        assert queue.empty()
+
+
+async def test_unsubscribe_on_exit(events):
+    async with events.subscribe("conv_1"):
+        assert events.stats()["subscribers"] == 1
+    assert events.stats()["subscribers"] == 0
+
+
+async def test_slow_subscriber_drops_events(events):
+    async with events.subscribe("conv_1") as queue:
+        events.dispatch("conv_1", "msg_1")
+        events.dispatch("conv_1", "msg_2")
+
+        assert queue.qsize() == 1
+        assert events.stats()["dropped"] == 1
+
+
+async def test_listener_reconnects(events, database_url, monkeypatch):
+    monkeypatch.setattr(events_module, "RECONNECT_BACKOFF_BASE", 0)
+    await events.start(plain_pg_url(database_url))
+    try:
+        assert events.listening
+        events._connection.terminate()
+        assert not events.listening
+
+        for _ in range(50):
+            if events.listening:
+                break
+            await asyncio.sleep(0.1)
+        assert events.stats()["reconnects"] == 1
+
+        async with events.subscribe("conv_1") as queue:
+            await events.publish("conv_1", "msg_1")
+            assert await asyncio.wait_for(queue.get(), 5) == "msg_1"
+    finally:
+        await events.stop()
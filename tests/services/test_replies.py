@@ -0,0 +1,81 @@
+import httpx
+import pytest
+
+from faqmy_backend.conf import WorkerSettings
+from faqmy_backend.db.models.jobs import JobStatusEnum, ReplyJob
+from faqmy_backend.db.repositories.conversation import ConversationRepository
+from faqmy_backend.db.repositories.message import MessageRepository
+from faqmy_backend.db.repositories.reply_job import ReplyJobRepository
+from faqmy_backend.services.bot import BotSDK, bot_breaker
+from faqmy_backend.services.replies import ReplyWorker
+
+
+@pytest.fixture
+def worker(session) -> ReplyWorker:
+    yield ReplyWorker(lambda: session, WorkerSettings(max_attempts=2))
+
+
+@pytest.fixture
+async def job(session, stack):
+    conv = await ConversationRepository(session).create(stack.id)
+    message = await MessageRepository(session).create_message(
+        conv.id, "Do you accept AmEx?"
+    )
+    yield await ReplyJobRepository(session).enqueue(message.id)
+
+
+async def test_run_job_writes_reply(worker, job, stack, session, httpx_mock):
+    httpx_mock.add_response(
+        url=BotSDK(stack.id).url_prefix + "/ask",
+        method="POST",
+        content=b'"Sure, we do"',
+    )
+
+    await worker.run_job(job.id)
+
+    reply = await MessageRepository(session).get_by_parent_id(job.message_id)
+    assert reply.text == "Sure, we do"
+    assert sum((await ReplyJobRepository(session).depth()).values()) == 0
+
+
+async def test_failed_job_is_retried_then_failed(
+    worker, job, stack, session, httpx_mock
+):
+    httpx_mock.add_exception(httpx.ConnectError("Bot is down"))
+    job_repo = ReplyJobRepository(session)
+
+    await worker.run_job(job.id)
+    assert (await job_repo.depth())["pending"] == 1
+
+    # Make the retry due straight away
+    await job_repo.retry(job.id, "Bot is down", delay=0)
+    for claimed in await job_repo.claim(1, lease=60):
+        await worker.process(claimed)
+
+    assert (await job_repo.depth())[JobStatusEnum.failed.value] == 1
+    assert (worker.retried, worker.failed) == (1, 1)
+
+
+async def test_job_of_deleted_message_completes(worker, job, session):
+    message = await MessageRepository(session).get_by_id(job.message_id)
+    await ConversationRepository(session).delete(message.conversation_id)
+
+    await worker.run_job(job.id)
+
+    assert sum((await ReplyJobRepository(session).depth()).values()) == 0
+
+
+async def test_job_waits_for_open_circuit(worker, job, session):
+    for _ in range(bot_breaker.failure_threshold):
+        bot_breaker.failure()
+    job_repo = ReplyJobRepository(session)
+
+    for _ in range(worker.config.max_attempts + 1):
+        # Make the postponed job due straight away
+        await job_repo.retry(job.id, "", delay=0)
+        for claimed in await job_repo.claim(1, lease=60):
+            await worker.process(claimed)
+
+    job = await session.get(ReplyJob, job.id, populate_existing=True)
+    assert (job.status, job.attempts) == (JobStatusEnum.pending, 0)
+    assert (worker.postponed, worker.failed) == (3, 0)
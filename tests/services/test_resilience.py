@@ -0,0 +1,111 @@
+import pytest
+
+from faqmy_backend.services import resilience
+from faqmy_backend.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    retry,
+)
+
+
+@pytest.fixture
+def breaker() -> CircuitBreaker:
+    yield CircuitBreaker("test", failure_threshold=2, recovery_time=30)
+
+
+def test_breaker_opens_after_threshold(breaker):
+    breaker.before()
+    breaker.failure()
+    breaker.before()
+    breaker.failure()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    assert breaker.stats() == {
+        "state": "open",
+        "failures": 2,
+        "trips": 1,
+        "rejected": 1,
+    }
+
+
+def test_breaker_success_resets_failures(breaker):
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+
+    breaker.before()
+    assert breaker.state == CircuitState.closed
+
+
+def test_breaker_lets_single_trial_through(breaker, monkeypatch):
+    breaker.failure()
+    breaker.failure()
+    monkeypatch.setattr(breaker, "opened_at", breaker.opened_at - 30)
+
+    breaker.before()
+    assert breaker.state == CircuitState.half_open
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+
+    breaker.success()
+    assert breaker.state == CircuitState.closed
+
+
+def test_breaker_failed_trial_opens_again(breaker, monkeypatch):
+    breaker.failure()
+    breaker.failure()
+    monkeypatch.setattr(breaker, "opened_at", breaker.opened_at - 30)
+
+    breaker.before()
+    breaker.failure()
+
+    assert breaker.state == CircuitState.open
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    async def sleep(delay):
+        pass
+
+    monkeypatch.setattr(resilience.asyncio, "sleep", sleep)
+
+
+async def test_retry_succeeds_eventually(no_sleep):
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError
+        return "ok"
+
+    result = await retry(
+        flaky,
+        attempts=3,
+        should_retry=lambda ex: isinstance(ex, ConnectionError),
+        backoff_base=1,
+        backoff_max=1,
+    )
+    assert (result, len(calls)) == ("ok", 3)
+
+
+async def test_retry_gives_up_on_fatal_error(no_sleep):
+    calls = []
+
+    async def broken():
+        calls.append(1)
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        await retry(
+            broken,
+            attempts=3,
+            should_retry=lambda ex: isinstance(ex, ConnectionError),
+            backoff_base=1,
+            backoff_max=1,
+        )
+    assert len(calls) == 1
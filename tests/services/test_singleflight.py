@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from faqmy_backend.services.singleflight import SingleFlight
+
+
+@pytest.fixture
+def flight() -> SingleFlight:
+    yield SingleFlight()
+
+
+async def test_concurrent_calls_are_coalesced(flight):
+    calls = 0
+    gate = asyncio.Event()
+
+    async def fn():
+        nonlocal calls
+        calls += 1
+        await gate.wait()
+        return "answer"
+
+    waiters = [asyncio.create_task(flight.do("key", fn)) for _ in range(5)]
+    await asyncio.sleep(0)
+    gate.set()
+
+    assert await asyncio.gather(*waiters) == ["answer"] * 5
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "calls": 1, "shared": 4}
+
+
+async def test_different_keys_are_not_coalesced(flight):
+    async def fn():
+        return "answer"
+
+    await asyncio.gather(flight.do("one", fn), flight.do("two", fn))
+    assert flight.stats()["calls"] == 2
+
+
+async def test_exception_is_shared(flight):
+    gate = asyncio.Event()
+
+    async def fn():
+        await gate.wait()
+        raise RuntimeError("bot is down")
+
+    waiters = [asyncio.create_task(flight.do("key", fn)) for _ in range(2)]
+    await asyncio.sleep(0)
+    gate.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+async def test_cancelled_waiter_does_not_cancel_others(flight):
+    gate = asyncio.Event()
+
+    async def fn():
+        await gate.wait()
+        return "answer"
+
+    leader = asyncio.create_task(flight.do("key", fn))
+    follower = asyncio.create_task(flight.do("key", fn))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    gate.set()
+
+    assert await follower == "answer"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
@@ -0,0 +1,67 @@
+import io
+import json
+
+import pytest
+
+from faqmy_backend.services.streaming import MultipartFile, iter_json_array
+
+
+async def chunked(text: str, size: int):
+    for start in range(0, len(text), size):
+        yield text[start : start + size]
+
+
+async def collect(chunks) -> list:
+    return [item async for item in iter_json_array(chunks)]
+
+
+@pytest.mark.parametrize(argnames="size", argvalues=[1, 3, 7, 1024])
+async def test_iter_json_array(size):
+    items = [
+        {"id": "1", "name": "a", "content": "Hello, [world]"},
+        {"id": "2", "name": None, "content": 'Quoted "}" brace'},
+        [1, 2],
+        "plain",
+        12345,
+    ]
+    text = json.dumps(items, indent=2)
+
+    assert await collect(chunked(text, size)) == items
+
+
+async def test_iter_json_array_empty():
+    assert await collect(chunked(" [ ] ", 1)) == []
+
+
+@pytest.mark.parametrize(
+    argnames="text",
+    argvalues=['{"id": 1}', '[{"id": 1}', '[{"id": 1}] trailing'],
+)
+async def test_iter_json_array_malformed(text):
+    with pytest.raises(ValueError):
+        await collect(chunked(text, 4))
+
+
+async def test_multipart_file():
+    body = MultipartFile(
+        "file", 'my "doc".txt', io.BytesIO(b"x" * 100), "text/plain", 16
+    )
+    payload = b"".join([chunk async for chunk in body])
+
+    assert payload.startswith(f"--{body.boundary}\r\n".encode())
+    assert b'name="file"; filename="my %22doc%22.txt"' in payload
+    assert b"Content-Type: text/plain\r\n\r\n" + b"x" * 100 in payload
+    assert payload.endswith(f"\r\n--{body.boundary}--\r\n".encode())
+
+
+async def test_multipart_file_content_length(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_bytes(b"x" * 1000)
+
+    with path.open("rb") as fp:
+        body = MultipartFile("file", "doc.txt", fp)
+        headers = body.headers
+        payload = b"".join([chunk async for chunk in body])
+
+    assert int(headers["Content-Length"]) == len(payload)
+    assert headers["Content-Type"].endswith(body.boundary)
@@ -7,15 +7,19 @@ from faqmy_backend.app.dependencies import (
     CardRepositoryDependMarker,
     ConversationRepositoryDependMarker,
     GetDbDependMarker,
+    IngestionJobRepositoryDependMarker,
     MessageRepositoryDependMarker,
     StackRepositoryDependMarker,
     UserDbMarker,
 )
-from faqmy_backend.app.routes import client as client_routes
+from faqmy_backend.conf import settings
 from faqmy_backend.db.repositories.cards import CardRepository
 from faqmy_backend.db.repositories.conversation import ConversationRepository
+from faqmy_backend.db.repositories.ingestion_job import IngestionJobRepository
 from faqmy_backend.db.repositories.message import MessageRepository
 from faqmy_backend.db.repositories.stack import StackRepository
+from faqmy_backend.services.ingestion import ingestion_worker
+from faqmy_backend.services.replies import reply_worker
 
 
 @pytest.fixture
@@ -43,6 +47,11 @@ def card_repo_dep(session):
     return CardRepository(session)
 
 
+@pytest.fixture
+def ingestion_job_repo_dep(session):
+    return IngestionJobRepository(session)
+
+
 @pytest.fixture(name="app")
 def app_fixture(
     session,
@@ -52,12 +61,20 @@ def app_fixture(
     conversation_repo_dep,
     stack_repo_dep,
     card_repo_dep,
+    ingestion_job_repo_dep,
     monkeypatch,
+    tmp_path,
 ) -> fastapi.FastAPI:
     app = fastapi.FastAPI()
     app = build_app(app)
 
-    monkeypatch.setattr(client_routes, "create_session", lambda: get_db_dep)
+    monkeypatch.setattr(reply_worker, "session_factory", lambda: get_db_dep)
+    monkeypatch.setattr(
+        ingestion_worker, "session_factory", lambda: get_db_dep
+    )
+    monkeypatch.setattr(
+        settings.ingestion, "upload_dir", str(tmp_path / "uploads")
+    )
 
     with dependency_overrides(
         app,
@@ -68,6 +85,9 @@ def app_fixture(
             MessageRepositoryDependMarker: lambda: message_repo_dep,
             StackRepositoryDependMarker: lambda: stack_repo_dep,
             CardRepositoryDependMarker: lambda: card_repo_dep,
+            IngestionJobRepositoryDependMarker: (
+                lambda: ingestion_job_repo_dep
+            ),
         },
     ):
         yield app
@@ -1,7 +1,11 @@
+import csv
 import json
 
+import httpx
+import pytest
 from fastapi import status
 
+from faqmy_backend.db.repositories.cards import CardRepository
 from faqmy_backend.services.bot import BotSDK
 
 
@@ -204,6 +208,16 @@ async def test_upload_file(
         assert resp.status_code == status.HTTP_202_ACCEPTED
         assert len(await card_repo_dep.get_by_stack_id(stack.id)) == 3
 
+    resp = await client.get("/v1/dashboard/ingestions/" + resp.json()["id"])
+    assert all(
+        (
+            resp.json()["status"] == "done",
+            resp.json()["documents_parsed"] == 3,
+            resp.json()["cards_written"] == 3,
+            resp.json()["failures"] == 0,
+        )
+    )
+
 
 async def test_scrape_url(
     client, stack, session, test_root, httpx_mock, card_repo_dep
@@ -232,3 +246,179 @@ async def test_scrape_url(
     )
     assert resp.status_code == status.HTTP_202_ACCEPTED
     assert len(await card_repo_dep.get_by_stack_id(stack.id)) == 2
+
+    resp = await client.get("/v1/dashboard/ingestions/" + resp.json()["id"])
+    assert all(
+        (
+            resp.json()["status"] == "done",
+            resp.json()["kind"] == "url",
+            resp.json()["cards_written"] == 2,
+        )
+    )
+
+
+async def test_scrape_url_failure_is_reported(client, stack, httpx_mock):
+    httpx_mock.add_exception(
+        httpx.ReadTimeout("Bot is too slow"),
+        url=BotSDK(stack.id).scrape_url,
+    )
+
+    resp = await client.post(
+        url="/v1/dashboard/cards/_url",
+        json={
+            "stack_id": stack.id,
+            "url": "https://libraryofbabel.info/book.cgi",
+        },
+    )
+    assert resp.status_code == status.HTTP_202_ACCEPTED
+
+    resp = await client.get("/v1/dashboard/ingestions/" + resp.json()["id"])
+    assert all(
+        (
+            resp.json()["status"] == "failed",
+            "ReadTimeout" in resp.json()["error"],
+        )
+    )
+
+
+async def test_foreign_ingestion_job_not_found(client):
+    resp = await client.get("/v1/dashboard/ingestions/ijob_unpredictable")
+    assert resp.status_code == status.HTTP_404_NOT_FOUND
+
+
+async def test_create_card_bumps_cards_generation(client, stack, session):
+    generation = stack.cards_generation
+
+    await client.post(
+        "/v1/dashboard/cards",
+        json={
+            "stack_id": stack.id,
+            "question": "To be or not to be?",
+            "answer": "That is the question",
+        },
+    )
+
+    await session.refresh(stack)
+    assert stack.cards_generation == generation + 1
+
+
+async def test_learn_many(client, stack, httpx_mock, card_repo_dep):
+    httpx_mock.add_response(
+        url=BotSDK(stack.id).url_prefix,
+        method="POST",
+        content=json.dumps({"id": "es_doc_id"}).encode(),
+    )
+    card_ids = []
+    for i in range(3):
+        resp = await client.post(
+            "/v1/dashboard/cards",
+            json={
+                "stack_id": stack.id,
+                "question": f"Question {i}",
+                "answer": f"Answer {i}",
+            },
+        )
+        card_ids.append(resp.json()["id"])
+
+    resp = await client.post(
+        "/v1/dashboard/cards/_learn",
+        json={"stack_id": stack.id, "card_ids": card_ids[:2]},
+    )
+    assert resp.status_code == status.HTTP_200_OK
+    assert sorted(resp.json()["succeeded"]) == sorted(card_ids[:2])
+
+    # The rest of the stack
+    resp = await client.post(
+        "/v1/dashboard/cards/_learn", json={"stack_id": stack.id}
+    )
+    assert resp.json() == {"succeeded": card_ids[2:], "failed": []}
+
+    learned = await card_repo_dep.get_by_stack_id(stack.id, learned=True)
+    assert len(learned) == 3
+
+
+async def test_unlearn_many(client, stack, httpx_mock, card_repo_dep):
+    bot_sdk = BotSDK(stack.id)
+    httpx_mock.add_response(
+        url=bot_sdk.url_prefix,
+        method="POST",
+        content=json.dumps({"id": "es_doc_id"}).encode(),
+    )
+    httpx_mock.add_response(
+        url=bot_sdk.url_prefix + "/es_doc_id/delete",
+        method="GET",
+        content=json.dumps({"status": "document deleted"}).encode(),
+    )
+    resp = await client.post(
+        "/v1/dashboard/cards",
+        json={
+            "stack_id": stack.id,
+            "question": "To be or not to be?",
+            "answer": "That is the question",
+        },
+    )
+    card_id = resp.json()["id"]
+    await client.post("/v1/dashboard/cards/" + card_id + "/learn")
+
+    resp = await client.post(
+        "/v1/dashboard/cards/_learn",
+        json={"stack_id": stack.id, "unlearn": True},
+    )
+    assert resp.json() == {"succeeded": [card_id], "failed": []}
+    assert not await card_repo_dep.get_by_stack_id(stack.id, learned=True)
+
+
+async def test_foreign_card_not_found(client, session, other_stack):
+    card = await CardRepository(session).create(other_stack.id, "Q", "A")
+    url = "/v1/dashboard/cards/" + card.id
+
+    responses = [
+        await client.get(url),
+        await client.patch(url, json={"question": "Q", "answer": "Stolen"}),
+        await client.delete(url),
+    ]
+
+    assert {resp.status_code for resp in responses} == {
+        status.HTTP_404_NOT_FOUND
+    }
+    assert (await CardRepository(session).get_by_id(card.id)).answer == "A"
+
+
+@pytest.mark.parametrize(
+    argnames="format", argvalues=["json", "ndjson", "csv"]
+)
+async def test_export_cards(client, stack, session, format):
+    repo = CardRepository(session)
+    cards = [await repo.create(stack.id, f"Q{i}", f"A,{i}") for i in range(3)]
+
+    resp = await client.get(
+        "/v1/dashboard/cards/export",
+        params={"stack_id": stack.id, "format": format},
+    )
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert f"cards-{stack.id}.{format}" in resp.headers["Content-Disposition"]
+    if format == "json":
+        rows = resp.json()
+    elif format == "ndjson":
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+    else:
+        rows = list(csv.DictReader(resp.text.splitlines()))
+    assert [(r["id"], r["answer"]) for r in rows] == [
+        (c.id, c.answer) for c in cards
+    ]
+
+
+async def test_export_no_cards(client, stack):
+    resp = await client.get(
+        "/v1/dashboard/cards/export",
+        params={"stack_id": stack.id, "format": "json"},
+    )
+    assert resp.json() == []
+
+
+async def test_export_foreign_cards(client, other_stack):
+    resp = await client.get(
+        "/v1/dashboard/cards/export", params={"stack_id": other_stack.id}
+    )
+    assert resp.status_code == status.HTTP_404_NOT_FOUND
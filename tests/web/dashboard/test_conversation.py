@@ -1,6 +1,10 @@
+import datetime
+import json
+
 from fastapi import status
 
 from faqmy_backend.db.repositories.conversation import ConversationRepository
+from faqmy_backend.db.repositories.message import MessageRepository
 
 
 async def test_delete_conversation(client, stack, session):
@@ -9,3 +13,41 @@ async def test_delete_conversation(client, stack, session):
 
     resp = await client.get("/v1/dashboard/conversations/" + conv.id)
     assert resp.status_code == status.HTTP_404_NOT_FOUND
+
+
+async def test_export_messages(client, stack, session):
+    conv = await ConversationRepository(session).create(stack.id)
+    repo = MessageRepository(session)
+    question = await repo.create_message(conv.id, "Hi")
+    reply = await repo.reply_message(question.id, "Hello")
+    start = datetime.datetime.now(datetime.UTC) - datetime.timedelta(hours=1)
+
+    resp = await client.get(
+        "/v1/dashboard/messages/export",
+        params={"start": start.isoformat(), "stack_id": stack.id},
+    )
+
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [(r["id"], r["conversation_id"], r["who"]) for r in rows] == [
+        (question.id, conv.id, "user"),
+        (reply.id, conv.id, "bot"),
+    ]
+
+    resp = await client.get(
+        "/v1/dashboard/messages/export",
+        params={"start": start.isoformat(), "end": start.isoformat()},
+    )
+    assert resp.text == ""
+
+
+async def test_list_conversations(client, stack, session):
+    conv = await ConversationRepository(session).create(stack.id)
+
+    resp = await client.get("/v1/dashboard/conversations")
+
+    [item] = resp.json()
+    assert (item["id"], item["stack"]["id"], item["stack"]["name"]) == (
+        conv.id,
+        stack.id,
+        stack.name,
+    )
@@ -100,10 +100,22 @@ async def test_edit_stack_regression_zero_delay(client, stack):
         "/v1/dashboard/stacks/" + stack.id,
         json={
             "name": "asdfasd",
-            "delay": 0,
+            "widget_delay": 0,
         },
     )
     assert resp.json()["widget_delay"] == 0
 
     resp = await client.get("/v1/dashboard/stacks/" + stack.id)
     assert resp.json()["widget_delay"] == 0
+
+
+async def test_edit_stack_keeps_omitted_fields(client, stack):
+    resp = await client.patch(
+        "/v1/dashboard/stacks/" + stack.id, json={"name": "Renamed"}
+    )
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert (resp.json()["name"], resp.json()["widget_delay"]) == (
+        "Renamed",
+        3,
+    )
@@ -0,0 +1,211 @@
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+from fastapi import status
+from fastapi_users.jwt import generate_jwt
+
+from faqmy_backend.conf import settings
+from faqmy_backend.db.repositories.conversation import ConversationRepository
+from faqmy_backend.db.repositories.usage import UsageRepository
+from faqmy_backend.services.billing import apply_event
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(monkeypatch):
+    monkeypatch.setattr(settings.stripe, "webhook_secret", "whsec_test")
+
+
+def event(type: str, obj: dict, created: int | None = None) -> dict:
+    return {
+        "id": "evt_" + obj["id"],
+        "object": "event",
+        "type": type,
+        "created": created or int(time.time()),
+        "data": {"object": obj},
+    }
+
+
+def signed(payload: bytes) -> dict:
+    timestamp = int(time.time())
+    signature = hmac.new(
+        settings.stripe.webhook_secret.encode(),
+        f"{timestamp}.".encode() + payload,
+        hashlib.sha256,
+    ).hexdigest()
+    return {"Stripe-Signature": f"t={timestamp},v1={signature}"}
+
+
+def customer(user) -> dict:
+    return {
+        "id": "cus_1",
+        "object": "customer",
+        "created": 1700000000,
+        "email": user.email,
+    }
+
+
+def subscription(**values) -> dict:
+    return {
+        "id": "sub_1",
+        "object": "subscription",
+        "created": 1700000000,
+        "customer": "cus_1",
+        "status": "active",
+        "start_date": 1700000000,
+        "trial_start": None,
+        "trial_end": None,
+        "current_period_start": 1700000000,
+        "current_period_end": 1702592000,
+        "plan": {
+            "id": "price_1",
+            "product": "prod_1",
+            "interval": "month",
+            "interval_count": 1,
+            "amount": 900,
+        },
+        **values,
+    }
+
+
+def product(**values) -> dict:
+    return {
+        "id": "prod_1",
+        "object": "product",
+        "created": 1700000000,
+        "name": "Starter",
+        "active": True,
+        "metadata": {"messages_count": "100"},
+        **values,
+    }
+
+
+async def test_webhook_writes_mirror(client, user):
+    payload = json.dumps(event("customer.created", customer(user))).encode()
+
+    resp = await client.post(
+        "/v1/billing/webhook", content=payload, headers=signed(payload)
+    )
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == {"applied": True}
+
+
+@pytest.mark.parametrize(
+    argnames="headers",
+    argvalues=[{}, {"Stripe-Signature": "t=1,v1=forged"}],
+)
+async def test_webhook_rejects_unsigned(client, user, headers):
+    payload = json.dumps(event("customer.created", customer(user))).encode()
+
+    resp = await client.post(
+        "/v1/billing/webhook", content=payload, headers=headers
+    )
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_webhook_needs_secret(client, user, monkeypatch):
+    payload = json.dumps(event("customer.created", customer(user))).encode()
+    headers = signed(payload)
+    monkeypatch.setattr(settings.stripe, "webhook_secret", "")
+
+    resp = await client.post(
+        "/v1/billing/webhook", content=payload, headers=headers
+    )
+
+    assert resp.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+async def test_stale_event_is_skipped(session):
+    now = int(time.time())
+    assert await apply_event(session, event("product.updated", product(), now))
+    assert not await apply_event(
+        session, event("product.deleted", product(), now - 60)
+    )
+    assert not await apply_event(
+        session, event("invoice.paid", {"id": "in_1", "object": "invoice"})
+    )
+
+
+@pytest.mark.parametrize(
+    argnames="events, reason",
+    argvalues=[
+        ([], "no customer found"),
+        (
+            [
+                (
+                    "customer.subscription.deleted",
+                    subscription(status="canceled"),
+                )
+            ],
+            "no active or trialing subscription found",
+        ),
+        (
+            [("customer.subscription.created", subscription())],
+            "subscription product not found",
+        ),
+        (
+            [
+                ("customer.subscription.created", subscription()),
+                ("product.created", product()),
+            ],
+            "all good",
+        ),
+    ],
+)
+async def test_widget_status(client, session, user, stack, events, reason):
+    if events:
+        await apply_event(session, event("customer.created", customer(user)))
+    for type, obj in events:
+        await apply_event(session, event(type, obj))
+    conversation = await ConversationRepository(session).create(stack.id)
+    await UsageRepository(session).count_message(conversation.id)
+
+    resp = await client.get(f"/v1/billing/widget/{stack.id}")
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()["reason"] == reason
+    if reason == "all good":
+        assert resp.json()["metadata"] == {
+            "actual_message_count": 1,
+            "plan_message_count": 100,
+        }
+
+
+async def test_subscription_detail(client, session, user):
+    await apply_event(session, event("customer.created", customer(user)))
+    await apply_event(
+        session, event("customer.subscription.created", subscription())
+    )
+    token = generate_jwt(
+        data={"sub": str(user.id), "aud": ["fastapi-users:auth"]},
+        secret=settings.users.jwt_secret,
+        lifetime_seconds=settings.users.jwt_lifetime_seconds,
+    )
+
+    resp = await client.get(
+        "/v1/billing/subscription",
+        headers={"Authorization": "Bearer " + token},
+    )
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == [
+        {
+            "status": "active",
+            "id": "sub_1",
+            "created": 1700000000,
+            "start_date": 1700000000,
+            "trial_start": None,
+            "trial_end": None,
+            "current_period_end": 1702592000,
+            "current_period_start": 1700000000,
+            "plan_id": "price_1",
+            "plan_interval": "month",
+            "plan_interval_count": 1,
+            "plan_amount": 900,
+            "plan_product": "prod_1",
+        }
+    ]
@@ -1,8 +1,12 @@
 import pytest
 from fastapi import status
 
+from faqmy_backend.app.routes.client import replay_messages
+from faqmy_backend.db.exceptions import DatabaseError
+from faqmy_backend.db.repositories.base import PAGE_SIZE
 from faqmy_backend.db.repositories.conversation import ConversationRepository
 from faqmy_backend.db.repositories.message import MessageRepository
+from faqmy_backend.db.repositories.reply_job import ReplyJobRepository
 from faqmy_backend.services.bot import BotSDK
 
 
@@ -75,6 +79,80 @@ async def test_list_messages(
         assert "detail" in resp.json()
 
 
+async def test_list_messages_pages(client, stack, session):
+    conversation = await ConversationRepository(session).create(stack.id)
+    repo = MessageRepository(session)
+    messages = [
+        await repo.create_message(conversation.id, f"Q{i}") for i in range(3)
+    ]
+    params = {
+        "conversation_id": conversation.id,
+        "password": conversation.password,
+    }
+
+    resp = await client.get(
+        "/v1/client/messages", params={**params, "limit": 2}
+    )
+    assert [m["id"] for m in resp.json()] == [m.id for m in messages[1:]]
+    assert "X-Next-Cursor" not in resp.headers
+
+    resp = await client.get(
+        "/v1/client/messages",
+        params={**params, "cursor": messages[0].cursor, "limit": 1},
+    )
+    assert [m["id"] for m in resp.json()] == [messages[1].id]
+
+    resp = await client.get(
+        "/v1/client/messages",
+        params={**params, "cursor": resp.headers["X-Next-Cursor"]},
+    )
+    assert [m["id"] for m in resp.json()] == [messages[2].id]
+    assert "X-Next-Cursor" not in resp.headers
+
+    resp = await client.get(
+        "/v1/client/messages",
+        params={**params, "since": resp.json()[0]["cursor"]},
+    )
+    assert resp.json() == []
+
+
+async def test_list_messages_without_cursor_ends_with_reply(
+    client, stack, session
+):
+    conversation = await ConversationRepository(session).create(stack.id)
+    repo = MessageRepository(session)
+    for i in range(PAGE_SIZE + 5):
+        question = await repo.create_message(conversation.id, f"Q{i}")
+    reply = await repo.reply_message(question.id, "The latest reply")
+
+    resp = await client.get(
+        "/v1/client/messages",
+        params={
+            "conversation_id": conversation.id,
+            "password": conversation.password,
+        },
+    )
+    assert len(resp.json()) == PAGE_SIZE
+    assert resp.json()[-1]["id"] == reply.id
+
+
+@pytest.mark.parametrize(
+    argnames=["params", "expected_code"],
+    argvalues=[
+        ({"cursor": "bad"}, 400),
+        ({"since": "bad"}, 400),
+        ({"limit": 0}, 422),
+        ({"limit": 501}, 422),
+    ],
+)
+async def test_list_messages_bad_page(client, params, expected_code):
+    resp = await client.get(
+        "/v1/client/messages",
+        params={"conversation_id": "ok", "password": "ok", **params},
+    )
+    assert resp.status_code == expected_code
+
+
 async def test_create_message(client, stack, session, httpx_mock):
     httpx_mock.add_response(
         url=BotSDK(stack.id).url_prefix + "/ask",
@@ -98,6 +176,28 @@ async def test_create_message(client, stack, session, httpx_mock):
     )
 
 
+async def test_create_message_rolls_back_without_job(
+    client, stack, session, monkeypatch
+):
+    conversation = await ConversationRepository(session).create(stack.id)
+
+    async def enqueue(self, message_id):
+        raise DatabaseError(RuntimeError("Queue is unavailable"))
+
+    monkeypatch.setattr(ReplyJobRepository, "enqueue", enqueue)
+
+    with pytest.raises(DatabaseError):
+        await client.post(
+            "/v1/client/messages",
+            json={"conversation_id": conversation.id, "text": "Hello?"},
+        )
+
+    page = await MessageRepository(session).get_by_conversation(
+        conversation.id
+    )
+    assert page.items == []
+
+
 async def test_create_message_creates_reply(
     client, stack, session, httpx_mock
 ):
@@ -122,3 +222,32 @@ async def test_create_message_creates_reply(
     reply = await MessageRepository(session).get_by_parent_id(message_id)
 
     assert reply.parent_id == message_id
+
+
+async def test_stream_messages_wrong_password(client, stack, session):
+    conversation = await ConversationRepository(session).create(stack.id)
+
+    resp = await client.get(
+        "/v1/client/messages/stream",
+        params={"conversation_id": conversation.id, "password": "wrong"},
+    )
+    assert resp.status_code == status.HTTP_404_NOT_FOUND
+
+
+async def test_replay_messages_after_last_event(stack, session):
+    conv_repo = ConversationRepository(session)
+    repo = MessageRepository(session)
+    conversation = await conv_repo.create(stack.id)
+    other = await conv_repo.create(stack.id)
+    question = await repo.create_message(conversation.id, "Question")
+    seen = await repo.reply_message(question.id, "Seen")
+    await repo.create_message(conversation.id, "Another question")
+    missed = await repo.reply_message(question.id, "Missed")
+    await repo.create_message(other.id, "Elsewhere")
+
+    replayed = [
+        m.id async for m in replay_messages(repo, conversation.id, seen.id)
+    ]
+    foreign = [m.id async for m in replay_messages(repo, other.id, seen.id)]
+
+    assert (replayed, foreign) == ([missed.id], [])
@@ -0,0 +1,27 @@
+import fastapi
+import httpx
+from fastapi import Depends
+
+from faqmy_backend.app.builder import build_app
+from faqmy_backend.app.dependencies import (
+    CardRepositoryDependMarker,
+    GetDbDependMarker,
+    StackRepositoryDependMarker,
+    UserDbMarker,
+)
+
+
+async def test_request_shares_one_session(session):
+    app = build_app(fastapi.FastAPI())
+    app.dependency_overrides[GetDbDependMarker] = lambda: session
+
+    @app.get("/sessions")
+    async def sessions(
+        stack_repo=Depends(StackRepositoryDependMarker),
+        card_repo=Depends(CardRepositoryDependMarker),
+        user_db=Depends(UserDbMarker),
+    ):
+        return [id(stack_repo._session), id(card_repo._session), id(user_db)]
+
+    async with httpx.AsyncClient(app=app, base_url="http://faqmy") as ac:
+        assert set((await ac.get("/sessions")).json()) == {id(session)}
@@ -0,0 +1,31 @@
+import pytest
+from fastapi import status
+
+from faqmy_backend.conf import settings
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(settings.app, "metrics_token", "s3cret")
+    return "s3cret"
+
+
+async def test_metrics_off_without_token(client):
+    response = await client.get("/status/metrics")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.parametrize("header", [None, "Bearer wrong", "s3cret"])
+async def test_metrics_need_token(client, metrics_token, header):
+    headers = {"Authorization": header} if header else {}
+    response = await client.get("/status/metrics", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+async def test_metrics(client, metrics_token):
+    response = await client.get(
+        "/status/metrics",
+        headers={"Authorization": f"Bearer {metrics_token}"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert "db_pool" in response.json()